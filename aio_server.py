@@ -0,0 +1,216 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import asyncio
+import logging
+from concurrent import futures
+import grpc
+import signal
+
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+
+from interceptors import exception_to_status
+from protos import dataset_pb2_grpc
+from server import DatasetServicer, HEALTH_SERVICES, prepare_database
+
+import config
+import metrics
+import profiling
+import timing
+import warmup
+
+# setup logger
+FORMAT = '%(asctime)s %(levelname)s %(message)s'
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+_END_OF_STREAM = object()
+
+
+class AsyncDatasetServicer(dataset_pb2_grpc.DatasetServicesServicer):
+    """asyncio front-end of DatasetServicer.
+
+    The blocking handlers (pymongo and minio calls) run in thread pools while
+    the event loop multiplexes every in-flight rpc. Rpcs listing object store
+    buckets get their own pool, so slow version creations cannot starve
+    metadata calls.
+    """
+
+    def __init__(self, db_executor, storage_executor):
+        self._servicer = DatasetServicer()
+        self._db_executor = db_executor
+        self._storage_executor = storage_executor
+
+    @staticmethod
+    def _call(session, breakdown, function, *args):
+        # runs in the executor threads, where the breakdown and profiler must be active
+        if session is None:
+            return timing.run(breakdown, function, *args)
+        return session.run(timing.run, breakdown, function, *args)
+
+    async def _unary(self, method, request, context, executor=None):
+        loop = asyncio.get_running_loop()
+        started = metrics.call_started(method.__name__, request)
+        breakdown = timing.Breakdown()
+        session = profiling.start(method.__name__)
+        try:
+            response = await loop.run_in_executor(executor or self._db_executor,
+                                                  self._call, session, breakdown, method, request, context)
+        except Exception as e:
+            code, details = exception_to_status(e)
+            metrics.call_finished(method.__name__, started, code)
+            # trailing metadata must be set before aborting
+            timing.finish(breakdown, method.__name__, context)
+            await context.abort(code, details)
+        finally:
+            if session is not None:
+                session.finish()
+        timing.finish(breakdown, method.__name__, context)
+        metrics.response_sent(method.__name__, response)
+        metrics.call_finished(method.__name__, started, grpc.StatusCode.OK)
+        return response
+
+    async def _stream(self, method, request, context):
+        loop = asyncio.get_running_loop()
+        started = metrics.call_started(method.__name__, request)
+        breakdown = timing.Breakdown()
+        session = profiling.start(method.__name__)
+        code, finished = grpc.StatusCode.OK, False
+        try:
+            responses = await loop.run_in_executor(self._db_executor,
+                                                   self._call, session, breakdown, method, request, context)
+            while True:
+                response = await loop.run_in_executor(self._db_executor,
+                                                      self._call, session, breakdown, next, responses,
+                                                      _END_OF_STREAM)
+                if response is _END_OF_STREAM:
+                    return
+                metrics.response_sent(method.__name__, response)
+                yield response
+        except Exception as e:
+            code, details = exception_to_status(e)
+            # trailing metadata must be set before aborting
+            timing.finish(breakdown, method.__name__, context)
+            finished = True
+            await context.abort(code, details)
+        except (GeneratorExit, asyncio.CancelledError):
+            code = grpc.StatusCode.CANCELLED
+            raise
+        finally:
+            if not finished:
+                timing.finish(breakdown, method.__name__, context)
+            if session is not None:
+                session.finish()
+            metrics.call_finished(method.__name__, started, code)
+
+    async def RetrieveDataset(self, request, context):
+        return await self._unary(self._servicer.RetrieveDataset, request, context)
+
+    async def CreateDataset(self, request, context):
+        return await self._unary(self._servicer.CreateDataset, request, context)
+
+    async def UpdateDataset(self, request, context):
+        return await self._unary(self._servicer.UpdateDataset, request, context)
+
+    async def DeleteDataset(self, request, context):
+        return await self._unary(self._servicer.DeleteDataset, request, context)
+
+    async def SearchDatasets(self, request, context):
+        return await self._unary(self._servicer.SearchDatasets, request, context)
+
+    async def StreamSearchDatasets(self, request, context):
+        async for response in self._stream(self._servicer.StreamSearchDatasets, request, context):
+            yield response
+
+    async def RetrieveVersion(self, request, context):
+        return await self._unary(self._servicer.RetrieveVersion, request, context)
+
+    async def CreateVersion(self, request, context):
+        return await self._unary(self._servicer.CreateVersion, request, context, self._storage_executor)
+
+    async def SearchVersions(self, request, context):
+        return await self._unary(self._servicer.SearchVersions, request, context)
+
+    async def StreamSearchVersions(self, request, context):
+        async for response in self._stream(self._servicer.StreamSearchVersions, request, context):
+            yield response
+
+    async def DiffVersions(self, request, context):
+        async for response in self._stream(self._servicer.DiffVersions, request, context):
+            yield response
+
+    async def ListVersionFiles(self, request, context):
+        return await self._unary(self._servicer.ListVersionFiles, request, context)
+
+    async def StatVersionFile(self, request, context):
+        return await self._unary(self._servicer.StatVersionFile, request, context)
+
+    async def GetVersionTreeSummary(self, request, context):
+        return await self._unary(self._servicer.GetVersionTreeSummary, request, context)
+
+    async def CreateBucket(self, request, context):
+        return await self._unary(self._servicer.CreateBucket, request, context, self._storage_executor)
+
+
+def create_server(server_address, health_servicer=None):
+    db_executor = futures.ThreadPoolExecutor(max_workers=config.AIO_DB_WORKERS)
+    storage_executor = futures.ThreadPoolExecutor(max_workers=config.AIO_STORAGE_WORKERS)
+
+    server = grpc.aio.server(maximum_concurrent_rpcs=config.AIO_MAX_CONCURRENT_RPCS or None)
+    dataset_pb2_grpc.add_DatasetServicesServicer_to_server(
+        AsyncDatasetServicer(db_executor, storage_executor), server
+    )
+    health_pb2_grpc.add_HealthServicer_to_server(health_servicer or health.aio.HealthServicer(), server)
+
+    port = server.add_insecure_port(server_address)
+    return server, port
+
+
+async def drain(server, health_servicer):
+    """Report NOT_SERVING, give load balancers time to notice, then let in-flight rpcs finish."""
+    logger.info("aio server is draining............")
+    await health_servicer.enter_graceful_shutdown()
+    await asyncio.sleep(config.SHUTDOWN_DRAIN_DELAY)
+    await server.stop(config.SHUTDOWN_GRACE_PERIOD)
+
+
+async def serve():
+    loop = asyncio.get_running_loop()
+    metrics.start_http_server()
+    profiling.install_signal_handler()
+    health_servicer = health.aio.HealthServicer()
+    for service in HEALTH_SERVICES:
+        await health_servicer.set(service, health_pb2.HealthCheckResponse.NOT_SERVING)
+    server, port = create_server('[::]:50051', health_servicer)
+    await server.start()
+    loop.add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(drain(server, health_servicer)))
+    logger.info("aio server is warming up on port {} ............".format(port))
+
+    # the loop answers health checks meanwhile, traffic is only routed once SERVING
+    await loop.run_in_executor(None, prepare_database)
+    await loop.run_in_executor(None, warmup.warm_up, DatasetServicer())
+    for service in HEALTH_SERVICES:
+        await health_servicer.set(service, health_pb2.HealthCheckResponse.SERVING)
+    logger.info("aio server is serving on port {} ............".format(port))
+    await server.wait_for_termination()
+    logger.info("aio server is stopped............")
+
+
+if __name__ == '__main__':
+    logger.info("aio server is starting............")
+    asyncio.run(serve())
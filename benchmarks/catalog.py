@@ -0,0 +1,199 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Bulk loader of synthetic catalogs for the scale benchmarks.
+
+Datasets and versions are inserted as raw documents in batches, straight into
+the Mongo configured in .env, whose collections are dropped first. To guard
+against dropping a real catalog, the database name must contain "benchmark"
+unless --drop is given. Datasets are spread over projects and versions
+over datasets with a Zipf-like skew, so that a few hot projects and datasets
+hold most of the documents, like in production. A catalog grows in steps,
+each adding documents to reach the next scale.
+
+    python benchmarks/catalog.py --datasets 1000000 --versions 1000000 --projects 100
+    python benchmarks/catalog.py --drop --datasets 1000
+"""
+import argparse
+from array import array
+import datetime
+import itertools
+import os
+import random
+import sys
+import time
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from models import documents, indexes  # noqa: E402
+from utils import version_name  # noqa: E402
+
+BATCH_SIZE = 10000
+# databases that reset() drops without --drop
+BENCHMARK_DATABASE_MARKER = 'benchmark'
+EPOCH = datetime.datetime(2020, 1, 1)
+
+
+def dataset_id(index):
+    return ObjectId('{:024x}'.format(index + 1))
+
+
+def version_id(index):
+    return ObjectId('ff{:022x}'.format(index + 1))
+
+
+def skewed_indexes(rnd, count, size, skew):
+    """Draw size indexes in [0, count), index i having a weight of 1 / (i + 1) ** skew."""
+    cum_weights = list(itertools.accumulate(1.0 / (index + 1) ** skew for index in range(count)))
+    return rnd.choices(range(count), cum_weights=cum_weights, k=size)
+
+
+def _batches(items):
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, BATCH_SIZE))
+        if not batch:
+            return
+        yield batch
+
+
+class Catalog:
+    """A synthetic catalog, remembering what it inserted so that it can keep growing."""
+
+    def __init__(self, projects=100, skew=1.1, deleted_ratio=0.02, seed=0):
+        self.projects = ['project-{}'.format(index) for index in range(projects)]
+        self.skew = skew
+        self.deleted_ratio = deleted_ratio
+        self.rnd = random.Random(seed)
+        self.dataset_count = 0
+        self.version_count = 0
+        # number of versions of every dataset, indexed like the datasets
+        self.version_counters = array('I')
+        self.deleted = set()
+        # index of the last version of a dataset that is not deleted
+        self.last_live_version = None
+
+    def reset(self, drop=False):
+        """Drop and recreate the collections, refusing to unless the database is
+        dedicated to benchmarks or drop is set."""
+        name = documents.Dataset._get_db().name
+        if not drop and BENCHMARK_DATABASE_MARKER not in name:
+            raise RuntimeError("refusing to drop the collections of database {!r}, use a database whose name "
+                               "contains {!r} or pass --drop".format(name, BENCHMARK_DATABASE_MARKER))
+        for document in indexes.DOCUMENTS:
+            document.drop_collection()
+        indexes.ensure_indexes()
+
+    def grow(self, dataset_count, version_count):
+        """Insert datasets and versions until the catalog holds the given numbers."""
+        started = time.perf_counter()
+        self._add_datasets(dataset_count)
+        self._add_versions(version_count)
+        return time.perf_counter() - started
+
+    def _add_datasets(self, dataset_count):
+        collection = documents.Dataset._get_collection()
+        new = range(self.dataset_count, dataset_count)
+        projects = skewed_indexes(self.rnd, len(self.projects), len(new), self.skew)
+        self.version_counters.extend(0 for _ in new)
+
+        def datasets():
+            for index, project in zip(new, projects):
+                deleted = index > 0 and self.rnd.random() < self.deleted_ratio
+                if deleted:
+                    self.deleted.add(index)
+                create_at = EPOCH + datetime.timedelta(seconds=index)
+                yield {'_id': dataset_id(index), 'name': 'dataset-{}'.format(index), 'description': 'synthetic',
+                       'scope': 'Local', 'project': self.projects[project], 'version': '', 'version_seq': 0,
+                       'version_counter': 0, 'deleted': deleted, 'create_at': create_at, 'last_update': create_at}
+
+        for batch in _batches(datasets()):
+            collection.insert_many(batch, ordered=False)
+        self.dataset_count = max(self.dataset_count, dataset_count)
+
+    def _add_versions(self, version_count):
+        collection = documents.Version._get_collection()
+        new = range(self.version_count, version_count)
+        owners = skewed_indexes(self.rnd, self.dataset_count, len(new), self.skew)
+        touched = set()
+
+        def versions():
+            for index, owner in zip(new, owners):
+                self.version_counters[owner] += 1
+                seq = self.version_counters[owner]
+                touched.add(owner)
+                if owner not in self.deleted:
+                    self.last_live_version = index
+                yield {'_id': version_id(index), 'name': version_name(seq), 'seq': seq,
+                       'dataset': dataset_id(owner), 'related_bucket': 'bucket-{}'.format(owner),
+                       'size': 0, 'file_count': 0, 'chunk_count': 0, 'manifest_kind': 'full', 'delta_depth': 0,
+                       'directory_count': 0, 'author': 'user-{}'.format(owner % 1000),
+                       'deleted': owner in self.deleted,
+                       'create_at': EPOCH + datetime.timedelta(seconds=self.dataset_count + index)}
+
+        for batch in _batches(versions()):
+            collection.insert_many(batch, ordered=False)
+        self.version_count = max(self.version_count, version_count)
+
+        updates = (UpdateOne({'_id': dataset_id(owner)},
+                             {'$set': {'version': version_name(self.version_counters[owner]),
+                                       'version_seq': self.version_counters[owner],
+                                       'version_counter': self.version_counters[owner]}})
+                   for owner in touched)
+        for batch in _batches(updates):
+            documents.Dataset._get_collection().bulk_write(batch, ordered=False)
+
+    def hot_dataset(self):
+        """The dataset holding the most versions."""
+        return dataset_id(0)
+
+    def hot_project(self):
+        return self.projects[0]
+
+    def middle_dataset(self):
+        """An unsaved copy of the dataset halfway through the catalog, to build page tokens from."""
+        index = self.dataset_count // 2
+        return documents.Dataset(id=dataset_id(index), create_at=EPOCH + datetime.timedelta(seconds=index))
+
+    def last_version(self):
+        """The most recent version whose dataset is not deleted."""
+        return version_id(self.last_live_version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", type=int, default=100000)
+    parser.add_argument("--versions", type=int, default=100000)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of projects and datasets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--drop", action="store_true", help="drop the collections of any database")
+    args = parser.parse_args()
+
+    catalog = Catalog(projects=args.projects, skew=args.skew, seed=args.seed)
+    catalog.reset(drop=args.drop)
+    elapsed = catalog.grow(args.datasets, args.versions)
+    print("loaded {} datasets and {} versions in {:.1f}s".format(args.datasets, args.versions, elapsed))
+
+
+if __name__ == '__main__':
+    main()
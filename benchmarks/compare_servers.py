@@ -0,0 +1,139 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Compare the threaded server (server.py) with the asyncio one (aio_server.py).
+
+Each server runs in its own process against the Mongo and MinIO configured in
+.env. A single asyncio client keeps `--concurrency` RetrieveDataset calls in
+flight for `--duration` seconds, optionally while `--slow-calls` CreateVersion
+calls list `--bucket` in the background, and latency percentiles and
+throughput are printed as JSON.
+
+    python benchmarks/compare_servers.py --concurrency 200 --duration 20 \
+        --slow-calls 12 --bucket my-big-bucket
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import grpc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from models import indexes  # noqa: E402
+from protos import dataset_pb2, dataset_pb2_grpc  # noqa: E402
+
+SERVERS = {
+    "threaded": "import server; s, _ = server.create_server('[::]:{port}'); s.start(); s.wait_for_termination()",
+    "aio": "import asyncio, aio_server\n"
+           "async def main():\n"
+           "    s, _ = aio_server.create_server('[::]:{port}')\n"
+           "    await s.start()\n"
+           "    await s.wait_for_termination()\n"
+           "asyncio.run(main())",
+}
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100.0 * (len(values) - 1))))]
+
+
+async def wait_ready(channel, timeout=30):
+    await asyncio.wait_for(channel.channel_ready(), timeout)
+
+
+async def run_load(port, args):
+    async with grpc.aio.insecure_channel('localhost:%d' % port) as channel:
+        await wait_ready(channel)
+        stub = dataset_pb2_grpc.DatasetServicesStub(channel)
+        dataset = await stub.CreateDataset(dataset_pb2.Dataset(
+            name='benchmark', description='compare_servers benchmark', scope='Global'))
+
+        latencies, errors = [], 0
+        deadline = time.monotonic() + args.duration
+
+        async def slow_caller():
+            while time.monotonic() < deadline:
+                try:
+                    await stub.CreateVersion(dataset_pb2.Version(
+                        dataset=dataset.id, related_bucket=args.bucket, author='benchmark'))
+                except grpc.RpcError:
+                    pass
+
+        async def caller():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    await stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id))
+                    latencies.append(time.perf_counter() - start)
+                except grpc.RpcError:
+                    errors += 1
+
+        slow = [asyncio.ensure_future(slow_caller()) for _ in range(args.slow_calls if args.bucket else 0)]
+        started = time.monotonic()
+        await asyncio.gather(*[caller() for _ in range(args.concurrency)])
+        elapsed = time.monotonic() - started
+        await asyncio.gather(*slow)
+
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def benchmark(mode, port, args):
+    process = subprocess.Popen([sys.executable, "-c", SERVERS[mode].format(port=port)], cwd=ROOT_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return asyncio.run(run_load(port, args))
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument("--port", type=int, default=50061)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--slow-calls", type=int, default=0, help="concurrent CreateVersion calls")
+    parser.add_argument("--bucket", default="", help="bucket listed by the slow CreateVersion calls")
+    args = parser.parse_args()
+
+    # the spawned servers skip prepare_database, indexes are not created on first use
+    indexes.ensure_indexes()
+    results = {mode: benchmark(mode, args.port, args) for mode in args.modes}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Load generator driving every rpc of DatasetServicesStub.
+
+Fixtures are created through the rpcs themselves against the Mongo and MinIO
+configured in .env (local containers or any S3 compatible stand-in). For
+every --files size, a bucket holding that many objects is seeded and a
+dataset gets two versions of it, the second one after a few objects changed.
+
+Clients then keep --concurrency calls in flight for --duration seconds,
+picking rpcs by the weights of --mix. Throughput and latency percentiles of
+every rpc are printed as JSON along with the commit, so that runs can be
+compared, and --baseline adds the ratios to a previous run. CreateVersion
+always lists the smallest bucket, so that it does not dominate the run.
+
+    python benchmarks/loadgen.py --spawn threaded --files 10 10000 --concurrency 50 --duration 30
+    python benchmarks/loadgen.py --target localhost:50051 --mix RetrieveVersion=10 SearchVersions=1 \\
+        --baseline before.json > after.json
+"""
+import argparse
+import asyncio
+from concurrent import futures
+import io
+import json
+import random
+import subprocess
+import sys
+import time
+
+import grpc
+
+from compare_servers import ROOT_DIR, SERVERS, percentile
+from models import indexes
+from protos import dataset_pb2, dataset_pb2_grpc
+import services
+
+DEFAULT_MIX = {
+    "RetrieveDataset": 10, "RetrieveVersion": 10, "SearchDatasets": 5, "SearchVersions": 5,
+    "StreamSearchDatasets": 1, "StreamSearchVersions": 1, "ListVersionFiles": 5, "StatVersionFile": 5,
+    "GetVersionTreeSummary": 3, "DiffVersions": 1, "CreateDataset": 2, "UpdateDataset": 2,
+    "DeleteDataset": 1, "CreateVersion": 1, "CreateBucket": 1,
+}
+
+
+def object_name(index):
+    return "dir-{}/sub-{}/file-{}".format(index % 100, index % 7, index)
+
+
+def seed_bucket(bucket, count, workers=32):
+    """Upload count small objects, returns their names."""
+    minio = services.get_minio_client()
+    names = [object_name(index) for index in range(count)]
+    with futures.ThreadPoolExecutor(workers) as executor:
+        list(executor.map(lambda name: minio.put_object(bucket, name, io.BytesIO(b"v1"), 2), names))
+    return names
+
+
+def change_bucket(bucket, names, rnd, fraction=0.01):
+    """Rewrite, delete and add a fraction of the objects of a bucket."""
+    minio = services.get_minio_client()
+    changed = rnd.sample(names, max(1, int(len(names) * fraction)))
+    for name in changed[::2]:
+        minio.put_object(bucket, name, io.BytesIO(b"v22"), 3)
+    for name in changed[1::2]:
+        minio.remove_object(bucket, name)
+    for index in range(len(changed)):
+        minio.put_object(bucket, "added/file-{}".format(index), io.BytesIO(b"v2"), 2)
+
+
+async def create_fixtures(stub, sizes, rnd):
+    fixtures = []
+    for size in sorted(sizes):
+        bucket = (await stub.CreateBucket(dataset_pb2.Bucket())).name
+        names = await asyncio.get_running_loop().run_in_executor(None, seed_bucket, bucket, size)
+        dataset = await stub.CreateDataset(dataset_pb2.Dataset(
+            name="loadgen-{}".format(size), description="loadgen fixture", scope="Global"))
+        versions = [await stub.CreateVersion(dataset_pb2.Version(
+            dataset=dataset.id, related_bucket=bucket, author="loadgen"))]
+        await asyncio.get_running_loop().run_in_executor(None, change_bucket, bucket, names, rnd)
+        versions.append(await stub.CreateVersion(dataset_pb2.Version(
+            dataset=dataset.id, related_bucket=bucket, author="loadgen")))
+        fixtures.append({"files": size, "bucket": bucket, "dataset": dataset, "versions": versions,
+                         "names": rnd.sample(names, min(len(names), 1000))})
+    return fixtures
+
+
+class Operations:
+    """One coroutine per rpc, building its request from the fixtures."""
+
+    def __init__(self, stub, fixtures, rnd):
+        self.stub = stub
+        self.fixtures = fixtures
+        self.rnd = rnd
+        # datasets created by the load, which UpdateDataset and DeleteDataset consume
+        self.scratch = []
+
+    def fixture(self):
+        return self.rnd.choice(self.fixtures)
+
+    def version(self):
+        return self.rnd.choice(self.fixture()["versions"])
+
+    async def _scratch_dataset(self):
+        if self.scratch:
+            return self.scratch.pop()
+        return await self.stub.CreateDataset(dataset_pb2.Dataset(
+            name="loadgen-scratch", description="loadgen scratch", scope="Global"))
+
+    async def RetrieveDataset(self):
+        await self.stub.RetrieveDataset(dataset_pb2.ID(id=self.fixture()["dataset"].id))
+
+    async def CreateDataset(self):
+        self.scratch.append(await self.stub.CreateDataset(dataset_pb2.Dataset(
+            name="loadgen-scratch", description="loadgen scratch", scope="Global")))
+
+    async def UpdateDataset(self):
+        dataset = await self._scratch_dataset()
+        dataset.description = "updated {}".format(time.time())
+        self.scratch.append(await self.stub.UpdateDataset(dataset))
+
+    async def DeleteDataset(self):
+        dataset = await self._scratch_dataset()
+        await self.stub.DeleteDataset(dataset_pb2.ID(id=dataset.id))
+
+    async def SearchDatasets(self):
+        await self.stub.SearchDatasets(dataset_pb2.SearchDatasetRequest(
+            query=dataset_pb2.SearchDatasetRequest.DatasetFilter(name=self.fixture()["dataset"].name), limit=25))
+
+    async def StreamSearchDatasets(self):
+        request = dataset_pb2.SearchDatasetRequest(
+            query=dataset_pb2.SearchDatasetRequest.DatasetFilter(name=self.fixture()["dataset"].name))
+        async for _ in self.stub.StreamSearchDatasets(request):
+            pass
+
+    async def RetrieveVersion(self):
+        view = self.rnd.choice([dataset_pb2.Full, dataset_pb2.Basic])
+        await self.stub.RetrieveVersion(dataset_pb2.RetrieveVersionRequest(id=self.version().id, view=view))
+
+    async def CreateVersion(self):
+        fixture = self.fixtures[0]
+        await self.stub.CreateVersion(dataset_pb2.Version(
+            dataset=fixture["dataset"].id, related_bucket=fixture["bucket"], author="loadgen"))
+
+    async def SearchVersions(self):
+        await self.stub.SearchVersions(dataset_pb2.SearchVersionRequest(
+            query=dataset_pb2.SearchVersionRequest.VersionFilter(dataset=self.fixture()["dataset"].id),
+            limit=25, view=dataset_pb2.Basic))
+
+    async def StreamSearchVersions(self):
+        request = dataset_pb2.SearchVersionRequest(
+            query=dataset_pb2.SearchVersionRequest.VersionFilter(dataset=self.fixture()["dataset"].id),
+            view=dataset_pb2.Basic)
+        async for _ in self.stub.StreamSearchVersions(request):
+            pass
+
+    async def CreateBucket(self):
+        await self.stub.CreateBucket(dataset_pb2.Bucket())
+
+    async def DiffVersions(self):
+        base, target = self.fixture()["versions"]
+        async for _ in self.stub.DiffVersions(dataset_pb2.DiffVersionsRequest(base=base.id, target=target.id)):
+            pass
+
+    async def ListVersionFiles(self):
+        prefix = "dir-{}/".format(self.rnd.randrange(100))
+        await self.stub.ListVersionFiles(dataset_pb2.ListVersionFilesRequest(
+            version=self.version().id, prefix=prefix, delimiter="/", limit=100))
+
+    async def StatVersionFile(self):
+        fixture = self.fixture()
+        try:
+            await self.stub.StatVersionFile(dataset_pb2.StatVersionFileRequest(
+                version=fixture["versions"][0].id, name=self.rnd.choice(fixture["names"])))
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.NOT_FOUND:
+                raise
+
+    async def GetVersionTreeSummary(self):
+        await self.stub.GetVersionTreeSummary(dataset_pb2.VersionTreeSummaryRequest(
+            version=self.version().id, max_depth=2))
+
+
+def rpc_names():
+    return [method.name for method in dataset_pb2.DESCRIPTOR.services_by_name["DatasetServices"].methods]
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+async def run_load(target, args, mix):
+    rnd = random.Random(args.seed)
+    async with grpc.aio.insecure_channel(target) as channel:
+        await asyncio.wait_for(channel.channel_ready(), 30)
+        stub = dataset_pb2_grpc.DatasetServicesStub(channel)
+        operations = Operations(stub, await create_fixtures(stub, args.files, rnd), rnd)
+
+        names, weights = list(mix), list(mix.values())
+        latencies = {name: [] for name in names}
+        errors = {name: 0 for name in names}
+        recording = False
+
+        async def caller(deadline):
+            while time.monotonic() < deadline:
+                name = rnd.choices(names, weights)[0]
+                started = time.perf_counter()
+                try:
+                    await getattr(operations, name)()
+                except grpc.RpcError:
+                    if recording:
+                        errors[name] += 1
+                    continue
+                if recording:
+                    latencies[name].append(time.perf_counter() - started)
+
+        if args.warmup:
+            await asyncio.gather(*[caller(time.monotonic() + args.warmup) for _ in range(args.concurrency)])
+        recording = True
+        started = time.monotonic()
+        await asyncio.gather(*[caller(started + args.duration) for _ in range(args.concurrency)])
+        elapsed = time.monotonic() - started
+
+    results = {name: summarize(latencies[name], errors[name], elapsed) for name in names}
+    results["total"] = summarize([latency for values in latencies.values() for latency in values],
+                                 sum(errors.values()), elapsed)
+    return results
+
+
+def compare(results, baseline):
+    """Ratios of this run to a baseline run, above 1 meaning more throughput or more latency."""
+    ratios = {}
+    for name, result in results.items():
+        before = baseline.get("methods", {}).get(name)
+        if not before or not before["calls"] or not result["calls"]:
+            continue
+        ratios[name] = {"rps": result["rps"] / before["rps"],
+                        "p50_ms": result["p50_ms"] / max(before["p50_ms"], 1e-9),
+                        "p99_ms": result["p99_ms"] / max(before["p99_ms"], 1e-9)}
+    return ratios
+
+
+def parse_mix(values):
+    mix = dict(DEFAULT_MIX)
+    if values:
+        mix = {}
+        for value in values:
+            name, _, weight = value.partition("=")
+            mix[name] = float(weight or 1)
+    unknown = set(mix) - set(rpc_names())
+    if unknown:
+        raise SystemExit("unknown rpcs in --mix: {}".format(", ".join(sorted(unknown))))
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="localhost:50051", help="address of a running server")
+    parser.add_argument("--spawn", choices=list(SERVERS), help="start a server of this kind on --port instead")
+    parser.add_argument("--port", type=int, default=50061)
+    parser.add_argument("--mix", nargs="+", metavar="RPC=WEIGHT", help="rpcs and their weights, all by default")
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 10000],
+                        help="number of objects of the versions used as fixtures")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of load before recording")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="JSON output of a previous run to compare with")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    missing = set(DEFAULT_MIX) ^ set(rpc_names())
+    if missing:
+        raise SystemExit("DEFAULT_MIX and DatasetServices disagree on: {}".format(", ".join(sorted(missing))))
+
+    process, target = None, args.target
+    if args.spawn:
+        # the spawned server skips prepare_database, indexes are not created on first use
+        indexes.ensure_indexes()
+        process = subprocess.Popen([sys.executable, "-c", SERVERS[args.spawn].format(port=args.port)],
+                                   cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        target = "localhost:{}".format(args.port)
+    try:
+        methods = asyncio.run(run_load(target, args, mix))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                            capture_output=True, text=True).stdout.strip()
+    output = {"commit": commit, "args": vars(args), "mix": mix, "methods": methods}
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            output["baseline"] = compare(methods, json.load(baseline))
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Scale-regression suite of the servicer methods.
+
+A synthetic catalog (see catalog.py) is grown through increasing scales in
+the Mongo configured in .env, which is dropped first (its name must contain
+"benchmark" unless --drop is given). At each scale every case calls a
+DatasetServicer method in-process and records its median latency. Each case declares how its latency may grow with the catalog:
+
+    constant  served by an index lookup or a bounded page
+    log       walks an index whose depth grows with the catalog
+    linear    reads every matching document, such as an exact count
+    capped    reads the matching documents up to ESTIMATED_COUNT_LIMIT
+
+A case fails when its latency at a scale exceeds the reference latency times
+the growth its budget allows, times --tolerance. The reference is the
+smallest scale of the stored baseline when there is one, of this run
+otherwise. Results are printed as JSON and the exit status is 1 on failure.
+
+    python benchmarks/scale.py --scales 1000 10000 100000 1000000
+    python benchmarks/scale.py --update-baseline
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+from catalog import ROOT_DIR, Catalog
+
+sys.path.insert(0, ROOT_DIR)
+
+from cache import response_cache  # noqa: E402
+import config  # noqa: E402
+from protos import dataset_pb2  # noqa: E402
+from server import DatasetServicer  # noqa: E402
+from utils import encode_page_token  # noqa: E402
+
+BASELINE = os.path.join(ROOT_DIR, 'benchmarks', 'baselines', 'scale.json')
+
+BUDGETS = {
+    'constant': lambda scale: 1.0,
+    'log': lambda scale: math.log2(scale),
+    'linear': lambda scale: float(scale),
+    'capped': lambda scale: float(min(scale, config.ESTIMATED_COUNT_LIMIT)),
+}
+
+DatasetFilter = dataset_pb2.SearchDatasetRequest.DatasetFilter
+VersionFilter = dataset_pb2.SearchVersionRequest.VersionFilter
+
+
+def _consume(responses, count=None):
+    for _ in itertools.islice(responses, count):
+        pass
+
+
+def cases(servicer, catalog):
+    """Yield (name, budget, call) for the catalog at its current scale."""
+    hot_dataset = str(catalog.hot_dataset())
+    hot_project = DatasetFilter(project=catalog.hot_project())
+    last_version = str(catalog.last_version())
+    middle_token = encode_page_token(catalog.middle_dataset())
+
+    yield 'RetrieveDataset', 'constant', \
+        lambda: servicer.RetrieveDataset(dataset_pb2.ID(id=hot_dataset), None)
+    yield 'RetrieveVersion (basic)', 'constant', \
+        lambda: servicer.RetrieveVersion(dataset_pb2.RetrieveVersionRequest(
+            id=last_version, view=dataset_pb2.Basic), None)
+    yield 'SearchDatasets (first page)', 'constant', \
+        lambda: servicer.SearchDatasets(dataset_pb2.SearchDatasetRequest(
+            limit=50, count_mode=dataset_pb2.Disabled), None)
+    yield 'SearchDatasets (project, estimated count)', 'capped', \
+        lambda: servicer.SearchDatasets(dataset_pb2.SearchDatasetRequest(
+            query=hot_project, limit=50, count_mode=dataset_pb2.Estimated), None)
+    yield 'SearchDatasets (project, exact count)', 'linear', \
+        lambda: servicer.SearchDatasets(dataset_pb2.SearchDatasetRequest(
+            query=hot_project, limit=50, count_mode=dataset_pb2.Exact), None)
+    yield 'SearchDatasets (middle page token)', 'log', \
+        lambda: servicer.SearchDatasets(dataset_pb2.SearchDatasetRequest(
+            limit=50, page_token=middle_token, count_mode=dataset_pb2.Disabled), None)
+    yield 'StreamSearchDatasets (first 100)', 'constant', \
+        lambda: _consume(servicer.StreamSearchDatasets(dataset_pb2.SearchDatasetRequest(query=hot_project), None),
+                         100)
+    yield 'SearchVersions (first page)', 'constant', \
+        lambda: servicer.SearchVersions(dataset_pb2.SearchVersionRequest(
+            limit=50, count_mode=dataset_pb2.Disabled, view=dataset_pb2.Basic), None)
+    yield 'SearchVersions (dataset, estimated count)', 'capped', \
+        lambda: servicer.SearchVersions(dataset_pb2.SearchVersionRequest(
+            query=VersionFilter(dataset=hot_dataset), limit=50, count_mode=dataset_pb2.Estimated,
+            view=dataset_pb2.Basic), None)
+    yield 'SearchVersions (dataset, exact count)', 'linear', \
+        lambda: servicer.SearchVersions(dataset_pb2.SearchVersionRequest(
+            query=VersionFilter(dataset=hot_dataset), limit=50, count_mode=dataset_pb2.Exact,
+            view=dataset_pb2.Basic), None)
+    yield 'StreamSearchVersions (first 100)', 'constant', \
+        lambda: _consume(servicer.StreamSearchVersions(dataset_pb2.SearchVersionRequest(
+            query=VersionFilter(dataset=hot_dataset), view=dataset_pb2.Basic), None), 100)
+
+
+def measure(call, repeat):
+    call()
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies)
+
+
+def check(results, baseline, tolerance):
+    """Return the failures of results, a {case: {scale: seconds}} mapping, against budgets."""
+    failures = []
+    for name, latencies in results.items():
+        budget = BUDGETS[latencies['budget']]
+        reference = baseline.get(name) or latencies
+        scales = sorted(int(scale) for scale in reference['seconds'])
+        reference_scale = scales[0]
+        reference_seconds = reference['seconds'][str(reference_scale)]
+        for scale, seconds in latencies['seconds'].items():
+            allowed = reference_seconds * budget(int(scale)) / budget(reference_scale) * tolerance
+            if seconds > allowed:
+                failures.append("{} at {}: {:.2f}ms, {} budget allows {:.2f}ms".format(
+                    name, scale, seconds * 1e3, latencies['budget'], allowed * 1e3))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="number of datasets of the catalog at each step")
+    parser.add_argument("--versions-per-dataset", type=float, default=1.0)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of projects and datasets")
+    parser.add_argument("--repeat", type=int, default=20, help="calls per case and scale")
+    parser.add_argument("--tolerance", type=float, default=3.0,
+                        help="factor over the budgeted growth before a case fails")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--drop", action="store_true", help="drop the collections of any database")
+    args = parser.parse_args()
+
+    # every call must reach the database
+    response_cache.max_bytes = 0
+
+    servicer = DatasetServicer()
+    catalog = Catalog(projects=args.projects, skew=args.skew, seed=args.seed)
+    catalog.reset(drop=args.drop)
+    results, load_seconds = {}, {}
+    for scale in sorted(args.scales):
+        load_seconds[scale] = catalog.grow(scale, int(scale * args.versions_per_dataset))
+        for name, budget, call in cases(servicer, catalog):
+            latencies = results.setdefault(name, {'budget': budget, 'seconds': {}})
+            latencies['seconds'][str(scale)] = measure(call, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    failures = check(results, baseline, args.tolerance)
+
+    print(json.dumps({'load_seconds': load_seconds, 'results': results, 'failures': failures}, indent=2))
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Micro-benchmark of the marshmallow schemas against the direct converters.
+
+Documents are built in memory, no database is needed. For every message type
+the time per message of both paths is printed as JSON, and both paths are
+checked to produce the same message.
+
+    python benchmarks/serialization.py --files 10 10000 100000
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import timeit
+
+from bson import ObjectId
+from google.protobuf import json_format
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from models import documents  # noqa: E402
+from protos import dataset_pb2  # noqa: E402
+import converters  # noqa: E402
+import serializers  # noqa: E402
+
+
+def make_dataset():
+    return documents.Dataset(id=ObjectId(), name='benchmark', description='serialization benchmark',
+                             scope='Local', project='project', version='1', create_at=datetime.datetime.now(),
+                             last_update=datetime.datetime.now())
+
+
+def make_version(dataset, files):
+    bucket_tree = [documents.File(name='dir-%d/file-%d' % (i % 100, i), size=i) for i in range(files)]
+    return documents.Version(id=ObjectId(), name='1', dataset=dataset, related_bucket='bucket', author='author',
+                             bucket_tree=bucket_tree, size=sum(file.size for file in bucket_tree),
+                             file_count=files, create_at=datetime.datetime.now())
+
+
+def measure(function, number):
+    return min(timeit.repeat(function, number=number, repeat=3)) / number
+
+
+def compare(name, marshmallow_path, direct_path, number):
+    if marshmallow_path() != direct_path():
+        raise AssertionError("%s: converters and schemas produce different messages" % name)
+    marshmallow_time = measure(marshmallow_path, number)
+    direct_time = measure(direct_path, number)
+    return name, {
+        "marshmallow_us": marshmallow_time * 1e6,
+        "direct_us": direct_time * 1e6,
+        "speedup": marshmallow_time / direct_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[10, 10000, 100000],
+                        help="bucket_tree sizes of the Version messages")
+    parser.add_argument("--number", type=int, default=200, help="iterations for small messages")
+    args = parser.parse_args()
+
+    dataset = make_dataset()
+    datasets = [make_dataset() for _ in range(25)]
+    results = [
+        compare("Dataset",
+                lambda: serializers.dataset_serializer.dump(dataset),
+                lambda: converters.dataset_to_proto(dataset), args.number),
+        compare("SearchDatasetResponse[25]",
+                lambda: dataset_pb2.SearchDatasetResponse(
+                    total=25, page=1, limit=25, data=[serializers.dataset_serializer.dump(d) for d in datasets]),
+                lambda: converters.search_dataset_response(
+                    {"total": 25, "page": 1, "limit": 25, "data": datasets, "next_page_token": ""}), args.number),
+    ]
+    for files in args.files:
+        version = make_version(dataset, files)
+        # the converters read the manifest entries as raw dicts from pymongo
+        manifest = [file.to_mongo().to_dict() for file in version.bucket_tree]
+        number = max(1, args.number * 10 // max(files, 10))
+        results.append(compare("Version[%d files]" % files,
+                               lambda: serializers.version_serializer.dump(version),
+                               lambda: converters.version_to_proto(version, manifest), number))
+
+    request = dataset_pb2.SearchVersionRequest(
+        query=dataset_pb2.SearchVersionRequest.VersionFilter(dataset=str(ObjectId())), limit=50)
+    options = {"preserving_proto_field_name": True, "including_default_value_fields": False}
+    results.append(compare("SearchVersionRequest (decode)",
+                           lambda: json_format.MessageToDict(request, **options),
+                           lambda: converters.message_to_dict(request), args.number * 10))
+
+    print(json.dumps(dict(results), indent=2))
+
+
+if __name__ == '__main__':
+    main()
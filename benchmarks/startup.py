@@ -0,0 +1,125 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Startup time benchmark of the servers.
+
+Each server is spawned --runs times in a fresh interpreter and timed until
+its port accepts connections. The database is not needed, the servers must
+bind their port without reaching it. The module
+is also imported once under -X importtime and the modules that take longest
+to import are listed, so that a regression can be traced to its import.
+
+Medians are printed as JSON, and the exit status is 1 when a server takes
+longer than --budget seconds to start.
+
+    python benchmarks/startup.py --runs 10 --budget 1.5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# create and start a server the way serve() does before reaching the database
+SERVERS = {
+    "threaded": "import server; s, _ = server.create_server('[::]:{port}'); s.start(); s.wait_for_termination()",
+    "aio": "import asyncio, aio_server\n"
+           "async def main():\n"
+           "    s, _ = aio_server.create_server('[::]:{port}')\n"
+           "    await s.start()\n"
+           "    await s.wait_for_termination()\n"
+           "asyncio.run(main())",
+}
+MODULES = {"threaded": "server", "aio": "aio_server"}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def time_to_ready(name, timeout):
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", SERVERS[name].format(port=port)], cwd=ROOT_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # poll the port directly, a grpc channel backs off for a second after a refused connection
+        deadline = started + timeout
+        while True:
+            try:
+                socket.create_connection(('localhost', port), timeout=timeout).close()
+                return time.perf_counter() - started
+            except ConnectionRefusedError:
+                if time.perf_counter() > deadline or process.poll() is not None:
+                    raise RuntimeError("{} server did not start".format(name))
+                time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def import_profile(module, top):
+    """Return the import time of module and its slowest imports, in milliseconds."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module], cwd=ROOT_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            # header line
+            continue
+        imports.append((name.strip(), int(self_us) / 1e3, int(cumulative_us) / 1e3))
+
+    total = next(cumulative for name, _, cumulative in imports if name == module)
+    slowest = sorted(imports, key=lambda entry: entry[1], reverse=True)[:top]
+    return {"total_ms": total, "slowest_self_ms": {name: self_ms for name, self_ms, _ in slowest}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds a server may take to accept connections")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports listed")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    results, failures = {}, []
+    for name in args.servers:
+        startup = [time_to_ready(name, args.timeout) for _ in range(args.runs)]
+        median = statistics.median(startup)
+        results[name] = {"median_s": median, "max_s": max(startup),
+                         "imports": import_profile(MODULES[name], args.top)}
+        if median > args.budget:
+            failures.append("{} starts in {:.2f}s, budget is {:.2f}s".format(name, median, args.budget))
+
+    print(json.dumps({"budget_s": args.budget, "results": results, "failures": failures}, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Object store benchmark of listing, bucket creation and transfers.
+
+Buckets are seeded in the MinIO configured in .env (a local container or any
+S3 compatible stand-in) with one of these layouts:
+
+    flat   --objects small objects at the root of the bucket
+    deep   --objects small objects, --fanout directories per level, --depth levels
+    small  --objects small objects spread over 100 directories
+    large  --large-objects objects of --large-size bytes
+
+For every layout, list_minio_bucket_objects is timed for each combination of
+--page-sizes, --list-workers and --shard-depths, and uploads and downloads
+through the shared client are timed with --transfer-workers threads. The
+service does not move object data itself, the transfer figures measure the
+connection pool that clients of the same store share with it.
+create_minio_bucket is timed --buckets times. Objects/s, MB/s and latencies
+are printed as JSON, and the seeded buckets are removed unless --keep is set.
+
+    python benchmarks/storage.py --layouts flat deep --objects 100000 \\
+        --page-sizes 100 1000 --list-workers 1 8 32
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+from concurrent import futures
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import config  # noqa: E402
+import services  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def deep_name(index, fanout, depth):
+    levels = ["level{}-{}".format(level, index // fanout ** level % fanout) for level in range(depth)]
+    return "/".join(levels + ["file-{}".format(index)])
+
+
+def layout_objects(layout, args):
+    """Return (names, size) of the objects of a layout."""
+    if layout == "flat":
+        return ["file-{}".format(index) for index in range(args.objects)], args.small_size
+    if layout == "deep":
+        return [deep_name(index, args.fanout, args.depth) for index in range(args.objects)], args.small_size
+    if layout == "small":
+        return ["dir-{}/file-{}".format(index % 100, index) for index in range(args.objects)], args.small_size
+    if layout == "large":
+        return ["large-{}".format(index) for index in range(args.large_objects)], args.large_size
+    raise ValueError("Unknown layout {}.".format(layout))
+
+
+def throughput(count, size, elapsed):
+    return {"objects": count, "seconds": elapsed, "objects_per_second": count / elapsed,
+            "mb_per_second": count * size / MB / elapsed}
+
+
+def upload(bucket, names, size, workers):
+    minio = services.get_minio_client()
+    payload = os.urandom(size)
+    started = time.perf_counter()
+    with futures.ThreadPoolExecutor(workers) as executor:
+        list(executor.map(lambda name: minio.put_object(bucket, name, io.BytesIO(payload), size), names))
+    return throughput(len(names), size, time.perf_counter() - started)
+
+
+def download(bucket, names, size, workers):
+    minio = services.get_minio_client()
+
+    def get(name):
+        response = minio.get_object(bucket, name)
+        try:
+            for _ in response.stream(MB):
+                pass
+        finally:
+            response.release_conn()
+
+    started = time.perf_counter()
+    with futures.ThreadPoolExecutor(workers) as executor:
+        list(executor.map(get, names))
+    return throughput(len(names), size, time.perf_counter() - started)
+
+
+def list_bucket(bucket, page_size, workers, shard_depth):
+    config.MINIO_LIST_PAGE_SIZE = page_size
+    config.MINIO_LIST_WORKERS = workers
+    config.MINIO_LIST_SHARD_DEPTH = shard_depth
+    started = time.perf_counter()
+    count = sum(1 for _ in services.list_minio_bucket_objects(bucket))
+    elapsed = time.perf_counter() - started
+    return {"page_size": page_size, "workers": workers, "shard_depth": shard_depth, "objects": count,
+            "seconds": elapsed, "objects_per_second": count / elapsed}
+
+
+def create_buckets(count):
+    names, latencies = [], []
+    for _ in range(count):
+        name = uuid.uuid4().hex
+        started = time.perf_counter()
+        services.create_minio_bucket(name)
+        latencies.append(time.perf_counter() - started)
+        names.append(name)
+    return names, {"buckets": count, "buckets_per_second": count / sum(latencies),
+                   "median_ms": statistics.median(latencies) * 1e3, "max_ms": max(latencies) * 1e3}
+
+
+def remove_bucket(bucket):
+    minio = services.get_minio_client()
+    names = (obj.object_name for obj in minio.list_objects_v2(bucket, recursive=True))
+    # remove_objects is lazy, its errors must be consumed for the deletion to happen
+    for error in minio.remove_objects(bucket, names):
+        raise RuntimeError("Could not remove {}: {}".format(error.object_name, error.error_message))
+    minio.remove_bucket(bucket)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layouts", nargs="+", default=["flat", "deep", "small", "large"],
+                        choices=["flat", "deep", "small", "large"])
+    parser.add_argument("--objects", type=int, default=10000, help="objects of the flat, deep and small layouts")
+    parser.add_argument("--small-size", type=int, default=1024, help="bytes of the small objects")
+    parser.add_argument("--fanout", type=int, default=10, help="directories per level of the deep layout")
+    parser.add_argument("--depth", type=int, default=4, help="levels of the deep layout")
+    parser.add_argument("--large-objects", type=int, default=8)
+    parser.add_argument("--large-size", type=int, default=64 * MB, help="bytes of the large objects")
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[config.MINIO_LIST_PAGE_SIZE])
+    parser.add_argument("--list-workers", type=int, nargs="+", default=[config.MINIO_LIST_WORKERS])
+    parser.add_argument("--shard-depths", type=int, nargs="+", default=[config.MINIO_LIST_SHARD_DEPTH])
+    parser.add_argument("--transfer-workers", type=int, default=config.MINIO_POOL_MAXSIZE)
+    parser.add_argument("--buckets", type=int, default=20, help="buckets created to time create_minio_bucket")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded buckets")
+    args = parser.parse_args()
+
+    bucket_names, results = [], {}
+    try:
+        names, results["create_bucket"] = create_buckets(args.buckets)
+        bucket_names.extend(names)
+        for layout in args.layouts:
+            names, size = layout_objects(layout, args)
+            bucket = uuid.uuid4().hex
+            services.create_minio_bucket(bucket)
+            bucket_names.append(bucket)
+            results[layout] = {
+                "upload": upload(bucket, names, size, args.transfer_workers),
+                "list": [list_bucket(bucket, page_size, workers, shard_depth)
+                         for page_size, workers, shard_depth
+                         in itertools.product(args.page_sizes, args.list_workers, args.shard_depths)],
+                "download": download(bucket, names, size, args.transfer_workers),
+            }
+        results["pool"] = services.get_minio_pool_stats()
+    finally:
+        if not args.keep:
+            for bucket in bucket_names:
+                remove_bucket(bucket)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from collections import OrderedDict
+import threading
+import time
+
+import config
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of serialized responses.
+
+    The cache is bounded by the total size of the stored bytes and every entry
+    expires after ttl seconds. Entries are tagged with a group, the dataset
+    they belong to, so that all of them can be invalidated at once.
+
+    A response loaded while its group is invalidated must not be stored
+    afterwards. Readers take the current generation before loading it and pass
+    it to put, which drops the response when the group was invalidated since.
+    """
+
+    # invalidated groups remembered, older ones are forgotten and make any put
+    # taken before them stale
+    max_invalidations = 10000
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._groups = {}
+        self._size = 0
+        self._generation = 0
+        # generation at which each group was last invalidated
+        self._invalidated = OrderedDict()
+        self._horizon = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, group = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def generation(self):
+        """Return the generation to pass to put, taken before loading the response."""
+        with self._lock:
+            return self._generation
+
+    def put(self, key, value: bytes, group=None, generation=None):
+        if not self.enabled or len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and self._stale(group, generation):
+                return
+            if key in self._entries:
+                self._remove(key)
+            while self._size + len(value) > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+            self._entries[key] = (time.monotonic() + self.ttl, value, group)
+            self._groups.setdefault(group, set()).add(key)
+            self._size += len(value)
+
+    def discard(self, key, group):
+        """Drop an entry, and the responses of its group being loaded."""
+        with self._lock:
+            self._invalidated_now(group)
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate(self, group):
+        """Drop every entry of a group, and the responses of the group being loaded."""
+        with self._lock:
+            self._invalidated_now(group)
+            for key in list(self._groups.get(group, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "expirations": self.expirations, "invalidations": self.invalidations}
+
+    def _invalidated_now(self, group):
+        self._generation += 1
+        self._invalidated.pop(group, None)
+        self._invalidated[group] = self._generation
+        if len(self._invalidated) > self.max_invalidations:
+            _, self._horizon = self._invalidated.popitem(last=False)
+
+    def _stale(self, group, generation):
+        return generation < self._horizon or self._invalidated.get(group, 0) > generation
+
+    def _remove(self, key):
+        _, value, group = self._entries.pop(key)
+        self._size -= len(value)
+        keys = self._groups[group]
+        keys.discard(key)
+        if not keys:
+            del self._groups[group]
+
+
+response_cache = ResponseCache(max_bytes=config.RESPONSE_CACHE_MAX_BYTES, ttl=config.RESPONSE_CACHE_TTL)
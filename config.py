@@ -27,7 +27,98 @@ AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', cast=str)
 
 MINIO_HOST = config('MINIO_HOST')
 MINIO_ENDPOINT = config('MINIO_ENDPOINT')
+MINIO_SECURE = config('MINIO_SECURE', default=False, cast=bool)
+# connection pool of the shared minio client
+MINIO_POOL_MAXSIZE = config('MINIO_POOL_MAXSIZE', default=32, cast=int)
+MINIO_POOL_BLOCK = config('MINIO_POOL_BLOCK', default=True, cast=bool)
+MINIO_CONNECT_TIMEOUT = config('MINIO_CONNECT_TIMEOUT', default=5.0, cast=float)
+MINIO_READ_TIMEOUT = config('MINIO_READ_TIMEOUT', default=60.0, cast=float)
+MINIO_MAX_RETRIES = config('MINIO_MAX_RETRIES', default=5, cast=int)
+MINIO_RETRY_BACKOFF = config('MINIO_RETRY_BACKOFF', default=0.2, cast=float)
 
 MONGO_DATABASE_URL = config('MONGO_DATABASE_URL')
 MONGO_USER = config('MONGO_USER')
 MONGO_PASSWORD = config('MONGO_PASSWORD')
+# create the declared indexes when the server starts, and optionally refuse to
+# start when a query shape of the servicer is not served by an index
+ENSURE_INDEXES_ON_STARTUP = config('ENSURE_INDEXES_ON_STARTUP', default=True, cast=bool)
+CHECK_INDEXES_ON_STARTUP = config('CHECK_INDEXES_ON_STARTUP', default=False, cast=bool)
+# flag the versions stored before the deleted field when the server starts,
+# otherwise they stay hidden until manage.py backfill-version-deleted runs
+BACKFILL_ON_STARTUP = config('BACKFILL_ON_STARTUP', default=True, cast=bool)
+
+# number of documents fetched per cursor batch by the streaming search rpcs
+SEARCH_STREAM_BATCH_SIZE = config('SEARCH_STREAM_BATCH_SIZE', default=100, cast=int)
+# largest total reported by a filtered search in the Estimated count mode
+ESTIMATED_COUNT_LIMIT = config('ESTIMATED_COUNT_LIMIT', default=10000, cast=int)
+
+# number of files stored in each version manifest chunk
+MANIFEST_CHUNK_SIZE = config('MANIFEST_CHUNK_SIZE', default=1000, cast=int)
+# number of manifest chunks written per insert_many call
+MANIFEST_INSERT_BATCH = config('MANIFEST_INSERT_BATCH', default=50, cast=int)
+
+# store the tree of a new version as the changes since the previous version,
+# stacking at most MANIFEST_MAX_DELTA_DEPTH deltas on top of a full manifest
+MANIFEST_INCREMENTAL = config('MANIFEST_INCREMENTAL', default=True, cast=bool)
+MANIFEST_MAX_DELTA_DEPTH = config('MANIFEST_MAX_DELTA_DEPTH', default=8, cast=int)
+
+# number of directory rollups written per insert_many call
+ROLLUP_INSERT_BATCH = config('ROLLUP_INSERT_BATCH', default=1000, cast=int)
+
+# number of manifest chunks fetched per round trip when reading a range of names
+MANIFEST_RANGE_BATCH_SIZE = config('MANIFEST_RANGE_BATCH_SIZE', default=2, cast=int)
+
+# number of changed files sent per DiffVersions message
+DIFF_STREAM_BATCH_SIZE = config('DIFF_STREAM_BATCH_SIZE', default=1000, cast=int)
+
+# number of threads listing bucket prefixes concurrently
+MINIO_LIST_WORKERS = config('MINIO_LIST_WORKERS', default=8, cast=int)
+# number of keys requested per ListObjectsV2 page (S3 caps it at 1000)
+MINIO_LIST_PAGE_SIZE = config('MINIO_LIST_PAGE_SIZE', default=1000, cast=int)
+# maximum prefix depth explored when splitting a bucket listing into shards
+MINIO_LIST_SHARD_DEPTH = config('MINIO_LIST_SHARD_DEPTH', default=2, cast=int)
+# number of listed pages buffered per shard before its listing waits for the consumer
+MINIO_LIST_SHARD_BUFFER = config('MINIO_LIST_SHARD_BUFFER', default=2, cast=int)
+
+# asyncio server (aio_server.py): threads running blocking mongo calls,
+# threads running object store calls and the limit of in-flight rpcs (0 means unlimited)
+AIO_DB_WORKERS = config('AIO_DB_WORKERS', default=32, cast=int)
+AIO_STORAGE_WORKERS = config('AIO_STORAGE_WORKERS', default=8, cast=int)
+AIO_MAX_CONCURRENT_RPCS = config('AIO_MAX_CONCURRENT_RPCS', default=0, cast=int)
+
+# in-process cache of RetrieveDataset/RetrieveVersion responses, bounded by the
+# size of the serialized messages (0 disables it) and by their age in seconds
+RESPONSE_CACHE_MAX_BYTES = config('RESPONSE_CACHE_MAX_BYTES', default=256 * 1024 * 1024, cast=int)
+RESPONSE_CACHE_TTL = config('RESPONSE_CACHE_TTL', default=300, cast=float)
+
+# rpcs slower than this many seconds are logged with their timing breakdown, 0 disables it
+TIMING_SLOW_THRESHOLD = config('TIMING_SLOW_THRESHOLD', default=1.0, cast=float)
+# send the timing breakdown of every rpc as x-timing trailing metadata, clients
+# can also ask for it by sending x-timing metadata
+TIMING_TRAILERS = config('TIMING_TRAILERS', default=False, cast=bool)
+
+# http endpoint exposing the prometheus metrics on /metrics, -1 disables it
+METRICS_HOST = config('METRICS_HOST', default='0.0.0.0')
+METRICS_PORT = config('METRICS_PORT', default=9100, cast=int)
+
+# on-demand profiling of rpcs, see profiling.py. SIGUSR2 toggles it at runtime
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+# stacks (sampled, folded output) or cprofile (pstats output)
+PROFILING_MODE = config('PROFILING_MODE', default='stacks')
+# fraction of the rpcs profiled, and the duration in seconds from which they are written
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.01, cast=float)
+PROFILING_THRESHOLD = config('PROFILING_THRESHOLD', default=0.0, cast=float)
+# comma separated rpc names to profile, all when empty
+PROFILING_METHODS = config('PROFILING_METHODS', default='')
+# seconds between two stack samples
+PROFILING_INTERVAL = config('PROFILING_INTERVAL', default=0.005, cast=float)
+PROFILING_DIR = config('PROFILING_DIR', default='/tmp/ilyde-datasets-profiles')
+
+# warm-up run before DatasetServices reports SERVING: connections opened in the
+# mongo and minio pools, and most recent datasets loaded in the response cache
+WARMUP_POOL_CONNECTIONS = config('WARMUP_POOL_CONNECTIONS', default=4, cast=int)
+WARMUP_HOT_DATASETS = config('WARMUP_HOT_DATASETS', default=100, cast=int)
+# on SIGTERM, seconds the server keeps serving as NOT_SERVING so that load balancers
+# stop routing to it, then seconds the in-flight rpcs are given to finish
+SHUTDOWN_DRAIN_DELAY = config('SHUTDOWN_DRAIN_DELAY', default=5.0, cast=float)
+SHUTDOWN_GRACE_PERIOD = config('SHUTDOWN_GRACE_PERIOD', default=30.0, cast=float)
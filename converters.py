@@ -0,0 +1,124 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Direct conversions between protobuf messages and documents.
+
+These produce the same messages as the marshmallow schemas of serializers.py,
+which remain the reference for validation rules, without going through
+json_format and intermediate dicts.
+"""
+from google.protobuf.descriptor import FieldDescriptor
+from protos.dataset_pb2 import Dataset, Version, SearchDatasetResponse, SearchVersionResponse, FileChange
+import manifests
+import timing
+
+
+def message_to_dict(message):
+    """Convert a message to a dict of its set fields, keyed by proto field name.
+
+    Equivalent to json_format.MessageToDict with preserving_proto_field_name,
+    except that 64 bits integers are kept as ints.
+    """
+    data = {}
+    for field, value in message.ListFields():
+        if field.type == FieldDescriptor.TYPE_MESSAGE:
+            if field.label == FieldDescriptor.LABEL_REPEATED:
+                value = [message_to_dict(item) for item in value]
+            else:
+                value = message_to_dict(value)
+        elif field.type == FieldDescriptor.TYPE_ENUM:
+            if field.label == FieldDescriptor.LABEL_REPEATED:
+                value = [field.enum_type.values_by_number[item].name for item in value]
+            else:
+                value = field.enum_type.values_by_number[value].name
+        elif field.label == FieldDescriptor.LABEL_REPEATED:
+            value = list(value)
+        data[field.name] = value
+    return data
+
+
+def _str(value):
+    return str(value) if value is not None else ""
+
+
+def _reference_id(document, field):
+    # read the stored reference without dereferencing it, which would cost a query
+    value = document._data.get(field)
+    return getattr(value, 'id', value)
+
+
+@timing.timed(timing.SERIALIZATION)
+def dataset_to_proto(dataset):
+    return Dataset(id=_str(dataset.id),
+                   name=dataset.name,
+                   description=dataset.description,
+                   scope=dataset.scope,
+                   project=dataset.project,
+                   version=dataset.version,
+                   create_at=_str(dataset.create_at),
+                   last_update=_str(dataset.last_update))
+
+
+@timing.timed(timing.SERIALIZATION)
+def version_to_proto(version, files=None, view="Full"):
+    """Build a Version message, files default to the version's manifest.
+
+    The Basic view leaves bucket_tree empty without reading the manifest.
+    """
+    if view == "Basic":
+        files = ()
+    elif files is None:
+        files = manifests.iter_files(version)
+    return Version(id=_str(version.id),
+                   name=version.name,
+                   dataset=_str(_reference_id(version, 'dataset')),
+                   related_bucket=version.related_bucket,
+                   author=version.author,
+                   # manifest entries are dicts keyed by File field names, which the
+                   # message constructor converts without intermediate objects
+                   bucket_tree=list(files),
+                   size=version.size,
+                   file_count=version.file_count,
+                   parent=_str(_reference_id(version, 'parent')),
+                   create_at=_str(version.create_at))
+
+
+@timing.timed(timing.SERIALIZATION)
+def search_dataset_response(payload):
+    return SearchDatasetResponse(total=payload["total"],
+                                 page=payload["page"],
+                                 limit=payload["limit"],
+                                 data=[dataset_to_proto(dataset) for dataset in payload["data"]],
+                                 next_page_token=payload["next_page_token"])
+
+
+@timing.timed(timing.SERIALIZATION)
+def search_version_response(payload, view="Full"):
+    return SearchVersionResponse(total=payload["total"],
+                                 page=payload["page"],
+                                 limit=payload["limit"],
+                                 data=[version_to_proto(version, view=view) for version in payload["data"]],
+                                 next_page_token=payload["next_page_token"])
+
+
+def file_change_to_proto(change, base, target):
+    """Build a FileChange from a change yielded by manifests.diff_files."""
+    return FileChange(change=change.capitalize(),
+                      base=base,
+                      target=target,
+                      size_delta=(target['size'] if target else 0) - (base['size'] if base else 0))
@@ -16,6 +16,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import inspect
 import logging
 from typing import Callable, Any
 from google.protobuf import any_pb2
@@ -25,12 +26,39 @@ import grpc
 import marshmallow
 import mongoengine
 
+import metrics
+import profiling
+import timing
+
 
 # setup logger
 FORMAT = '%(asctime)s %(levelname)s %(message)s'
 logging.basicConfig(level=logging.INFO, format=FORMAT)
 logger = logging.getLogger(__name__)
 
+_END_OF_STREAM = object()
+
+
+def status_of(e: Exception):
+    """Map an exception raised by a servicer method to a (status code, details) pair."""
+    if isinstance(e, GrpcException):
+        return e.status_code, e.details
+
+    if isinstance(e, marshmallow.ValidationError):
+        return InvalidArgument.status_code, e.__str__()
+
+    if isinstance(e, mongoengine.errors.DoesNotExist):
+        return NotFound.status_code, str(e)
+
+    return Unknown.status_code, str(e)
+
+
+def exception_to_status(e: Exception):
+    """Like status_of, logging the error."""
+    code, details = status_of(e)
+    logger.error(details)
+    return code, details
+
 
 class ExceptionToStatusInterceptor(ServerInterceptor):
     def intercept(
@@ -57,27 +85,143 @@ class ExceptionToStatusInterceptor(ServerInterceptor):
              is free to modify this in some way, however.
          """
         try:
-            return method(request, context)
-        except GrpcException as e:
-            context.set_code(e.status_code)
-            context.set_details(e.details)
-            logger.error(e.details)
+            response = method(request, context)
+        except Exception as e:
+            self._set_status(e, context)
             return any_pb2.Any()
 
-        except marshmallow.ValidationError as e:
-            context.set_code(InvalidArgument.status_code)
-            context.set_details(e.__str__())
-            logger.error(e)
-            return any_pb2.Any()
+        if inspect.isgenerator(response):
+            # server-streaming rpc: errors are raised while the response is consumed
+            return self._intercept_stream(response, context)
+        return response
 
-        except mongoengine.errors.DoesNotExist as e:
-            context.set_code(NotFound.status_code)
-            context.set_details(str(e))
-            logger.error(str(e))
-            return any_pb2.Any()
+    def _intercept_stream(self, response, context):
+        try:
+            yield from response
+        except Exception as e:
+            self._set_status(e, context)
+
+    @staticmethod
+    def _set_status(e: Exception, context: grpc.ServicerContext):
+        code, details = exception_to_status(e)
+        context.set_code(code)
+        context.set_details(details)
 
+
+class MetricsInterceptor(ServerInterceptor):
+    """Records the latency, in-flight count, message sizes and status code of rpcs.
+
+    It must come after ExceptionToStatusInterceptor, so that it sees the
+    exceptions raised by the servicer methods.
+    """
+
+    def intercept(
+        self,
+        method: Callable,
+        request: Any,
+        context: grpc.ServicerContext,
+        method_name: str,
+    ) -> Any:
+        method_name = method_name.rsplit('/', 1)[-1]
+        started = metrics.call_started(method_name, request)
+        try:
+            response = method(request, context)
         except Exception as e:
-            context.set_code(Unknown.status_code)
-            context.set_details(str(e))
-            logger.error(str(e))
-            return any_pb2.Any()
+            metrics.call_finished(method_name, started, status_of(e)[0])
+            raise
+
+        if inspect.isgenerator(response):
+            return self._intercept_stream(response, method_name, started)
+        metrics.response_sent(method_name, response)
+        metrics.call_finished(method_name, started, grpc.StatusCode.OK)
+        return response
+
+    @staticmethod
+    def _intercept_stream(response, method_name, started):
+        code = grpc.StatusCode.OK
+        try:
+            for message in response:
+                metrics.response_sent(method_name, message)
+                yield message
+        except Exception as e:
+            code = status_of(e)[0]
+            raise
+        except GeneratorExit:
+            code = grpc.StatusCode.CANCELLED
+            raise
+        finally:
+            metrics.call_finished(method_name, started, code)
+
+
+class TimingInterceptor(ServerInterceptor):
+    """Builds the breakdown of the time spent by rpcs in mongo, the object
+    store and serialization, see timing.finish for how it is reported."""
+
+    def intercept(
+        self,
+        method: Callable,
+        request: Any,
+        context: grpc.ServicerContext,
+        method_name: str,
+    ) -> Any:
+        method_name = method_name.rsplit('/', 1)[-1]
+        breakdown = timing.Breakdown()
+        try:
+            response = timing.run(breakdown, method, request, context)
+        except Exception:
+            timing.finish(breakdown, method_name, context)
+            raise
+
+        if inspect.isgenerator(response):
+            return self._intercept_stream(response, breakdown, context, method_name)
+        timing.finish(breakdown, method_name, context)
+        return response
+
+    @staticmethod
+    def _intercept_stream(response, breakdown, context, method_name):
+        try:
+            while True:
+                # the breakdown is only current while the servicer produces a message
+                message = timing.run(breakdown, next, response, _END_OF_STREAM)
+                if message is _END_OF_STREAM:
+                    return
+                yield message
+        finally:
+            timing.finish(breakdown, method_name, context)
+
+
+class ProfilingInterceptor(ServerInterceptor):
+    """Profiles the rpcs picked by profiling.start, rpcs run untouched while it is disabled."""
+
+    def intercept(
+        self,
+        method: Callable,
+        request: Any,
+        context: grpc.ServicerContext,
+        method_name: str,
+    ) -> Any:
+        session = profiling.start(method_name.rsplit('/', 1)[-1])
+        if session is None:
+            return method(request, context)
+
+        try:
+            response = session.run(method, request, context)
+        except Exception:
+            session.finish()
+            raise
+
+        if inspect.isgenerator(response):
+            return self._intercept_stream(response, session)
+        session.finish()
+        return response
+
+    @staticmethod
+    def _intercept_stream(response, session):
+        try:
+            while True:
+                message = session.run(next, response, _END_OF_STREAM)
+                if message is _END_OF_STREAM:
+                    return
+                yield message
+        finally:
+            session.finish()
@@ -0,0 +1,123 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Maintenance commands for the datasets database.
+
+    python manage.py ensure-indexes
+    python manage.py check-indexes
+    python manage.py backfill-version-deleted
+    python manage.py backfill-version-seq
+    python manage.py backfill-version-rollups
+"""
+import argparse
+import logging
+import sys
+
+from pymongo import UpdateOne
+
+from models import documents, indexes, migrations
+from utils import version_seq
+import manifests
+
+# setup logger
+FORMAT = '%(asctime)s %(levelname)s %(message)s'
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(__name__)
+
+
+def ensure_indexes(args):
+    """Create the declared indexes of every collection."""
+    indexes.ensure_indexes()
+
+
+def check_indexes(args):
+    """Fail if a query shape of the servicer is not served by an index."""
+    try:
+        indexes.check_indexes()
+    except indexes.MissingIndexError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+def backfill_version_deleted(args):
+    """Set the deleted flag on versions stored before it mirrored their dataset's."""
+    restored, hidden = migrations.backfill_version_deleted()
+    logger.info("{} versions flagged as not deleted".format(restored))
+    logger.info("{} versions of deleted datasets flagged as deleted".format(hidden))
+
+
+def backfill_version_seq(args):
+    """Number the versions stored before the per-dataset sequence counter."""
+    versions = documents.Version._get_collection()
+    datasets = documents.Dataset._get_collection()
+    numbered = 0
+    for dataset in datasets.find({}, {'_id': 1}):
+        updates, last_seq = [], 0
+        for version in versions.find({'dataset': dataset['_id']}, {'name': 1, 'seq': 1}):
+            seq = version.get('seq') or version_seq(version['name'])
+            if 'seq' not in version:
+                updates.append(UpdateOne({'_id': version['_id']}, {'$set': {'seq': seq}}))
+            last_seq = max(last_seq, seq)
+        if updates:
+            versions.bulk_write(updates, ordered=False)
+            numbered += len(updates)
+        datasets.update_one({'_id': dataset['_id']},
+                            {'$max': {'version_seq': last_seq, 'version_counter': last_seq}})
+    logger.info("{} versions numbered".format(numbered))
+
+
+def backfill_version_rollups(args):
+    """Store the directory rollups of the versions created before them."""
+    count = 0
+    for version in documents.Version.objects(directory_count__in=[0, None]).exclude('bucket_tree').no_cache():
+        # versions created before manifests are read with their embedded tree
+        if version.manifest_kind is None and not version.chunk_count:
+            version.reload()
+        # drop rollups left by an interrupted run
+        documents.VersionDirectory.objects(version=version.id).delete()
+        directory_count = manifests.write_rollups(version)
+        documents.Version.objects(id=version.id).update(set__directory_count=directory_count)
+        count += 1
+    logger.info("{} versions rolled up".format(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('ensure-indexes', help=ensure_indexes.__doc__)
+    command.set_defaults(handler=ensure_indexes)
+
+    command = commands.add_parser('check-indexes', help=check_indexes.__doc__)
+    command.set_defaults(handler=check_indexes)
+
+    command = commands.add_parser('backfill-version-deleted', help=backfill_version_deleted.__doc__)
+    command.set_defaults(handler=backfill_version_deleted)
+
+    command = commands.add_parser('backfill-version-seq', help=backfill_version_seq.__doc__)
+    command.set_defaults(handler=backfill_version_seq)
+
+    command = commands.add_parser('backfill-version-rollups', help=backfill_version_rollups.__doc__)
+    command.set_defaults(handler=backfill_version_rollups)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
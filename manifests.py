@@ -0,0 +1,323 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from bisect import bisect_left
+from fnmatch import fnmatchcase
+import re
+
+from models import documents
+import config
+
+FULL, DELTA = 'full', 'delta'
+ADDED, REMOVED, MODIFIED = 'added', 'removed', 'modified'
+
+
+class _Rollups:
+    """Sums the size and file count of every directory of a tree sorted by name.
+
+    The names under a directory are contiguous, so a directory is complete
+    once a name outside of it is seen. Only the directories along the current
+    path are held in memory, complete ones are written in batches.
+    """
+
+    def __init__(self, version_id):
+        self.version_id = version_id
+        self.directory_count = 0
+        self._open = [self._directory('')]
+        self._batch = []
+
+    def _directory(self, path):
+        return {'version': self.version_id, 'path': path, 'depth': path.count('/'), 'size': 0, 'file_count': 0}
+
+    def _close(self):
+        directory = self._open.pop()
+        if self._open:
+            self._open[-1]['size'] += directory['size']
+            self._open[-1]['file_count'] += directory['file_count']
+        self._batch.append(directory)
+        self.directory_count += 1
+        if len(self._batch) == config.ROLLUP_INSERT_BATCH or not self._open:
+            documents.VersionDirectory._get_collection().insert_many(self._batch, ordered=False)
+            self._batch = []
+        return directory
+
+    def count(self, files):
+        for file in files:
+            name = file['name']
+            while not name.startswith(self._open[-1]['path']):
+                self._close()
+            position = name.find('/', len(self._open[-1]['path']))
+            while position != -1:
+                self._open.append(self._directory(name[:position + 1]))
+                position = name.find('/', position + 1)
+            self._open[-1]['size'] += file['size']
+            self._open[-1]['file_count'] += 1
+            yield file
+
+    def close(self):
+        """Write the remaining directories, returns the root one."""
+        while True:
+            directory = self._close()
+            if not self._open:
+                return directory
+
+
+def _file_entry(file):
+    return {'name': file['name'], 'size': file['size'],
+            'etag': file.get('etag', ''), 'last_modified': file.get('last_modified', '')}
+
+
+def _write_chunks(version_id, entries):
+    """Store entries, sorted by name, as chunks of the version manifest.
+
+    Chunks are written with batched insert_many calls, so the tree never has
+    to fit in a single document. Returns the number of chunks.
+    """
+    collection = documents.VersionManifest._get_collection()
+    chunk_count = 0
+    chunk, batch = [], []
+
+    def flush_chunk():
+        nonlocal chunk_count
+        batch.append({'version': version_id, 'chunk_no': chunk_count,
+                      'first': chunk[0]['name'], 'last': chunk[-1]['name'], 'files': chunk})
+        chunk_count += 1
+
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) == config.MANIFEST_CHUNK_SIZE:
+            flush_chunk()
+            chunk = []
+            if len(batch) == config.MANIFEST_INSERT_BATCH:
+                collection.insert_many(batch, ordered=False)
+                batch = []
+    if chunk:
+        flush_chunk()
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+    return chunk_count
+
+
+def write_manifest(version_id, files):
+    """Store every file, sorted by name. Returns the number of chunks."""
+    return _write_chunks(version_id, (_file_entry(file) for file in files))
+
+
+def _modified(old, new):
+    if old.get('etag') and new.get('etag'):
+        return _file_entry(old) != _file_entry(new)
+    # entries stored before etags can only be compared by size
+    return old['size'] != new['size']
+
+
+def diff_files(old_files, new_files):
+    """Merge two trees sorted by name.
+
+    Yields (change, old, new) for every file added, removed or modified, old
+    or new being None for a file missing from that tree.
+    """
+    old_files, new_files = iter(old_files), iter(new_files)
+    old, new = next(old_files, None), next(new_files, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old['name'] < new['name']):
+            yield REMOVED, old, None
+            old = next(old_files, None)
+        elif old is None or new['name'] < old['name']:
+            yield ADDED, None, new
+            new = next(new_files, None)
+        else:
+            if _modified(old, new):
+                yield MODIFIED, old, new
+            old, new = next(old_files, None), next(new_files, None)
+
+
+def write_delta(version_id, parent, files):
+    """Store only the files, sorted by name, changed since the parent version.
+
+    Entries are tagged with their change, removed files keep their last
+    entry. Returns the number of chunks.
+    """
+    def changes():
+        for change, old, new in diff_files(iter_files(parent), files):
+            entry = _file_entry(new if new is not None else old)
+            entry['change'] = change
+            yield entry
+
+    return _write_chunks(version_id, changes())
+
+
+def write_version_tree(version_id, parent, files):
+    """Store the tree of a new version, as a delta against parent when allowed.
+
+    Parents created before delta manifests have no etags to compare, their
+    children get a full manifest. So do the children of a parent already
+    MANIFEST_MAX_DELTA_DEPTH deltas away from a full manifest, which bounds the
+    manifests read to rebuild a tree.
+
+    The same pass stores the size and file count of every directory. Returns
+    the Version fields describing the manifest.
+    """
+    rollups = _Rollups(version_id)
+    files = rollups.count(files)
+    if config.MANIFEST_INCREMENTAL and parent is not None and parent.manifest_kind is not None \
+            and parent.delta_depth < config.MANIFEST_MAX_DELTA_DEPTH:
+        fields = {'chunk_count': write_delta(version_id, parent, files),
+                  'manifest_kind': DELTA, 'parent': parent.id, 'delta_depth': parent.delta_depth + 1}
+    else:
+        fields = {'chunk_count': write_manifest(version_id, files),
+                  'manifest_kind': FULL, 'parent': None, 'delta_depth': 0}
+
+    root = rollups.close()
+    fields.update(file_count=root['file_count'], size=root['size'], directory_count=rollups.directory_count)
+    return fields
+
+
+def delete_version_tree(version_id):
+    """Delete the manifest chunks and rollups of a version."""
+    documents.VersionManifest._get_collection().delete_many({'version': version_id})
+    documents.VersionDirectory._get_collection().delete_many({'version': version_id})
+
+
+def write_rollups(version):
+    """Store the directories of a version created before rollups. Returns their number."""
+    rollups = _Rollups(version.id)
+    for _ in rollups.count(iter_files(version)):
+        pass
+    rollups.close()
+    return rollups.directory_count
+
+
+def iter_directories(version, path='', max_depth=1, start=''):
+    """Yield the directories of a version from path down to max_depth levels below it, sorted by path.
+
+    Directories are read from the rollups, starting at the path start.
+    """
+    query = {'version': version.id, 'depth': {'$lte': path.count('/') + max_depth},
+             'path': {'$gte': max(path, start)}}
+    if path:
+        query['path']['$lt'] = successor(path)
+    directories = documents.VersionDirectory._get_collection().find(
+        query, {'_id': 0, 'path': 1, 'depth': 1, 'size': 1, 'file_count': 1}).sort('path', 1)
+    yield from directories
+
+
+def apply_delta(files, changes):
+    """Yield the files of a tree, sorted by name, with the entries of a delta applied."""
+    files, changes = iter(files), iter(changes)
+    file, change = next(files, None), next(changes, None)
+    while file is not None or change is not None:
+        if change is None or (file is not None and file['name'] < change['name']):
+            yield file
+            file = next(files, None)
+            continue
+        if change['change'] != REMOVED:
+            yield {key: value for key, value in change.items() if key != 'change'}
+        if file is not None and file['name'] == change['name']:
+            file = next(files, None)
+        change = next(changes, None)
+
+
+def _iter_entries(version, start='', stop=None):
+    collection = documents.VersionManifest._get_collection()
+    if not start and stop is None:
+        for chunk in collection.find({'version': version.id}, {'files': 1}).sort('chunk_no', 1):
+            yield from chunk['files']
+        return
+
+    # chunks hold consecutive names, so the range begins in the first chunk
+    # ending at or after start. Chunks are large, fetch them a few at a time
+    chunks = collection.find({'version': version.id, 'last': {'$gte': start}}, {'first': 1, 'files': 1}) \
+        .sort('last', 1).batch_size(config.MANIFEST_RANGE_BATCH_SIZE)
+    for chunk_no, chunk in enumerate(chunks):
+        if stop is not None and chunk['first'] >= stop:
+            return
+        files = chunk['files']
+        if chunk_no == 0:
+            files = files[bisect_left([file['name'] for file in files], start):]
+        for file in files:
+            if stop is not None and file['name'] >= stop:
+                return
+            yield file
+
+
+def iter_files(version, start='', stop=None):
+    """Yield the files of a version as dicts, sorted by name.
+
+    Only names in [start, stop) are read, a stop of None meaning no upper
+    bound. The manifest chunks holding the range are found by index.
+    """
+    if version.manifest_kind == DELTA:
+        yield from apply_delta(iter_files(version.parent, start, stop), _iter_entries(version, start, stop))
+    elif version.manifest_kind is None and not version.chunk_count:
+        # versions created before manifests embed their tree
+        for file in version.bucket_tree:
+            if file.name >= start and (stop is None or file.name < stop):
+                yield {'name': file.name, 'size': file.size}
+    else:
+        yield from _iter_entries(version, start, stop)
+
+
+def stat_file(version, name):
+    """Return the file of a version named name, None if there is none."""
+    return next(iter_files(version, name, name + '\0'), None)
+
+
+def successor(prefix):
+    """Return the smallest string greater than every string starting with prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _glob_head(glob):
+    return re.match(r'[^*?\[]*', glob).group()
+
+
+def list_files(version, prefix='', delimiter='', glob='', start=''):
+    """Yield (name, file) pairs of a version under prefix, sorted by name.
+
+    With a delimiter, the names holding it after the prefix are rolled up in
+    a single (common_prefix, None) pair, and the files below it are skipped
+    by index instead of being read. Files must match the fnmatch pattern
+    glob, whose literal head narrows the range read. Listing starts at the
+    name start.
+    """
+    head = _glob_head(glob)
+    if head.startswith(prefix):
+        scan_prefix = head
+    elif prefix.startswith(head):
+        scan_prefix = prefix
+    else:
+        return
+    stop = successor(scan_prefix) if scan_prefix else None
+    start = max(start, scan_prefix)
+
+    while True:
+        for file in iter_files(version, start, stop):
+            name = file['name']
+            if delimiter:
+                position = name.find(delimiter, len(prefix))
+                if position != -1:
+                    common_prefix = name[:position + len(delimiter)]
+                    yield common_prefix, None
+                    # resume the listing after every name under the common prefix
+                    start = successor(common_prefix)
+                    break
+            if not glob or fnmatchcase(name, glob):
+                yield name, file
+        else:
+            return
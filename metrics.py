@@ -0,0 +1,191 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Prometheus metrics of the rpcs, served in the text format on /metrics.
+
+Every thread records into its own shard of series, so recording a call never
+takes a lock. Shards are only summed when the endpoint is scraped.
+"""
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = tuple(4 ** exponent for exponent in range(3, 14))  # 64 bytes to 64MiB
+
+
+class Registry:
+    """Counters, gauges and histograms keyed by metric name and label values."""
+
+    def __init__(self):
+        self._local = threading.local()
+        # taken once per recording thread and once per scrape
+        self._lock = threading.Lock()
+        self._shards = []
+        self._metrics = {}
+        self._stats = []
+
+    def counter(self, name, help):
+        self._metrics[name] = ('counter', help, None)
+
+    def gauge(self, name, help):
+        self._metrics[name] = ('gauge', help, None)
+
+    def histogram(self, name, help, buckets):
+        self._metrics[name] = ('histogram', help, buckets)
+
+    def register_stats(self, prefix, stats, help):
+        """Export every key of the dict returned by stats as a gauge named prefix_key."""
+        self._stats.append((prefix, stats, help))
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def inc(self, name, labels, value=1):
+        """Add value to a counter or gauge, labels is a tuple of (name, value) pairs."""
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        shard = self._shard()
+        key = (name, labels)
+        series = shard.get(key)
+        if series is None:
+            # a count per bucket, then the +Inf count, then the sum
+            series = shard[key] = [0] * (len(self._metrics[name][2]) + 2)
+        series[bisect_left(self._metrics[name][2], value)] += 1
+        series[-1] += value
+
+    def _collect(self):
+        with self._lock:
+            shards = list(self._shards)
+        totals = {}
+        for shard in shards:
+            for key, value in shard.copy().items():
+                if isinstance(value, list):
+                    total = totals.setdefault(key, [0] * len(value))
+                    for index, item in enumerate(list(value)):
+                        total[index] += item
+                else:
+                    totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self):
+        series = {}
+        for (name, labels), value in self._collect().items():
+            series.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, (kind, help, buckets) in self._metrics.items():
+            lines.append("# HELP {} {}".format(name, help))
+            lines.append("# TYPE {} {}".format(name, kind))
+            for labels, value in sorted(series.get(name, ())):
+                if kind != 'histogram':
+                    lines.append("{}{} {}".format(name, _format_labels(labels), value))
+                    continue
+                count = 0
+                for bound, bucket_count in zip(buckets + ('+Inf',), value):
+                    count += bucket_count
+                    lines.append("{}_bucket{} {}".format(name, _format_labels(labels + (('le', bound),)), count))
+                lines.append("{}_sum{} {}".format(name, _format_labels(labels), value[-1]))
+                lines.append("{}_count{} {}".format(name, _format_labels(labels), count))
+
+        for prefix, stats, help in self._stats:
+            for key, value in stats().items():
+                name = "{}_{}".format(prefix, key)
+                lines.append("# HELP {} {}".format(name, help.format(key.replace('_', ' '))))
+                lines.append("# TYPE {} gauge".format(name))
+                lines.append("{} {}".format(name, value))
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"')) for name, value in labels)
+    return "{" + ",".join(pairs) + "}"
+
+
+registry = Registry()
+registry.histogram('grpc_server_handling_seconds', "Time taken to handle rpcs.", LATENCY_BUCKETS)
+registry.gauge('grpc_server_in_flight', "Rpcs being handled.")
+registry.counter('grpc_server_handled_total', "Rpcs completed, by status code.")
+registry.histogram('grpc_server_request_bytes', "Size of request messages.", SIZE_BUCKETS)
+registry.histogram('grpc_server_response_bytes', "Size of response messages.", SIZE_BUCKETS)
+
+
+def call_started(method, request):
+    """Record the start of an rpc, returns the start time to pass to call_finished."""
+    labels = (('grpc_method', method),)
+    registry.inc('grpc_server_in_flight', labels)
+    registry.observe('grpc_server_request_bytes', labels, request.ByteSize())
+    return time.perf_counter()
+
+
+def response_sent(method, response):
+    registry.observe('grpc_server_response_bytes', (('grpc_method', method),), response.ByteSize())
+
+
+def call_finished(method, started, code):
+    labels = (('grpc_method', method),)
+    registry.observe('grpc_server_handling_seconds', labels, time.perf_counter() - started)
+    registry.inc('grpc_server_in_flight', labels, -1)
+    registry.inc('grpc_server_handled_total', labels + (('grpc_code', code.name),))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port=None, host=None):
+    """Serve /metrics from a daemon thread, returns the http server or None if disabled."""
+    port = config.METRICS_PORT if port is None else port
+    host = config.METRICS_HOST if host is None else host
+    if port < 0:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info("metrics are served on port {}".format(server.server_address[1]))
+    return server
@@ -19,5 +19,15 @@
 
 from mongoengine import *
 from config import MONGO_DATABASE_URL, MONGO_PASSWORD, MONGO_USER
+from timing import MongoCommandListener
 
-connect(host=MONGO_DATABASE_URL, port=27017, username=MONGO_USER, password=MONGO_PASSWORD)
+# only the settings are registered at import, mongoengine creates the client
+# on the first query and the client connects in the background, so importing
+# the documents never waits for the database
+register_connection(DEFAULT_CONNECTION_NAME, host=MONGO_DATABASE_URL, port=27017, username=MONGO_USER,
+                    password=MONGO_PASSWORD, event_listeners=[MongoCommandListener()], connect=False)
+
+
+def get_client():
+    """Return the client of the default connection, creating it on first use."""
+    return get_connection(DEFAULT_CONNECTION_NAME)
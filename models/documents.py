@@ -23,6 +23,11 @@ import datetime
 class File(EmbeddedDocument):
     name = StringField(required=True)
     size = LongField(required=True, min_value=0)
+    etag = StringField()
+    # ISO 8601 timestamp reported by the object store
+    last_modified = StringField()
+    # only set on the entries of a delta manifest
+    change = StringField(choices=('added', 'removed', 'modified'))
 
 
 class Dataset(Document):
@@ -32,12 +37,24 @@ class Dataset(Document):
     scope = StringField(required=True, max_length=100)
     project = StringField(max_length=100, default='')
     version = StringField(required=True, default='')
+    # seq of the latest version and last seq allocated to a version
+    version_seq = IntField(min_value=0, default=0)
+    version_counter = IntField(min_value=0, default=0)
     deleted = BooleanField(default=False)
     create_at = DateTimeField(default=datetime.datetime.now)
     last_update = DateTimeField(default=datetime.datetime.now)
 
     meta = {
-        'ordering': ['-create_at']
+        'ordering': ['-create_at'],
+        # indexes are created at startup by models.indexes.ensure_indexes
+        'auto_create_index': False,
+        'indexes': [
+            {'fields': ['-create_at', '-id'], 'partialFilterExpression': {'deleted': False}},
+            # also serves project and scope filters, scope is checked on the fetched documents
+            {'fields': ['project', '-create_at', '-id'], 'partialFilterExpression': {'deleted': False}},
+            {'fields': ['scope', '-create_at', '-id'], 'partialFilterExpression': {'deleted': False}},
+            {'fields': ['name', '-create_at', '-id'], 'partialFilterExpression': {'deleted': False}}
+        ]
     }
 
     def __str__(self):
@@ -47,12 +64,68 @@ class Dataset(Document):
 class Version(Document):
     """docstring for Version."""
     name = StringField(required=True)
+    seq = IntField(min_value=1)
     dataset = ReferenceField(Dataset, required=True, reverse_delete_rule=2)
     related_bucket = StringField(required=True)
-    bucket_tree = ListField(EmbeddedDocumentField(File), required=True)
+    # only set on versions created before the tree moved to VersionManifest
+    bucket_tree = ListField(EmbeddedDocumentField(File))
     size = LongField(min_value=0, required=True)
+    file_count = LongField(min_value=0, default=0)
+    chunk_count = IntField(min_value=0, default=0)
+    # a delta manifest only holds the files changed since the parent version,
+    # delta_depth counts the deltas to apply on top of the nearest full manifest
+    manifest_kind = StringField(choices=('full', 'delta'))
+    parent = ReferenceField('self')
+    delta_depth = IntField(min_value=0, default=0)
+    # number of VersionDirectory rollups, 0 for versions created before them
+    directory_count = LongField(min_value=0, default=0)
     author = StringField(required=True)
+    # mirrors the deleted flag of the dataset
+    deleted = BooleanField(default=False)
     create_at = DateTimeField(default=datetime.datetime.now)
     meta = {
-        'ordering': ['-create_at']
+        'ordering': ['-create_at'],
+        'auto_create_index': False,
+        'indexes': [
+            {'fields': ['-create_at', '-id'], 'partialFilterExpression': {'deleted': False}},
+            # not partial, DeleteDataset updates the versions of a dataset regardless of their flag
+            ('dataset', '-create_at', '-id'),
+            {'fields': ['author', '-create_at', '-id'], 'partialFilterExpression': {'deleted': False}},
+            {'fields': ['name', '-create_at', '-id'], 'partialFilterExpression': {'deleted': False}},
+            # versions stored before the sequence counter have no seq
+            {'fields': ['dataset', 'seq'], 'unique': True, 'partialFilterExpression': {'seq': {'$exists': True}}}
+        ]
+    }
+
+
+class VersionManifest(Document):
+    """A chunk of a version's bucket tree, files are sorted by name across chunks."""
+    version = ReferenceField(Version, required=True, reverse_delete_rule=2)
+    chunk_no = IntField(required=True, min_value=0)
+    first = StringField(required=True)
+    last = StringField(required=True)
+    files = ListField(EmbeddedDocumentField(File), required=True)
+    meta = {
+        'auto_create_index': False,
+        'indexes': [
+            {'fields': ['version', 'chunk_no'], 'unique': True},
+            # finds the chunk holding a name
+            ('version', 'last')
+        ]
+    }
+
+
+class VersionDirectory(Document):
+    """Size and file count of a directory of a version's tree, including its subdirectories."""
+    version = ReferenceField(Version, required=True, reverse_delete_rule=2)
+    # ends with '/', the root directory has an empty path
+    path = StringField()
+    depth = IntField(required=True, min_value=0)
+    size = LongField(required=True, min_value=0)
+    file_count = LongField(required=True, min_value=0)
+    meta = {
+        'auto_create_index': False,
+        'indexes': [
+            {'fields': ['version', 'path', 'depth'], 'unique': True}
+        ]
     }
@@ -0,0 +1,131 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import datetime
+import logging
+
+from bson import ObjectId
+from models import documents
+
+logger = logging.getLogger(__name__)
+
+DOCUMENTS = [documents.Dataset, documents.Version, documents.VersionManifest, documents.VersionDirectory]
+
+SEARCH_SORT = [('create_at', -1), ('_id', -1)]
+_ID = ObjectId()
+_NOW = datetime.datetime.now()
+
+# query shapes issued by DatasetServicer, each must be served by an index
+QUERY_SHAPES = [
+    ("search datasets", documents.Dataset, {'deleted': False}, SEARCH_SORT),
+    ("search datasets by project", documents.Dataset, {'deleted': False, 'project': ''}, SEARCH_SORT),
+    ("search datasets by project and scope", documents.Dataset,
+     {'deleted': False, 'project': '', 'scope': ''}, SEARCH_SORT),
+    ("search datasets by scope", documents.Dataset, {'deleted': False, 'scope': ''}, SEARCH_SORT),
+    ("search datasets by name", documents.Dataset, {'deleted': False, 'name': ''}, SEARCH_SORT),
+    ("search datasets after token", documents.Dataset,
+     {'deleted': False, 'create_at': {'$lte': _NOW},
+      '$or': [{'create_at': {'$lt': _NOW}}, {'_id': {'$lt': _ID}}]}, SEARCH_SORT),
+    ("search versions", documents.Version, {'deleted': False}, SEARCH_SORT),
+    ("search versions by dataset", documents.Version, {'deleted': False, 'dataset': _ID}, SEARCH_SORT),
+    ("search versions by dataset after token", documents.Version,
+     {'deleted': False, 'dataset': _ID, 'create_at': {'$lte': _NOW},
+      '$or': [{'create_at': {'$lt': _NOW}}, {'_id': {'$lt': _ID}}]}, SEARCH_SORT),
+    ("search versions by author", documents.Version, {'deleted': False, 'author': ''}, SEARCH_SORT),
+    ("search versions by name", documents.Version, {'deleted': False, 'name': ''}, SEARCH_SORT),
+    ("parent version", documents.Version, {'dataset': _ID, 'seq': 1}, None),
+    ("delete dataset versions", documents.Version, {'dataset': _ID}, None),
+    ("version manifest", documents.VersionManifest, {'version': _ID}, [('chunk_no', 1)]),
+    ("version directories", documents.VersionDirectory,
+     {'version': _ID, 'depth': {'$lte': 1}, 'path': {'$gte': ''}}, [('path', 1)]),
+    ("version manifest range", documents.VersionManifest, {'version': _ID, 'last': {'$gte': ''}}, [('last', 1)]),
+]
+
+
+def _count_pipeline(query):
+    # the pipeline run by count_documents for the Exact totals of a search page
+    return [{'$match': query}, {'$group': {'_id': 1, 'n': {'$sum': 1}}}]
+
+
+# aggregation shapes issued by DatasetServicer, explained as aggregations
+AGGREGATE_SHAPES = [
+    ("count datasets", documents.Dataset, _count_pipeline({'deleted': False})),
+    ("count datasets by project", documents.Dataset, _count_pipeline({'deleted': False, 'project': ''})),
+    ("count versions", documents.Version, _count_pipeline({'deleted': False})),
+    ("count versions by dataset", documents.Version, _count_pipeline({'deleted': False, 'dataset': _ID})),
+]
+
+
+class MissingIndexError(Exception):
+    pass
+
+
+def ensure_indexes():
+    """Create the indexes declared in the documents meta, existing ones are left untouched."""
+    for document in DOCUMENTS:
+        document.ensure_indexes()
+        logger.info("indexes of {} are up to date".format(document._get_collection_name()))
+
+
+def _plan_stages(plan):
+    yield plan['stage']
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for input_plan in plan.get('inputStages', []):
+        yield from _plan_stages(input_plan)
+
+
+def _winning_plans(explain):
+    # an aggregation explain nests the query planner of its first stage,
+    # or reports it at the top level when the whole pipeline was pushed down
+    if isinstance(explain, dict):
+        if 'queryPlanner' in explain:
+            yield explain['queryPlanner']['winningPlan']
+        for value in explain.values():
+            yield from _winning_plans(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from _winning_plans(value)
+
+
+def check_indexes():
+    """Explain every query and aggregation shape and raise MissingIndexError
+    listing those answered by a collection scan or an in-memory sort."""
+    failures = []
+    for name, document, query, sort in QUERY_SHAPES:
+        cursor = document._get_collection().find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = cursor.limit(1).explain()['queryPlanner']['winningPlan']
+        stages = set(_plan_stages(plan))
+        if stages & {'COLLSCAN', 'SORT'}:
+            failures.append("{} ({})".format(name, ", ".join(sorted(stages))))
+
+    for name, document, pipeline in AGGREGATE_SHAPES:
+        collection = document._get_collection()
+        explain = collection.database.command('aggregate', collection.name, pipeline=pipeline, explain=True)
+        stages = set()
+        for plan in _winning_plans(explain):
+            stages.update(_plan_stages(plan))
+        if not stages or stages & {'COLLSCAN', 'SORT'}:
+            failures.append("{} ({})".format(name, ", ".join(sorted(stages))))
+
+    if failures:
+        raise MissingIndexError("Query shapes without a covering index: {}".format("; ".join(failures)))
+    logger.info("all {} query shapes are served by an index".format(len(QUERY_SHAPES) + len(AGGREGATE_SHAPES)))
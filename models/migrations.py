@@ -0,0 +1,41 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import logging
+
+from models import documents
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_version_deleted():
+    """Set the deleted flag on versions stored before it mirrored their dataset's.
+
+    Idempotent, a second run modifies nothing. Returns the number of versions
+    flagged as not deleted and as deleted.
+    """
+    collection = documents.Version._get_collection()
+    restored = collection.update_many({'deleted': {'$exists': False}}, {'$set': {'deleted': False}}).modified_count
+
+    deleted_datasets = documents.Dataset.objects(deleted=True).distinct('id')
+    hidden = collection.update_many({'dataset': {'$in': deleted_datasets}, 'deleted': False},
+                                    {'$set': {'deleted': True}}).modified_count
+    if restored or hidden:
+        logger.info("{} versions flagged as not deleted, {} versions of deleted datasets flagged as deleted"
+                    .format(restored, hidden))
+    return restored, hidden
@@ -0,0 +1,176 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""On-demand profiling of rpcs.
+
+Profiling is off by default and costs a single flag check per rpc. Once
+enabled, by PROFILING_ENABLED or at runtime by sending SIGUSR2 to the server,
+a PROFILING_SAMPLE_RATE fraction of the rpcs of PROFILING_METHODS are
+profiled, and those lasting at least PROFILING_THRESHOLD seconds are written
+to PROFILING_DIR. Two modes are available:
+
+- stacks: a sampler thread records the stack of the profiled rpcs every
+  PROFILING_INTERVAL seconds, written in the folded format read by
+  flamegraph.pl and speedscope.
+- cprofile: the rpc runs under cProfile, written as pstats data, which
+  flameprof or snakeviz render.
+"""
+from collections import Counter
+import cProfile
+import datetime
+import logging
+import os
+import random
+import signal
+import sys
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+STACKS, CPROFILE = 'stacks', 'cprofile'
+
+
+class Settings:
+
+    def __init__(self):
+        self.enabled = config.PROFILING_ENABLED
+        self.mode = config.PROFILING_MODE
+        self.sample_rate = config.PROFILING_SAMPLE_RATE
+        self.threshold = config.PROFILING_THRESHOLD
+        self.methods = {method.strip() for method in config.PROFILING_METHODS.split(',') if method.strip()}
+        self.interval = config.PROFILING_INTERVAL
+        self.directory = config.PROFILING_DIR
+
+
+settings = Settings()
+
+
+class _Sampler:
+    """Samples the stacks of the threads running profiled rpcs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._threads = {}
+        self._thread = None
+
+    def add(self, thread_id, stacks):
+        with self._lock:
+            self._threads[thread_id] = stacks
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+                self._thread.start()
+
+    def remove(self, thread_id):
+        with self._lock:
+            self._threads.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(settings.interval)
+            with self._lock:
+                if not self._threads:
+                    # exit while no rpc is profiled, add starts a new sampler
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for thread_id, stacks in self._threads.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_fold(frame)] += 1
+
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append("{} ({}:{})".format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+_sampler = _Sampler()
+
+
+class Session:
+    """Profiles the calls of one rpc, which may be spread over a stream of messages."""
+
+    def __init__(self, method):
+        self.method = method
+        self.mode = settings.mode
+        self.started = time.perf_counter()
+        if self.mode == CPROFILE:
+            self._profile = cProfile.Profile()
+        else:
+            self._stacks = Counter()
+
+    def run(self, function, *args):
+        if self.mode == CPROFILE:
+            self._profile.enable()
+            try:
+                return function(*args)
+            finally:
+                self._profile.disable()
+
+        thread_id = threading.get_ident()
+        _sampler.add(thread_id, self._stacks)
+        try:
+            return function(*args)
+        finally:
+            _sampler.remove(thread_id)
+
+    def finish(self):
+        """Write the profile if the rpc lasted at least the threshold, and got sampled."""
+        elapsed = time.perf_counter() - self.started
+        if elapsed < settings.threshold or (self.mode != CPROFILE and not self._stacks):
+            return
+        os.makedirs(settings.directory, exist_ok=True)
+        name = "{}-{}-{}ms".format(self.method, datetime.datetime.now().strftime('%Y%m%dT%H%M%S%f'),
+                                   int(elapsed * 1000))
+        if self.mode == CPROFILE:
+            path = os.path.join(settings.directory, name + '.prof')
+            self._profile.dump_stats(path)
+        else:
+            path = os.path.join(settings.directory, name + '.folded')
+            with open(path, 'w') as output:
+                for stack, count in self._stacks.items():
+                    output.write("{} {}\n".format(stack, count))
+        logger.info("profile of {} written to {}".format(self.method, path))
+
+
+def start(method):
+    """Return a Session if the rpc is to be profiled, None otherwise."""
+    if not settings.enabled:
+        return None
+    if settings.methods and method not in settings.methods:
+        return None
+    if random.random() >= settings.sample_rate:
+        return None
+    return Session(method)
+
+
+def toggle(signum=None, frame=None):
+    settings.enabled = not settings.enabled
+    logger.info("profiling {}".format("enabled" if settings.enabled else "disabled"))
+
+
+def install_signal_handler():
+    """Toggle profiling on SIGUSR2, must be called from the main thread."""
+    signal.signal(signal.SIGUSR2, toggle)
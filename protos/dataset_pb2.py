@@ -38,7 +38,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   syntax='proto3',
   serialized_options=b'\n\026org.hopenly.ilyde.grpcB\014DatasetProtoP\001\242\002\002DS',
   create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\rdataset.proto\x12\x08\x64\x61tasets\"\x16\n\x06\x42ucket\x12\x0c\n\x04name\x18\x01 \x01(\t\"\"\n\x04\x46ile\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04size\x18\x02 \x01(\x04\"\xa2\x01\n\x07\x44\x61taset\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\x1e\n\x05scope\x18\x04 \x01(\x0e\x32\x0f.datasets.SCOPE\x12\x0f\n\x07project\x18\x05 \x01(\t\x12\x0f\n\x07version\x18\x06 \x01(\t\x12\x11\n\tcreate_at\x18\x07 \x01(\t\x12\x13\n\x0blast_update\x18\x08 \x01(\t\"\xa2\x01\n\x07Version\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0f\n\x07\x64\x61taset\x18\x03 \x01(\t\x12\x16\n\x0erelated_bucket\x18\x04 \x01(\t\x12\x0e\n\x06\x61uthor\x18\x08 \x01(\t\x12#\n\x0b\x62ucket_tree\x18\x05 \x03(\x0b\x32\x0e.datasets.File\x12\x0c\n\x04size\x18\x06 \x01(\x04\x12\x11\n\tcreate_at\x18\x07 \x01(\t\"\x10\n\x02ID\x12\n\n\x02id\x18\x01 \x01(\t\")\n\x06Status\x12\x0e\n\x06status\x18\x01 \x01(\r\x12\x0f\n\x07message\x18\x02 \x01(\t\"\xcc\x01\n\x14SearchDatasetRequest\x12;\n\x05query\x18\x01 \x01(\x0b\x32,.datasets.SearchDatasetRequest.DatasetFilter\x12\x0c\n\x04page\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\x1aZ\n\rDatasetFilter\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x1e\n\x05scope\x18\x03 \x01(\x0e\x32\x0f.datasets.SCOPE\x12\x0f\n\x07project\x18\x04 \x01(\t\"\xbc\x01\n\x14SearchVersionRequest\x12;\n\x05query\x18\x01 \x01(\x0b\x32,.datasets.SearchVersionRequest.VersionFilter\x12\x0c\n\x04page\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\x1aJ\n\rVersionFilter\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0f\n\x07\x64\x61taset\x18\x03 \x01(\t\x12\x0e\n\x06\x61uthor\x18\x04 \x01(\t\"d\n\x15SearchDatasetResponse\x12\r\n\x05total\x18\x01 \x01(\r\x12\x0c\n\x04page\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x1f\n\x04\x64\x61ta\x18\x04 \x03(\x0b\x32\x11.datasets.Dataset\"d\n\x15SearchVersionResponse\x12\r\n\x05total\x18\x01 \x01(\x05\x12\x0c\n\x04page\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x1f\n\x04\x64\x61ta\x18\x04 \x03(\x0b\x32\x11.datasets.Version*\x1e\n\x05SCOPE\x12\t\n\x05Local\x10\x00\x12\n\n\x06Global\x10\x01\x32\xbb\x04\n\x0f\x44\x61tasetServices\x12\x34\n\x0fRetrieveDataset\x12\x0c.datasets.ID\x1a\x11.datasets.Dataset\"\x00\x12\x37\n\rCreateDataset\x12\x11.datasets.Dataset\x1a\x11.datasets.Dataset\"\x00\x12\x37\n\rUpdateDataset\x12\x11.datasets.Dataset\x1a\x11.datasets.Dataset\"\x00\x12\x31\n\rDeleteDataset\x12\x0c.datasets.ID\x1a\x10.datasets.Status\"\x00\x12S\n\x0eSearchDatasets\x12\x1e.datasets.SearchDatasetRequest\x1a\x1f.datasets.SearchDatasetResponse\"\x00\x12\x34\n\x0fRetrieveVersion\x12\x0c.datasets.ID\x1a\x11.datasets.Version\"\x00\x12\x37\n\rCreateVersion\x12\x11.datasets.Version\x1a\x11.datasets.Version\"\x00\x12S\n\x0eSearchVersions\x12\x1e.datasets.SearchVersionRequest\x1a\x1f.datasets.SearchVersionResponse\"\x00\x12\x34\n\x0c\x43reateBucket\x12\x10.datasets.Bucket\x1a\x10.datasets.Bucket\"\x00\x42-\n\x16org.hopenly.ilyde.grpcB\x0c\x44\x61tasetProtoP\x01\xa2\x02\x02\x44Sb\x06proto3'
+  serialized_pb=b'\n\rdataset.proto\x12\x08\x64\x61tasets\"\x16\n\x06\x42ucket\x12\x0c\n\x04name\x18\x01 \x01(\t\"G\n\x04\x46ile\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04size\x18\x02 \x01(\x04\x12\x0c\n\x04\x65tag\x18\x03 \x01(\t\x12\x15\n\rlast_modified\x18\x04 \x01(\t\"\xa2\x01\n\x07\x44\x61taset\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12\x1e\n\x05scope\x18\x04 \x01(\x0e\x32\x0f.datasets.SCOPE\x12\x0f\n\x07project\x18\x05 \x01(\t\x12\x0f\n\x07version\x18\x06 \x01(\t\x12\x11\n\tcreate_at\x18\x07 \x01(\t\x12\x13\n\x0blast_update\x18\x08 \x01(\t\"\xc6\x01\n\x07Version\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0f\n\x07\x64\x61taset\x18\x03 \x01(\t\x12\x16\n\x0erelated_bucket\x18\x04 \x01(\t\x12\x0e\n\x06\x61uthor\x18\x08 \x01(\t\x12#\n\x0b\x62ucket_tree\x18\x05 \x03(\x0b\x32\x0e.datasets.File\x12\x0c\n\x04size\x18\x06 \x01(\x04\x12\x11\n\tcreate_at\x18\x07 \x01(\t\x12\x12\n\nfile_count\x18\t \x01(\x04\x12\x0e\n\x06parent\x18\n \x01(\t\"J\n\x16RetrieveVersionRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12$\n\x04view\x18\x02 \x01(\x0e\x32\x16.datasets.VERSION_VIEW\"\x10\n\x02ID\x12\n\n\x02id\x18\x01 \x01(\t\")\n\x06Status\x12\x0e\n\x06status\x18\x01 \x01(\r\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x8a\x02\n\x14SearchDatasetRequest\x12;\n\x05query\x18\x01 \x01(\x0b\x32,.datasets.SearchDatasetRequest.DatasetFilter\x12\x0c\n\x04page\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x12\n\npage_token\x18\x04 \x01(\t\x12(\n\ncount_mode\x18\x05 \x01(\x0e\x32\x14.datasets.COUNT_MODE\x1aZ\n\rDatasetFilter\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x1e\n\x05scope\x18\x03 \x01(\x0e\x32\x0f.datasets.SCOPE\x12\x0f\n\x07project\x18\x04 \x01(\t\"\xa0\x02\n\x14SearchVersionRequest\x12;\n\x05query\x18\x01 \x01(\x0b\x32,.datasets.SearchVersionRequest.VersionFilter\x12\x0c\n\x04page\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x12\n\npage_token\x18\x04 \x01(\t\x12(\n\ncount_mode\x18\x05 \x01(\x0e\x32\x14.datasets.COUNT_MODE\x12$\n\x04view\x18\x06 \x01(\x0e\x32\x16.datasets.VERSION_VIEW\x1aJ\n\rVersionFilter\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0f\n\x07\x64\x61taset\x18\x03 \x01(\t\x12\x0e\n\x06\x61uthor\x18\x04 \x01(\t\"}\n\x15SearchDatasetResponse\x12\r\n\x05total\x18\x01 \x01(\r\x12\x0c\n\x04page\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x1f\n\x04\x64\x61ta\x18\x04 \x03(\x0b\x32\x11.datasets.Dataset\x12\x17\n\x0fnext_page_token\x18\x05 \x01(\t\"}\n\x15SearchVersionResponse\x12\r\n\x05total\x18\x01 \x01(\x05\x12\x0c\n\x04page\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x1f\n\x04\x64\x61ta\x18\x04 \x03(\x0b\x32\x11.datasets.Version\x12\x17\n\x0fnext_page_token\x18\x05 \x01(\t\"3\n\x13\x44iffVersionsRequest\x12\x0c\n\x04\x62\x61se\x18\x01 \x01(\t\x12\x0e\n\x06target\x18\x02 \x01(\t\"\x80\x01\n\nFileChange\x12 \n\x06\x63hange\x18\x01 \x01(\x0e\x32\x10.datasets.CHANGE\x12\x1c\n\x04\x62\x61se\x18\x02 \x01(\x0b\x32\x0e.datasets.File\x12\x1e\n\x06target\x18\x03 \x01(\x0b\x32\x0e.datasets.File\x12\x12\n\nsize_delta\x18\x04 \x01(\x03\"S\n\x0b\x44iffSummary\x12\r\n\x05\x61\x64\x64\x65\x64\x18\x01 \x01(\x04\x12\x0f\n\x07removed\x18\x02 \x01(\x04\x12\x10\n\x08modified\x18\x03 \x01(\x04\x12\x12\n\nsize_delta\x18\x04 \x01(\x03\"e\n\x14\x44iffVersionsResponse\x12%\n\x07\x63hanges\x18\x01 \x03(\x0b\x32\x14.datasets.FileChange\x12&\n\x07summary\x18\x02 \x01(\x0b\x32\x15.datasets.DiffSummary\"~\n\x17ListVersionFilesRequest\x12\x0f\n\x07version\x18\x01 \x01(\t\x12\x0e\n\x06prefix\x18\x02 \x01(\t\x12\x11\n\tdelimiter\x18\x03 \x01(\t\x12\x0c\n\x04glob\x18\x04 \x01(\t\x12\r\n\x05limit\x18\x05 \x01(\x05\x12\x12\n\npage_token\x18\x06 \x01(\t\"d\n\x18ListVersionFilesResponse\x12\x1d\n\x05\x66iles\x18\x01 \x03(\x0b\x32\x0e.datasets.File\x12\x10\n\x08prefixes\x18\x02 \x03(\t\x12\x17\n\x0fnext_page_token\x18\x03 \x01(\t\"7\n\x16StatVersionFileRequest\x12\x0f\n\x07version\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\"p\n\x19VersionTreeSummaryRequest\x12\x0f\n\x07version\x18\x01 \x01(\t\x12\x0c\n\x04path\x18\x02 \x01(\t\x12\x11\n\tmax_depth\x18\x03 \x01(\x05\x12\r\n\x05limit\x18\x04 \x01(\x05\x12\x12\n\npage_token\x18\x05 \x01(\t\"Q\n\x10\x44irectorySummary\x12\x0c\n\x04path\x18\x01 \x01(\t\x12\r\n\x05\x64\x65pth\x18\x02 \x01(\r\x12\x0c\n\x04size\x18\x03 \x01(\x04\x12\x12\n\nfile_count\x18\x04 \x01(\x04\"^\n\x12VersionTreeSummary\x12/\n\x0b\x64irectories\x18\x01 \x03(\x0b\x32\x1a.datasets.DirectorySummary\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t*\x1e\n\x05SCOPE\x12\t\n\x05Local\x10\x00\x12\n\n\x06Global\x10\x01*4\n\nCOUNT_MODE\x12\t\n\x05\x45xact\x10\x00\x12\r\n\tEstimated\x10\x01\x12\x0c\n\x08\x44isabled\x10\x02*#\n\x0cVERSION_VIEW\x12\x08\n\x04\x46ull\x10\x00\x12\t\n\x05\x42\x61sic\x10\x01*.\n\x06\x43HANGE\x12\t\n\x05\x41\x64\x64\x65\x64\x10\x00\x12\x0b\n\x07Removed\x10\x01\x12\x0c\n\x08Modified\x10\x02\x32\xc2\x08\n\x0f\x44\x61tasetServices\x12\x34\n\x0fRetrieveDataset\x12\x0c.datasets.ID\x1a\x11.datasets.Dataset\"\x00\x12\x37\n\rCreateDataset\x12\x11.datasets.Dataset\x1a\x11.datasets.Dataset\"\x00\x12\x37\n\rUpdateDataset\x12\x11.datasets.Dataset\x1a\x11.datasets.Dataset\"\x00\x12\x31\n\rDeleteDataset\x12\x0c.datasets.ID\x1a\x10.datasets.Status\"\x00\x12S\n\x0eSearchDatasets\x12\x1e.datasets.SearchDatasetRequest\x1a\x1f.datasets.SearchDatasetResponse\"\x00\x12H\n\x0fRetrieveVersion\x12 .datasets.RetrieveVersionRequest\x1a\x11.datasets.Version\"\x00\x12\x37\n\rCreateVersion\x12\x11.datasets.Version\x1a\x11.datasets.Version\"\x00\x12S\n\x0eSearchVersions\x12\x1e.datasets.SearchVersionRequest\x1a\x1f.datasets.SearchVersionResponse\"\x00\x12M\n\x14StreamSearchDatasets\x12\x1e.datasets.SearchDatasetRequest\x1a\x11.datasets.Dataset\"\x00\x30\x01\x12M\n\x14StreamSearchVersions\x12\x1e.datasets.SearchVersionRequest\x1a\x11.datasets.Version\"\x00\x30\x01\x12\x34\n\x0c\x43reateBucket\x12\x10.datasets.Bucket\x1a\x10.datasets.Bucket\"\x00\x12Q\n\x0c\x44iffVersions\x12\x1d.datasets.DiffVersionsRequest\x1a\x1e.datasets.DiffVersionsResponse\"\x00\x30\x01\x12[\n\x10ListVersionFiles\x12!.datasets.ListVersionFilesRequest\x1a\".datasets.ListVersionFilesResponse\"\x00\x12\x45\n\x0fStatVersionFile\x12 .datasets.StatVersionFileRequest\x1a\x0e.datasets.File\"\x00\x12\\\n\x15GetVersionTreeSummary\x12#.datasets.VersionTreeSummaryRequest\x1a\x1c.datasets.VersionTreeSummary\"\x00\x42-\n\x16org.hopenly.ilyde.grpcB\x0c\x44\x61tasetProtoP\x01\xa2\x02\x02\x44Sb\x06proto3'
 )
 
 _SCOPE = _descriptor.EnumDescriptor(
@@ -61,14 +61,110 @@ _SCOPE = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=1080,
-  serialized_end=1110,
+  serialized_start=2393,
+  serialized_end=2423,
 )
 _sym_db.RegisterEnumDescriptor(_SCOPE)
 
 SCOPE = enum_type_wrapper.EnumTypeWrapper(_SCOPE)
+_COUNT_MODE = _descriptor.EnumDescriptor(
+  name='COUNT_MODE',
+  full_name='datasets.COUNT_MODE',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='Exact', index=0, number=0,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='Estimated', index=1, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='Disabled', index=2, number=2,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=2425,
+  serialized_end=2477,
+)
+_sym_db.RegisterEnumDescriptor(_COUNT_MODE)
+
+COUNT_MODE = enum_type_wrapper.EnumTypeWrapper(_COUNT_MODE)
+_VERSION_VIEW = _descriptor.EnumDescriptor(
+  name='VERSION_VIEW',
+  full_name='datasets.VERSION_VIEW',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='Full', index=0, number=0,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='Basic', index=1, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=2479,
+  serialized_end=2514,
+)
+_sym_db.RegisterEnumDescriptor(_VERSION_VIEW)
+
+VERSION_VIEW = enum_type_wrapper.EnumTypeWrapper(_VERSION_VIEW)
+_CHANGE = _descriptor.EnumDescriptor(
+  name='CHANGE',
+  full_name='datasets.CHANGE',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='Added', index=0, number=0,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='Removed', index=1, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='Modified', index=2, number=2,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=2516,
+  serialized_end=2562,
+)
+_sym_db.RegisterEnumDescriptor(_CHANGE)
+
+CHANGE = enum_type_wrapper.EnumTypeWrapper(_CHANGE)
 Local = 0
 Global = 1
+Exact = 0
+Estimated = 1
+Disabled = 2
+Full = 0
+Basic = 1
+Added = 0
+Removed = 1
+Modified = 2
 
 
 
@@ -126,6 +222,20 @@ _FILE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='etag', full_name='datasets.File.etag', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='last_modified', full_name='datasets.File.last_modified', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -139,7 +249,7 @@ _FILE = _descriptor.Descriptor(
   oneofs=[
   ],
   serialized_start=51,
-  serialized_end=85,
+  serialized_end=122,
 )
 
 
@@ -219,8 +329,8 @@ _DATASET = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=88,
-  serialized_end=250,
+  serialized_start=125,
+  serialized_end=287,
 )
 
 
@@ -288,6 +398,59 @@ _VERSION = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='file_count', full_name='datasets.Version.file_count', index=8,
+      number=9, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='parent', full_name='datasets.Version.parent', index=9,
+      number=10, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=290,
+  serialized_end=488,
+)
+
+
+_RETRIEVEVERSIONREQUEST = _descriptor.Descriptor(
+  name='RetrieveVersionRequest',
+  full_name='datasets.RetrieveVersionRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='id', full_name='datasets.RetrieveVersionRequest.id', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='view', full_name='datasets.RetrieveVersionRequest.view', index=1,
+      number=2, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -300,8 +463,8 @@ _VERSION = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=253,
-  serialized_end=415,
+  serialized_start=490,
+  serialized_end=564,
 )
 
 
@@ -332,8 +495,8 @@ _ID = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=417,
-  serialized_end=433,
+  serialized_start=566,
+  serialized_end=582,
 )
 
 
@@ -371,8 +534,8 @@ _STATUS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=435,
-  serialized_end=476,
+  serialized_start=584,
+  serialized_end=625,
 )
 
 
@@ -424,8 +587,8 @@ _SEARCHDATASETREQUEST_DATASETFILTER = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=593,
-  serialized_end=683,
+  serialized_start=804,
+  serialized_end=894,
 )
 
 _SEARCHDATASETREQUEST = _descriptor.Descriptor(
@@ -457,6 +620,20 @@ _SEARCHDATASETREQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='page_token', full_name='datasets.SearchDatasetRequest.page_token', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='count_mode', full_name='datasets.SearchDatasetRequest.count_mode', index=4,
+      number=5, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -469,8 +646,8 @@ _SEARCHDATASETREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=479,
-  serialized_end=683,
+  serialized_start=628,
+  serialized_end=894,
 )
 
 
@@ -522,8 +699,8 @@ _SEARCHVERSIONREQUEST_VERSIONFILTER = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=800,
-  serialized_end=874,
+  serialized_start=1111,
+  serialized_end=1185,
 )
 
 _SEARCHVERSIONREQUEST = _descriptor.Descriptor(
@@ -555,6 +732,27 @@ _SEARCHVERSIONREQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='page_token', full_name='datasets.SearchVersionRequest.page_token', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='count_mode', full_name='datasets.SearchVersionRequest.count_mode', index=4,
+      number=5, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='view', full_name='datasets.SearchVersionRequest.view', index=5,
+      number=6, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -567,8 +765,8 @@ _SEARCHVERSIONREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=686,
-  serialized_end=874,
+  serialized_start=897,
+  serialized_end=1185,
 )
 
 
@@ -608,6 +806,13 @@ _SEARCHDATASETRESPONSE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='next_page_token', full_name='datasets.SearchDatasetResponse.next_page_token', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -620,8 +825,8 @@ _SEARCHDATASETRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=876,
-  serialized_end=976,
+  serialized_start=1187,
+  serialized_end=1312,
 )
 
 
@@ -661,6 +866,13 @@ _SEARCHVERSIONRESPONSE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='next_page_token', full_name='datasets.SearchVersionResponse.next_page_token', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -673,88 +885,608 @@ _SEARCHVERSIONRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=978,
-  serialized_end=1078,
+  serialized_start=1314,
+  serialized_end=1439,
 )
 
-_DATASET.fields_by_name['scope'].enum_type = _SCOPE
-_VERSION.fields_by_name['bucket_tree'].message_type = _FILE
-_SEARCHDATASETREQUEST_DATASETFILTER.fields_by_name['scope'].enum_type = _SCOPE
-_SEARCHDATASETREQUEST_DATASETFILTER.containing_type = _SEARCHDATASETREQUEST
-_SEARCHDATASETREQUEST.fields_by_name['query'].message_type = _SEARCHDATASETREQUEST_DATASETFILTER
-_SEARCHVERSIONREQUEST_VERSIONFILTER.containing_type = _SEARCHVERSIONREQUEST
-_SEARCHVERSIONREQUEST.fields_by_name['query'].message_type = _SEARCHVERSIONREQUEST_VERSIONFILTER
-_SEARCHDATASETRESPONSE.fields_by_name['data'].message_type = _DATASET
-_SEARCHVERSIONRESPONSE.fields_by_name['data'].message_type = _VERSION
-DESCRIPTOR.message_types_by_name['Bucket'] = _BUCKET
-DESCRIPTOR.message_types_by_name['File'] = _FILE
-DESCRIPTOR.message_types_by_name['Dataset'] = _DATASET
-DESCRIPTOR.message_types_by_name['Version'] = _VERSION
-DESCRIPTOR.message_types_by_name['ID'] = _ID
-DESCRIPTOR.message_types_by_name['Status'] = _STATUS
-DESCRIPTOR.message_types_by_name['SearchDatasetRequest'] = _SEARCHDATASETREQUEST
-DESCRIPTOR.message_types_by_name['SearchVersionRequest'] = _SEARCHVERSIONREQUEST
-DESCRIPTOR.message_types_by_name['SearchDatasetResponse'] = _SEARCHDATASETRESPONSE
-DESCRIPTOR.message_types_by_name['SearchVersionResponse'] = _SEARCHVERSIONRESPONSE
-DESCRIPTOR.enum_types_by_name['SCOPE'] = _SCOPE
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
-
-Bucket = _reflection.GeneratedProtocolMessageType('Bucket', (_message.Message,), {
-  'DESCRIPTOR' : _BUCKET,
-  '__module__' : 'dataset_pb2'
-  # @@protoc_insertion_point(class_scope:datasets.Bucket)
-  })
-_sym_db.RegisterMessage(Bucket)
-
-File = _reflection.GeneratedProtocolMessageType('File', (_message.Message,), {
-  'DESCRIPTOR' : _FILE,
-  '__module__' : 'dataset_pb2'
-  # @@protoc_insertion_point(class_scope:datasets.File)
-  })
-_sym_db.RegisterMessage(File)
-
-Dataset = _reflection.GeneratedProtocolMessageType('Dataset', (_message.Message,), {
-  'DESCRIPTOR' : _DATASET,
-  '__module__' : 'dataset_pb2'
-  # @@protoc_insertion_point(class_scope:datasets.Dataset)
-  })
-_sym_db.RegisterMessage(Dataset)
-
-Version = _reflection.GeneratedProtocolMessageType('Version', (_message.Message,), {
-  'DESCRIPTOR' : _VERSION,
-  '__module__' : 'dataset_pb2'
-  # @@protoc_insertion_point(class_scope:datasets.Version)
-  })
-_sym_db.RegisterMessage(Version)
-
-ID = _reflection.GeneratedProtocolMessageType('ID', (_message.Message,), {
-  'DESCRIPTOR' : _ID,
-  '__module__' : 'dataset_pb2'
-  # @@protoc_insertion_point(class_scope:datasets.ID)
-  })
-_sym_db.RegisterMessage(ID)
 
-Status = _reflection.GeneratedProtocolMessageType('Status', (_message.Message,), {
-  'DESCRIPTOR' : _STATUS,
-  '__module__' : 'dataset_pb2'
-  # @@protoc_insertion_point(class_scope:datasets.Status)
-  })
-_sym_db.RegisterMessage(Status)
+_DIFFVERSIONSREQUEST = _descriptor.Descriptor(
+  name='DiffVersionsRequest',
+  full_name='datasets.DiffVersionsRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='base', full_name='datasets.DiffVersionsRequest.base', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='target', full_name='datasets.DiffVersionsRequest.target', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1441,
+  serialized_end=1492,
+)
 
-SearchDatasetRequest = _reflection.GeneratedProtocolMessageType('SearchDatasetRequest', (_message.Message,), {
 
-  'DatasetFilter' : _reflection.GeneratedProtocolMessageType('DatasetFilter', (_message.Message,), {
-    'DESCRIPTOR' : _SEARCHDATASETREQUEST_DATASETFILTER,
-    '__module__' : 'dataset_pb2'
-    # @@protoc_insertion_point(class_scope:datasets.SearchDatasetRequest.DatasetFilter)
-    })
-  ,
-  'DESCRIPTOR' : _SEARCHDATASETREQUEST,
-  '__module__' : 'dataset_pb2'
-  # @@protoc_insertion_point(class_scope:datasets.SearchDatasetRequest)
-  })
-_sym_db.RegisterMessage(SearchDatasetRequest)
-_sym_db.RegisterMessage(SearchDatasetRequest.DatasetFilter)
+_FILECHANGE = _descriptor.Descriptor(
+  name='FileChange',
+  full_name='datasets.FileChange',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='change', full_name='datasets.FileChange.change', index=0,
+      number=1, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='base', full_name='datasets.FileChange.base', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='target', full_name='datasets.FileChange.target', index=2,
+      number=3, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='size_delta', full_name='datasets.FileChange.size_delta', index=3,
+      number=4, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1495,
+  serialized_end=1623,
+)
+
+
+_DIFFSUMMARY = _descriptor.Descriptor(
+  name='DiffSummary',
+  full_name='datasets.DiffSummary',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='added', full_name='datasets.DiffSummary.added', index=0,
+      number=1, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='removed', full_name='datasets.DiffSummary.removed', index=1,
+      number=2, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='modified', full_name='datasets.DiffSummary.modified', index=2,
+      number=3, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='size_delta', full_name='datasets.DiffSummary.size_delta', index=3,
+      number=4, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1625,
+  serialized_end=1708,
+)
+
+
+_DIFFVERSIONSRESPONSE = _descriptor.Descriptor(
+  name='DiffVersionsResponse',
+  full_name='datasets.DiffVersionsResponse',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='changes', full_name='datasets.DiffVersionsResponse.changes', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='summary', full_name='datasets.DiffVersionsResponse.summary', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1710,
+  serialized_end=1811,
+)
+
+
+_LISTVERSIONFILESREQUEST = _descriptor.Descriptor(
+  name='ListVersionFilesRequest',
+  full_name='datasets.ListVersionFilesRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='version', full_name='datasets.ListVersionFilesRequest.version', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='prefix', full_name='datasets.ListVersionFilesRequest.prefix', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='delimiter', full_name='datasets.ListVersionFilesRequest.delimiter', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='glob', full_name='datasets.ListVersionFilesRequest.glob', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='limit', full_name='datasets.ListVersionFilesRequest.limit', index=4,
+      number=5, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='page_token', full_name='datasets.ListVersionFilesRequest.page_token', index=5,
+      number=6, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1813,
+  serialized_end=1939,
+)
+
+
+_LISTVERSIONFILESRESPONSE = _descriptor.Descriptor(
+  name='ListVersionFilesResponse',
+  full_name='datasets.ListVersionFilesResponse',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='files', full_name='datasets.ListVersionFilesResponse.files', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='prefixes', full_name='datasets.ListVersionFilesResponse.prefixes', index=1,
+      number=2, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='next_page_token', full_name='datasets.ListVersionFilesResponse.next_page_token', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1941,
+  serialized_end=2041,
+)
+
+
+_STATVERSIONFILEREQUEST = _descriptor.Descriptor(
+  name='StatVersionFileRequest',
+  full_name='datasets.StatVersionFileRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='version', full_name='datasets.StatVersionFileRequest.version', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='name', full_name='datasets.StatVersionFileRequest.name', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=2043,
+  serialized_end=2098,
+)
+
+
+_VERSIONTREESUMMARYREQUEST = _descriptor.Descriptor(
+  name='VersionTreeSummaryRequest',
+  full_name='datasets.VersionTreeSummaryRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='version', full_name='datasets.VersionTreeSummaryRequest.version', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='path', full_name='datasets.VersionTreeSummaryRequest.path', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='max_depth', full_name='datasets.VersionTreeSummaryRequest.max_depth', index=2,
+      number=3, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='limit', full_name='datasets.VersionTreeSummaryRequest.limit', index=3,
+      number=4, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='page_token', full_name='datasets.VersionTreeSummaryRequest.page_token', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=2100,
+  serialized_end=2212,
+)
+
+
+_DIRECTORYSUMMARY = _descriptor.Descriptor(
+  name='DirectorySummary',
+  full_name='datasets.DirectorySummary',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='path', full_name='datasets.DirectorySummary.path', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='depth', full_name='datasets.DirectorySummary.depth', index=1,
+      number=2, type=13, cpp_type=3, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='size', full_name='datasets.DirectorySummary.size', index=2,
+      number=3, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='file_count', full_name='datasets.DirectorySummary.file_count', index=3,
+      number=4, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=2214,
+  serialized_end=2295,
+)
+
+
+_VERSIONTREESUMMARY = _descriptor.Descriptor(
+  name='VersionTreeSummary',
+  full_name='datasets.VersionTreeSummary',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='directories', full_name='datasets.VersionTreeSummary.directories', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='next_page_token', full_name='datasets.VersionTreeSummary.next_page_token', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=2297,
+  serialized_end=2391,
+)
+
+_DATASET.fields_by_name['scope'].enum_type = _SCOPE
+_VERSION.fields_by_name['bucket_tree'].message_type = _FILE
+_RETRIEVEVERSIONREQUEST.fields_by_name['view'].enum_type = _VERSION_VIEW
+_SEARCHDATASETREQUEST_DATASETFILTER.fields_by_name['scope'].enum_type = _SCOPE
+_SEARCHDATASETREQUEST_DATASETFILTER.containing_type = _SEARCHDATASETREQUEST
+_SEARCHDATASETREQUEST.fields_by_name['query'].message_type = _SEARCHDATASETREQUEST_DATASETFILTER
+_SEARCHDATASETREQUEST.fields_by_name['count_mode'].enum_type = _COUNT_MODE
+_SEARCHVERSIONREQUEST_VERSIONFILTER.containing_type = _SEARCHVERSIONREQUEST
+_SEARCHVERSIONREQUEST.fields_by_name['query'].message_type = _SEARCHVERSIONREQUEST_VERSIONFILTER
+_SEARCHVERSIONREQUEST.fields_by_name['count_mode'].enum_type = _COUNT_MODE
+_SEARCHVERSIONREQUEST.fields_by_name['view'].enum_type = _VERSION_VIEW
+_SEARCHDATASETRESPONSE.fields_by_name['data'].message_type = _DATASET
+_SEARCHVERSIONRESPONSE.fields_by_name['data'].message_type = _VERSION
+_FILECHANGE.fields_by_name['change'].enum_type = _CHANGE
+_FILECHANGE.fields_by_name['base'].message_type = _FILE
+_FILECHANGE.fields_by_name['target'].message_type = _FILE
+_DIFFVERSIONSRESPONSE.fields_by_name['changes'].message_type = _FILECHANGE
+_DIFFVERSIONSRESPONSE.fields_by_name['summary'].message_type = _DIFFSUMMARY
+_LISTVERSIONFILESRESPONSE.fields_by_name['files'].message_type = _FILE
+_VERSIONTREESUMMARY.fields_by_name['directories'].message_type = _DIRECTORYSUMMARY
+DESCRIPTOR.message_types_by_name['Bucket'] = _BUCKET
+DESCRIPTOR.message_types_by_name['File'] = _FILE
+DESCRIPTOR.message_types_by_name['Dataset'] = _DATASET
+DESCRIPTOR.message_types_by_name['Version'] = _VERSION
+DESCRIPTOR.message_types_by_name['RetrieveVersionRequest'] = _RETRIEVEVERSIONREQUEST
+DESCRIPTOR.message_types_by_name['ID'] = _ID
+DESCRIPTOR.message_types_by_name['Status'] = _STATUS
+DESCRIPTOR.message_types_by_name['SearchDatasetRequest'] = _SEARCHDATASETREQUEST
+DESCRIPTOR.message_types_by_name['SearchVersionRequest'] = _SEARCHVERSIONREQUEST
+DESCRIPTOR.message_types_by_name['SearchDatasetResponse'] = _SEARCHDATASETRESPONSE
+DESCRIPTOR.message_types_by_name['SearchVersionResponse'] = _SEARCHVERSIONRESPONSE
+DESCRIPTOR.message_types_by_name['DiffVersionsRequest'] = _DIFFVERSIONSREQUEST
+DESCRIPTOR.message_types_by_name['FileChange'] = _FILECHANGE
+DESCRIPTOR.message_types_by_name['DiffSummary'] = _DIFFSUMMARY
+DESCRIPTOR.message_types_by_name['DiffVersionsResponse'] = _DIFFVERSIONSRESPONSE
+DESCRIPTOR.message_types_by_name['ListVersionFilesRequest'] = _LISTVERSIONFILESREQUEST
+DESCRIPTOR.message_types_by_name['ListVersionFilesResponse'] = _LISTVERSIONFILESRESPONSE
+DESCRIPTOR.message_types_by_name['StatVersionFileRequest'] = _STATVERSIONFILEREQUEST
+DESCRIPTOR.message_types_by_name['VersionTreeSummaryRequest'] = _VERSIONTREESUMMARYREQUEST
+DESCRIPTOR.message_types_by_name['DirectorySummary'] = _DIRECTORYSUMMARY
+DESCRIPTOR.message_types_by_name['VersionTreeSummary'] = _VERSIONTREESUMMARY
+DESCRIPTOR.enum_types_by_name['SCOPE'] = _SCOPE
+DESCRIPTOR.enum_types_by_name['COUNT_MODE'] = _COUNT_MODE
+DESCRIPTOR.enum_types_by_name['VERSION_VIEW'] = _VERSION_VIEW
+DESCRIPTOR.enum_types_by_name['CHANGE'] = _CHANGE
+_sym_db.RegisterFileDescriptor(DESCRIPTOR)
+
+Bucket = _reflection.GeneratedProtocolMessageType('Bucket', (_message.Message,), {
+  'DESCRIPTOR' : _BUCKET,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.Bucket)
+  })
+_sym_db.RegisterMessage(Bucket)
+
+File = _reflection.GeneratedProtocolMessageType('File', (_message.Message,), {
+  'DESCRIPTOR' : _FILE,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.File)
+  })
+_sym_db.RegisterMessage(File)
+
+Dataset = _reflection.GeneratedProtocolMessageType('Dataset', (_message.Message,), {
+  'DESCRIPTOR' : _DATASET,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.Dataset)
+  })
+_sym_db.RegisterMessage(Dataset)
+
+Version = _reflection.GeneratedProtocolMessageType('Version', (_message.Message,), {
+  'DESCRIPTOR' : _VERSION,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.Version)
+  })
+_sym_db.RegisterMessage(Version)
+
+RetrieveVersionRequest = _reflection.GeneratedProtocolMessageType('RetrieveVersionRequest', (_message.Message,), {
+  'DESCRIPTOR' : _RETRIEVEVERSIONREQUEST,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.RetrieveVersionRequest)
+  })
+_sym_db.RegisterMessage(RetrieveVersionRequest)
+
+ID = _reflection.GeneratedProtocolMessageType('ID', (_message.Message,), {
+  'DESCRIPTOR' : _ID,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.ID)
+  })
+_sym_db.RegisterMessage(ID)
+
+Status = _reflection.GeneratedProtocolMessageType('Status', (_message.Message,), {
+  'DESCRIPTOR' : _STATUS,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.Status)
+  })
+_sym_db.RegisterMessage(Status)
+
+SearchDatasetRequest = _reflection.GeneratedProtocolMessageType('SearchDatasetRequest', (_message.Message,), {
+
+  'DatasetFilter' : _reflection.GeneratedProtocolMessageType('DatasetFilter', (_message.Message,), {
+    'DESCRIPTOR' : _SEARCHDATASETREQUEST_DATASETFILTER,
+    '__module__' : 'dataset_pb2'
+    # @@protoc_insertion_point(class_scope:datasets.SearchDatasetRequest.DatasetFilter)
+    })
+  ,
+  'DESCRIPTOR' : _SEARCHDATASETREQUEST,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.SearchDatasetRequest)
+  })
+_sym_db.RegisterMessage(SearchDatasetRequest)
+_sym_db.RegisterMessage(SearchDatasetRequest.DatasetFilter)
 
 SearchVersionRequest = _reflection.GeneratedProtocolMessageType('SearchVersionRequest', (_message.Message,), {
 
@@ -785,6 +1517,76 @@ SearchVersionResponse = _reflection.GeneratedProtocolMessageType('SearchVersionR
   })
 _sym_db.RegisterMessage(SearchVersionResponse)
 
+DiffVersionsRequest = _reflection.GeneratedProtocolMessageType('DiffVersionsRequest', (_message.Message,), {
+  'DESCRIPTOR' : _DIFFVERSIONSREQUEST,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.DiffVersionsRequest)
+  })
+_sym_db.RegisterMessage(DiffVersionsRequest)
+
+FileChange = _reflection.GeneratedProtocolMessageType('FileChange', (_message.Message,), {
+  'DESCRIPTOR' : _FILECHANGE,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.FileChange)
+  })
+_sym_db.RegisterMessage(FileChange)
+
+DiffSummary = _reflection.GeneratedProtocolMessageType('DiffSummary', (_message.Message,), {
+  'DESCRIPTOR' : _DIFFSUMMARY,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.DiffSummary)
+  })
+_sym_db.RegisterMessage(DiffSummary)
+
+DiffVersionsResponse = _reflection.GeneratedProtocolMessageType('DiffVersionsResponse', (_message.Message,), {
+  'DESCRIPTOR' : _DIFFVERSIONSRESPONSE,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.DiffVersionsResponse)
+  })
+_sym_db.RegisterMessage(DiffVersionsResponse)
+
+ListVersionFilesRequest = _reflection.GeneratedProtocolMessageType('ListVersionFilesRequest', (_message.Message,), {
+  'DESCRIPTOR' : _LISTVERSIONFILESREQUEST,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.ListVersionFilesRequest)
+  })
+_sym_db.RegisterMessage(ListVersionFilesRequest)
+
+ListVersionFilesResponse = _reflection.GeneratedProtocolMessageType('ListVersionFilesResponse', (_message.Message,), {
+  'DESCRIPTOR' : _LISTVERSIONFILESRESPONSE,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.ListVersionFilesResponse)
+  })
+_sym_db.RegisterMessage(ListVersionFilesResponse)
+
+StatVersionFileRequest = _reflection.GeneratedProtocolMessageType('StatVersionFileRequest', (_message.Message,), {
+  'DESCRIPTOR' : _STATVERSIONFILEREQUEST,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.StatVersionFileRequest)
+  })
+_sym_db.RegisterMessage(StatVersionFileRequest)
+
+VersionTreeSummaryRequest = _reflection.GeneratedProtocolMessageType('VersionTreeSummaryRequest', (_message.Message,), {
+  'DESCRIPTOR' : _VERSIONTREESUMMARYREQUEST,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.VersionTreeSummaryRequest)
+  })
+_sym_db.RegisterMessage(VersionTreeSummaryRequest)
+
+DirectorySummary = _reflection.GeneratedProtocolMessageType('DirectorySummary', (_message.Message,), {
+  'DESCRIPTOR' : _DIRECTORYSUMMARY,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.DirectorySummary)
+  })
+_sym_db.RegisterMessage(DirectorySummary)
+
+VersionTreeSummary = _reflection.GeneratedProtocolMessageType('VersionTreeSummary', (_message.Message,), {
+  'DESCRIPTOR' : _VERSIONTREESUMMARY,
+  '__module__' : 'dataset_pb2'
+  # @@protoc_insertion_point(class_scope:datasets.VersionTreeSummary)
+  })
+_sym_db.RegisterMessage(VersionTreeSummary)
+
 
 DESCRIPTOR._options = None
 
@@ -795,8 +1597,8 @@ _DATASETSERVICES = _descriptor.ServiceDescriptor(
   index=0,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=1113,
-  serialized_end=1684,
+  serialized_start=2565,
+  serialized_end=3655,
   methods=[
   _descriptor.MethodDescriptor(
     name='RetrieveDataset',
@@ -853,7 +1655,7 @@ _DATASETSERVICES = _descriptor.ServiceDescriptor(
     full_name='datasets.DatasetServices.RetrieveVersion',
     index=5,
     containing_service=None,
-    input_type=_ID,
+    input_type=_RETRIEVEVERSIONREQUEST,
     output_type=_VERSION,
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
@@ -878,16 +1680,76 @@ _DATASETSERVICES = _descriptor.ServiceDescriptor(
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='StreamSearchDatasets',
+    full_name='datasets.DatasetServices.StreamSearchDatasets',
+    index=8,
+    containing_service=None,
+    input_type=_SEARCHDATASETREQUEST,
+    output_type=_DATASET,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='StreamSearchVersions',
+    full_name='datasets.DatasetServices.StreamSearchVersions',
+    index=9,
+    containing_service=None,
+    input_type=_SEARCHVERSIONREQUEST,
+    output_type=_VERSION,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
   _descriptor.MethodDescriptor(
     name='CreateBucket',
     full_name='datasets.DatasetServices.CreateBucket',
-    index=8,
+    index=10,
     containing_service=None,
     input_type=_BUCKET,
     output_type=_BUCKET,
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='DiffVersions',
+    full_name='datasets.DatasetServices.DiffVersions',
+    index=11,
+    containing_service=None,
+    input_type=_DIFFVERSIONSREQUEST,
+    output_type=_DIFFVERSIONSRESPONSE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='ListVersionFiles',
+    full_name='datasets.DatasetServices.ListVersionFiles',
+    index=12,
+    containing_service=None,
+    input_type=_LISTVERSIONFILESREQUEST,
+    output_type=_LISTVERSIONFILESRESPONSE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='StatVersionFile',
+    full_name='datasets.DatasetServices.StatVersionFile',
+    index=13,
+    containing_service=None,
+    input_type=_STATVERSIONFILEREQUEST,
+    output_type=_FILE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='GetVersionTreeSummary',
+    full_name='datasets.DatasetServices.GetVersionTreeSummary',
+    index=14,
+    containing_service=None,
+    input_type=_VERSIONTREESUMMARYREQUEST,
+    output_type=_VERSIONTREESUMMARY,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_DATASETSERVICES)
 
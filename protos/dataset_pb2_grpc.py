@@ -60,7 +60,7 @@ class DatasetServicesStub(object):
                 )
         self.RetrieveVersion = channel.unary_unary(
                 '/datasets.DatasetServices/RetrieveVersion',
-                request_serializer=dataset__pb2.ID.SerializeToString,
+                request_serializer=dataset__pb2.RetrieveVersionRequest.SerializeToString,
                 response_deserializer=dataset__pb2.Version.FromString,
                 )
         self.CreateVersion = channel.unary_unary(
@@ -73,11 +73,41 @@ class DatasetServicesStub(object):
                 request_serializer=dataset__pb2.SearchVersionRequest.SerializeToString,
                 response_deserializer=dataset__pb2.SearchVersionResponse.FromString,
                 )
+        self.StreamSearchDatasets = channel.unary_stream(
+                '/datasets.DatasetServices/StreamSearchDatasets',
+                request_serializer=dataset__pb2.SearchDatasetRequest.SerializeToString,
+                response_deserializer=dataset__pb2.Dataset.FromString,
+                )
+        self.StreamSearchVersions = channel.unary_stream(
+                '/datasets.DatasetServices/StreamSearchVersions',
+                request_serializer=dataset__pb2.SearchVersionRequest.SerializeToString,
+                response_deserializer=dataset__pb2.Version.FromString,
+                )
         self.CreateBucket = channel.unary_unary(
                 '/datasets.DatasetServices/CreateBucket',
                 request_serializer=dataset__pb2.Bucket.SerializeToString,
                 response_deserializer=dataset__pb2.Bucket.FromString,
                 )
+        self.DiffVersions = channel.unary_stream(
+                '/datasets.DatasetServices/DiffVersions',
+                request_serializer=dataset__pb2.DiffVersionsRequest.SerializeToString,
+                response_deserializer=dataset__pb2.DiffVersionsResponse.FromString,
+                )
+        self.ListVersionFiles = channel.unary_unary(
+                '/datasets.DatasetServices/ListVersionFiles',
+                request_serializer=dataset__pb2.ListVersionFilesRequest.SerializeToString,
+                response_deserializer=dataset__pb2.ListVersionFilesResponse.FromString,
+                )
+        self.StatVersionFile = channel.unary_unary(
+                '/datasets.DatasetServices/StatVersionFile',
+                request_serializer=dataset__pb2.StatVersionFileRequest.SerializeToString,
+                response_deserializer=dataset__pb2.File.FromString,
+                )
+        self.GetVersionTreeSummary = channel.unary_unary(
+                '/datasets.DatasetServices/GetVersionTreeSummary',
+                request_serializer=dataset__pb2.VersionTreeSummaryRequest.SerializeToString,
+                response_deserializer=dataset__pb2.VersionTreeSummary.FromString,
+                )
 
 
 class DatasetServicesServicer(object):
@@ -140,6 +170,20 @@ class DatasetServicesServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamSearchDatasets(self, request, context):
+        """Search for datasets, streaming matches one at a time
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamSearchVersions(self, request, context):
+        """Search for dataset's versions, streaming matches one at a time
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def CreateBucket(self, request, context):
         """Create bucket
         """
@@ -147,6 +191,34 @@ class DatasetServicesServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def DiffVersions(self, request, context):
+        """Compare the trees of two versions, streaming the changed files then the totals
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListVersionFiles(self, request, context):
+        """List the files of a version, one directory or pattern at a time
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StatVersionFile(self, request, context):
+        """Retrieve a single file of a version
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetVersionTreeSummary(self, request, context):
+        """Retrieve the size and file count of a version's directories
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_DatasetServicesServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -177,7 +249,7 @@ def add_DatasetServicesServicer_to_server(servicer, server):
             ),
             'RetrieveVersion': grpc.unary_unary_rpc_method_handler(
                     servicer.RetrieveVersion,
-                    request_deserializer=dataset__pb2.ID.FromString,
+                    request_deserializer=dataset__pb2.RetrieveVersionRequest.FromString,
                     response_serializer=dataset__pb2.Version.SerializeToString,
             ),
             'CreateVersion': grpc.unary_unary_rpc_method_handler(
@@ -190,11 +262,41 @@ def add_DatasetServicesServicer_to_server(servicer, server):
                     request_deserializer=dataset__pb2.SearchVersionRequest.FromString,
                     response_serializer=dataset__pb2.SearchVersionResponse.SerializeToString,
             ),
+            'StreamSearchDatasets': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamSearchDatasets,
+                    request_deserializer=dataset__pb2.SearchDatasetRequest.FromString,
+                    response_serializer=dataset__pb2.Dataset.SerializeToString,
+            ),
+            'StreamSearchVersions': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamSearchVersions,
+                    request_deserializer=dataset__pb2.SearchVersionRequest.FromString,
+                    response_serializer=dataset__pb2.Version.SerializeToString,
+            ),
             'CreateBucket': grpc.unary_unary_rpc_method_handler(
                     servicer.CreateBucket,
                     request_deserializer=dataset__pb2.Bucket.FromString,
                     response_serializer=dataset__pb2.Bucket.SerializeToString,
             ),
+            'DiffVersions': grpc.unary_stream_rpc_method_handler(
+                    servicer.DiffVersions,
+                    request_deserializer=dataset__pb2.DiffVersionsRequest.FromString,
+                    response_serializer=dataset__pb2.DiffVersionsResponse.SerializeToString,
+            ),
+            'ListVersionFiles': grpc.unary_unary_rpc_method_handler(
+                    servicer.ListVersionFiles,
+                    request_deserializer=dataset__pb2.ListVersionFilesRequest.FromString,
+                    response_serializer=dataset__pb2.ListVersionFilesResponse.SerializeToString,
+            ),
+            'StatVersionFile': grpc.unary_unary_rpc_method_handler(
+                    servicer.StatVersionFile,
+                    request_deserializer=dataset__pb2.StatVersionFileRequest.FromString,
+                    response_serializer=dataset__pb2.File.SerializeToString,
+            ),
+            'GetVersionTreeSummary': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetVersionTreeSummary,
+                    request_deserializer=dataset__pb2.VersionTreeSummaryRequest.FromString,
+                    response_serializer=dataset__pb2.VersionTreeSummary.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'datasets.DatasetServices', rpc_method_handlers)
@@ -303,7 +405,7 @@ class DatasetServices(object):
             timeout=None,
             metadata=None):
         return grpc.experimental.unary_unary(request, target, '/datasets.DatasetServices/RetrieveVersion',
-            dataset__pb2.ID.SerializeToString,
+            dataset__pb2.RetrieveVersionRequest.SerializeToString,
             dataset__pb2.Version.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -342,6 +444,40 @@ class DatasetServices(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def StreamSearchDatasets(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/datasets.DatasetServices/StreamSearchDatasets',
+            dataset__pb2.SearchDatasetRequest.SerializeToString,
+            dataset__pb2.Dataset.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StreamSearchVersions(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/datasets.DatasetServices/StreamSearchVersions',
+            dataset__pb2.SearchVersionRequest.SerializeToString,
+            dataset__pb2.Version.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def CreateBucket(request,
             target,
@@ -358,3 +494,71 @@ class DatasetServices(object):
             dataset__pb2.Bucket.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def DiffVersions(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/datasets.DatasetServices/DiffVersions',
+            dataset__pb2.DiffVersionsRequest.SerializeToString,
+            dataset__pb2.DiffVersionsResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def ListVersionFiles(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/datasets.DatasetServices/ListVersionFiles',
+            dataset__pb2.ListVersionFilesRequest.SerializeToString,
+            dataset__pb2.ListVersionFilesResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def StatVersionFile(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/datasets.DatasetServices/StatVersionFile',
+            dataset__pb2.StatVersionFileRequest.SerializeToString,
+            dataset__pb2.File.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def GetVersionTreeSummary(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/datasets.DatasetServices/GetVersionTreeSummary',
+            dataset__pb2.VersionTreeSummaryRequest.SerializeToString,
+            dataset__pb2.VersionTreeSummary.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -16,27 +16,74 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from marshmallow import Schema, fields, pre_load, post_dump, validates_schema, ValidationError
-from google.protobuf import json_format
+from marshmallow import Schema, fields, pre_load, post_dump, validates_schema, validate, ValidationError
 
 from protos.dataset_pb2 import Dataset, Status, Version, ID, SearchVersionRequest, SearchDatasetRequest, \
-    SearchVersionResponse, SearchDatasetResponse
+    RetrieveVersionRequest, DiffVersionsRequest, ListVersionFilesRequest, StatVersionFileRequest, \
+    VersionTreeSummaryRequest
+from converters import message_to_dict
+from utils import encode_page_token, decode_page_token, decode_file_token
+import config
+import manifests
+import timing
 
 
 class BaseSchema(Schema):
     # Custom options
     __proto_class__ = None
-    __decode_options__ = {"preserving_proto_field_name": True,
-                          "including_default_value_fields": False}
 
     def parse_proto_message(self, message):
-        return json_format.MessageToDict(message, **self.__decode_options__)
+        return message_to_dict(message)
+
+    def load(self, *args, **kwargs):
+        with timing.section(timing.SERIALIZATION):
+            return super().load(*args, **kwargs)
+
+    def dump(self, *args, **kwargs):
+        with timing.section(timing.SERIALIZATION):
+            return super().dump(*args, **kwargs)
 
     @staticmethod
-    def paginate(data, page: int, limit: int):
-        begin = (page - 1) * limit
-        end = begin + limit
-        return page, limit, data[begin:end]
+    def paginate(data, page: int, limit: int, page_token=None, count_mode: str = "Exact"):
+        data = data.order_by('-create_at', '-id')
+        # keyset pagination: resume right after the last (create_at, id) seen,
+        # so that every page costs the same regardless of its depth
+        if page_token:
+            create_at, id = page_token
+            # the range on create_at lets the index scan start at the cursor
+            keyset = {"create_at": {"$lte": create_at},
+                      "$or": [{"create_at": {"$lt": create_at}}, {"_id": {"$lt": id}}]}
+            begin = 0
+        else:
+            keyset = {}
+            begin = (page - 1) * limit
+        # fetch one extra document to know whether a next page exists
+        end = begin + limit + 1
+
+        # the page is an indexed find, whatever the count mode
+        page_data = data.filter(__raw__=keyset) if keyset else data
+        items = list(page_data[begin:end])
+        if count_mode == "Exact":
+            # counted apart, a $facet would run the page unindexed and size-limited
+            total = data.count()
+        elif count_mode == "Estimated":
+            if set(data._query) <= {"deleted"}:
+                # unfiltered: the collection metadata count, off by the few deleted documents
+                total = data._document._get_collection().estimated_document_count()
+            else:
+                # the metadata count ignores filters, count the results up to a bound instead
+                total = data.limit(config.ESTIMATED_COUNT_LIMIT).count(with_limit_and_skip=True)
+        else:
+            total = 0
+
+        next_page_token = encode_page_token(items[limit - 1]) if len(items) > limit else ""
+        return {
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "data": items[:limit],
+            "next_page_token": next_page_token
+        }
 
     @pre_load(pass_many=True)
     def decode(self, data, many, **kwargs):
@@ -51,6 +98,34 @@ class BaseSchema(Schema):
         return self.__proto_class__(**data)
 
 
+COUNT_MODES = ("Exact", "Estimated", "Disabled")
+VERSION_VIEWS = ("Full", "Basic")
+# largest page of ListVersionFiles and GetVersionTreeSummary
+MAX_FILES_LIMIT = 10000
+# largest page of SearchDatasets and SearchVersions
+MAX_SEARCH_LIMIT = 1000
+
+
+class PageTokenField(fields.Field):
+    """Opaque keyset cursor, deserialized into a (create_at, id) tuple."""
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        try:
+            return decode_page_token(value)
+        except ValueError as e:
+            raise ValidationError(str(e)) from e
+
+
+class FileTokenField(fields.Field):
+    """Opaque listing cursor, deserialized into the name the listing resumes from."""
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        try:
+            return decode_file_token(value)
+        except ValueError as e:
+            raise ValidationError(str(e)) from e
+
+
 class DatasetSerializer(BaseSchema):
     __proto_class__ = Dataset
 
@@ -72,6 +147,8 @@ class DatasetSerializer(BaseSchema):
 class FileSerializer(Schema):
     name = fields.Str(required=True)
     size = fields.Int(required=True)
+    etag = fields.Str()
+    last_modified = fields.Str()
 
 
 class StatusSerializer(BaseSchema):
@@ -89,10 +166,18 @@ class VersionSerializer(BaseSchema):
     dataset = fields.Str(required=True)
     related_bucket = fields.Str(required=True)
     author = fields.Str(required=True)
-    bucket_tree = fields.List(fields.Nested(FileSerializer))
+    bucket_tree = fields.Method("dump_bucket_tree", deserialize="load_bucket_tree")
     size = fields.Int()
+    file_count = fields.Int()
+    parent = fields.Str()
     create_at = fields.Str()
 
+    def dump_bucket_tree(self, version):
+        return list(manifests.iter_files(version))
+
+    def load_bucket_tree(self, value):
+        return FileSerializer(many=True).load(value)
+
 
 class IDSerializer(BaseSchema):
     __proto_class__ = ID
@@ -100,6 +185,48 @@ class IDSerializer(BaseSchema):
     id = fields.Str(required=True)
 
 
+class RetrieveVersionRequestSerializer(BaseSchema):
+    __proto_class__ = RetrieveVersionRequest
+
+    id = fields.Str(required=True)
+    view = fields.Str(missing="Full", validate=validate.OneOf(VERSION_VIEWS))
+
+
+class DiffVersionsRequestSerializer(BaseSchema):
+    __proto_class__ = DiffVersionsRequest
+
+    base = fields.Str(required=True)
+    target = fields.Str(required=True)
+
+
+class ListVersionFilesRequestSerializer(BaseSchema):
+    __proto_class__ = ListVersionFilesRequest
+
+    version = fields.Str(required=True)
+    prefix = fields.Str(missing="")
+    delimiter = fields.Str(missing="")
+    glob = fields.Str(missing="")
+    limit = fields.Int(missing=1000, validate=validate.Range(min=1, max=MAX_FILES_LIMIT))
+    page_token = FileTokenField(missing="")
+
+
+class StatVersionFileRequestSerializer(BaseSchema):
+    __proto_class__ = StatVersionFileRequest
+
+    version = fields.Str(required=True)
+    name = fields.Str(required=True)
+
+
+class VersionTreeSummaryRequestSerializer(BaseSchema):
+    __proto_class__ = VersionTreeSummaryRequest
+
+    version = fields.Str(required=True)
+    path = fields.Str(missing="", validate=lambda path: not path or path.endswith("/"))
+    max_depth = fields.Int(missing=1, validate=validate.Range(min=1))
+    limit = fields.Int(missing=1000, validate=validate.Range(min=1, max=MAX_FILES_LIMIT))
+    page_token = FileTokenField(missing="")
+
+
 class DatasetFilterSerializer(Schema):
     id = fields.Str()
     name = fields.Str()
@@ -109,12 +236,12 @@ class DatasetFilterSerializer(Schema):
 
 class SearchDatasetRequestSerializer(BaseSchema):
     __proto_class__ = SearchDatasetRequest
-    __decode_options__ = {"preserving_proto_field_name": True,
-                          "including_default_value_fields": False}
 
     query = fields.Nested(DatasetFilterSerializer, missing={})
-    page = fields.Int(missing=1)
-    limit = fields.Int(missing=25)
+    page = fields.Int(missing=1, validate=validate.Range(min=1))
+    limit = fields.Int(missing=25, validate=validate.Range(min=1, max=MAX_SEARCH_LIMIT))
+    page_token = PageTokenField(missing=None)
+    count_mode = fields.Str(missing="Exact", validate=validate.OneOf(COUNT_MODES))
 
 
 class VersionFilterSerializer(Schema):
@@ -126,37 +253,23 @@ class VersionFilterSerializer(Schema):
 
 class SearchVersionRequestSerializer(BaseSchema):
     __proto_class__ = SearchVersionRequest
-    __decode_options__ = {"preserving_proto_field_name": True,
-                          "including_default_value_fields": False}
 
     query = fields.Nested(VersionFilterSerializer, missing={})
-    page = fields.Int(missing=1)
-    limit = fields.Int(missing=25)
-
-
-class SearchDatasetResponseSerializer(BaseSchema):
-    __proto_class__ = SearchDatasetResponse
-
-    total = fields.Int(default=0)
-    page = fields.Int(default=1)
-    limit = fields.Int(default=25)
-    data = fields.List(fields.Nested(DatasetSerializer))
-
-
-class SearchVersionResponseSerializer(BaseSchema):
-    __proto_class__ = SearchVersionResponse
-
-    total = fields.Int(default=0)
-    page = fields.Int(default=1)
-    limit = fields.Int(default=25)
-    data = fields.List(fields.Nested(VersionSerializer))
+    page = fields.Int(missing=1, validate=validate.Range(min=1))
+    limit = fields.Int(missing=25, validate=validate.Range(min=1, max=MAX_SEARCH_LIMIT))
+    page_token = PageTokenField(missing=None)
+    count_mode = fields.Str(missing="Exact", validate=validate.OneOf(COUNT_MODES))
+    view = fields.Str(missing="Full", validate=validate.OneOf(VERSION_VIEWS))
 
 
 dataset_serializer = DatasetSerializer()
 version_serializer = VersionSerializer()
 id_serializer = IDSerializer()
+retrieve_version_request_serializer = RetrieveVersionRequestSerializer()
+diff_versions_request_serializer = DiffVersionsRequestSerializer()
+list_version_files_request_serializer = ListVersionFilesRequestSerializer()
+stat_version_file_request_serializer = StatVersionFileRequestSerializer()
+version_tree_summary_request_serializer = VersionTreeSummaryRequestSerializer()
 status_serializer = StatusSerializer()
 search_dataset_request_serializer = SearchDatasetRequestSerializer()
 search_version_request_serializer = SearchVersionRequestSerializer()
-search_dataset_response_serializer = SearchDatasetResponseSerializer()
-search_version_response_serializer = SearchVersionResponseSerializer()
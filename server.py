@@ -19,35 +19,63 @@
 import logging
 from concurrent import futures
 import grpc
+import signal
+import threading
+import time
 import uuid
 
-from grpc_health.v1 import health, health_pb2_grpc
-from grpc_interceptor.exceptions import InvalidArgument
+from bson import ObjectId
 
-from interceptors import ExceptionToStatusInterceptor
-from utils import increment_version, construct_mongo_query
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
+from grpc_interceptor.exceptions import InvalidArgument, NotFound, FailedPrecondition
+
+from cache import response_cache
+from interceptors import ExceptionToStatusInterceptor, MetricsInterceptor, TimingInterceptor, ProfilingInterceptor
+from utils import version_name, version_seq, construct_mongo_query, encode_file_token
 from protos import dataset_pb2, dataset_pb2_grpc
-from models import documents
+from models import documents, indexes, migrations
 from serializers import dataset_serializer, id_serializer, version_serializer, status_serializer, \
-    search_dataset_request_serializer, search_dataset_response_serializer, search_version_request_serializer, \
-    search_version_response_serializer
+    search_dataset_request_serializer, search_version_request_serializer, retrieve_version_request_serializer, \
+    diff_versions_request_serializer, list_version_files_request_serializer, stat_version_file_request_serializer, \
+    version_tree_summary_request_serializer
 
 import datetime
+import config
+import converters
+import manifests
+import metrics
+import profiling
 import services
+import warmup
 
 # setup logger
 FORMAT = '%(asctime)s %(levelname)s %(message)s'
 logging.basicConfig(level=logging.INFO, format=FORMAT)
 logger = logging.getLogger(__name__)
 
+# names whose health is reported, "" stands for the whole server
+HEALTH_SERVICES = ['', dataset_pb2.DESCRIPTOR.services_by_name['DatasetServices'].full_name]
+
+# export the cache and connection pool counters beside the rpc metrics
+metrics.registry.register_stats('datasets_response_cache', response_cache.stats, "Response cache {}.")
+metrics.registry.register_stats('datasets_minio_pool', services.get_minio_pool_stats,
+                                "Object store connection pool {}.")
+
 
 class DatasetServicer(dataset_pb2_grpc.DatasetServicesServicer):
 
     def RetrieveDataset(self, request, context):
         data = id_serializer.load(request)
-        dataset = documents.Dataset.objects(deleted=False).get(id=data['id'])
+        key = ('dataset', data['id'])
+        cached = response_cache.get(key)
+        if cached is not None:
+            return dataset_pb2.Dataset.FromString(cached)
 
-        return dataset_serializer.dump(dataset)
+        generation = response_cache.generation()
+        dataset = documents.Dataset.objects(deleted=False).get(id=data['id'])
+        response = converters.dataset_to_proto(dataset)
+        response_cache.put(key, response.SerializeToString(), group=response.id, generation=generation)
+        return response
 
     def CreateDataset(self, request, context):
         # validate request payload
@@ -56,7 +84,7 @@ class DatasetServicer(dataset_pb2_grpc.DatasetServicesServicer):
                                     description=data['description'],
                                     scope=data['scope'],
                                     project=data['project']).save()
-        return dataset_serializer.dump(dataset)
+        return converters.dataset_to_proto(dataset)
 
     def UpdateDataset(self, request, context):
         # validate request payload
@@ -74,20 +102,25 @@ class DatasetServicer(dataset_pb2_grpc.DatasetServicesServicer):
         dataset.description = data['description']
         dataset.last_update = datetime.datetime.now()
         dataset.save()
+        response_cache.invalidate(str(dataset.id))
 
-        return dataset_serializer.dump(dataset)
+        return converters.dataset_to_proto(dataset)
 
     def DeleteDataset(self, request, context):
         # validate request payload
         data = id_serializer.load(request)
         dataset = documents.Dataset.objects(deleted=False).get(id=data['id'])
+        # flag the dataset first, a CreateVersion racing with the deletion checks it
+        # after saving; versions left visible by a failed call are flagged at startup
         dataset.deleted = True
         dataset.save()
+        documents.Version.objects(dataset=dataset.id).update(set__deleted=True)
+        response_cache.invalidate(str(dataset.id))
 
         return status_serializer.dump({"status": 200, "message": "Successfully delete dataset."})
 
-    def SearchDatasets(self, request, context):
-        data = search_dataset_request_serializer.load(request)
+    @staticmethod
+    def _search_datasets_queryset(data):
         mappings = {
             "id": "_id",
             "name": "name",
@@ -98,55 +131,105 @@ class DatasetServicer(dataset_pb2_grpc.DatasetServicesServicer):
 
         query = construct_mongo_query(data["query"], mappings, ids)
         if query:
-            datasets = documents.Dataset.objects(__raw__=query).filter(deleted=False)
-        else:
-            datasets = documents.Dataset.objects(deleted=False)
-
-        paginated = dataset_serializer.paginate(datasets, page=data["page"],
-                                                limit=data["limit"])
-        payload = {
-            "total": len(datasets),
-            "page": paginated[0],
-            "limit": paginated[1],
-            "data": paginated[2]
-        }
-        return search_dataset_response_serializer.dump(payload)
+            return documents.Dataset.objects(__raw__=query).filter(deleted=False)
+        return documents.Dataset.objects(deleted=False)
+
+    def SearchDatasets(self, request, context):
+        data = search_dataset_request_serializer.load(request)
+        datasets = self._search_datasets_queryset(data)
+
+        payload = dataset_serializer.paginate(datasets, page=data["page"], limit=data["limit"],
+                                              page_token=data["page_token"], count_mode=data["count_mode"])
+        return converters.search_dataset_response(payload)
+
+    def StreamSearchDatasets(self, request, context):
+        data = search_dataset_request_serializer.load(request)
+        datasets = self._search_datasets_queryset(data)
+        # iterate the cursor without caching so memory stays bounded
+        for dataset in datasets.no_cache().batch_size(config.SEARCH_STREAM_BATCH_SIZE):
+            yield converters.dataset_to_proto(dataset)
+
+    @staticmethod
+    def _apply_version_view(versions, view):
+        # the basic view never reads trees embedded by versions older than manifests
+        if view == "Basic":
+            return versions.exclude('bucket_tree')
+        return versions
 
     def RetrieveVersion(self, request, context):
         # validate request payload
-        data = id_serializer.load(request)
-        version = documents.Version.objects(
-            dataset__in=documents.Dataset.objects(deleted=False)).get(id=data['id'])
-        return version_serializer.dump(version)
+        data = retrieve_version_request_serializer.load(request)
+        # versions are immutable, only their dataset's deletion invalidates them
+        key = ('version', data['id'], data['view'])
+        cached = response_cache.get(key)
+        if cached is not None:
+            return dataset_pb2.Version.FromString(cached)
+
+        generation = response_cache.generation()
+        versions = documents.Version.objects(deleted=False)
+        version = self._apply_version_view(versions, data['view']).get(id=data['id'])
+        response = converters.version_to_proto(version, view=data['view'])
+        response_cache.put(key, response.SerializeToString(), group=response.dataset, generation=generation)
+        return response
+
+    @staticmethod
+    def _seed_version_counter(dataset):
+        """Start the counter of a dataset not yet backfilled after its versions stored without seq."""
+        names = documents.Version.objects(dataset=dataset.id, seq=None).scalar('name')
+        last_seq = max((version_seq(name) for name in names), default=0)
+        if last_seq:
+            documents.Dataset._get_collection().update_one(
+                {'_id': dataset.id}, {'$max': {'version_seq': last_seq, 'version_counter': last_seq}})
 
     def CreateVersion(self, request, context):
         # validate request payload
         data = version_serializer.load(request)
         # retrieve dataset
         dataset = documents.Dataset.objects(deleted=False).get(id=data['dataset'])
-        last_version = documents.Version.objects(dataset=dataset.id).order_by('-name').first()
-        if not last_version:
-            last_version_name = '0'
-        else:
-            last_version_name = last_version.name
-
-        next_version_name = increment_version(last_version_name)
-        bucket_tree = services.list_minio_bucket_objects(data['related_bucket'])
-        # size = reduce(lambda a, b: a['size'] + b['size'], bucket_tree)
-        size = 0
-        for file in bucket_tree:
-            size += file['size']
-        # save new version
-        version = documents.Version(name=next_version_name, dataset=dataset.id, related_bucket=data['related_bucket'],
-                                    bucket_tree=bucket_tree, size=size, author=data['author']).save()
-        dataset.version = next_version_name
-        dataset.last_update = datetime.datetime.now()
-        dataset.save()
-
-        return version_serializer.dump(version)
-
-    def SearchVersions(self, request, context):
-        data = search_version_request_serializer.load(request)
+        if not dataset.version_counter:
+            # the unique (dataset, seq) index cannot catch a number taken by a version without seq
+            self._seed_version_counter(dataset)
+            dataset.reload()
+        # the tree is diffed against the dataset's current version
+        parent = None
+        if dataset.version_seq:
+            parent = documents.Version.objects(dataset=dataset.id, seq=dataset.version_seq) \
+                .exclude('bucket_tree').first()
+        version_id = ObjectId()
+        try:
+            # objects are listed sorted by name
+            bucket_tree = services.list_minio_bucket_objects(data['related_bucket'])
+            # write the tree to the manifest first, the version is only saved once complete
+            manifest = manifests.write_version_tree(version_id, parent, bucket_tree)
+
+            # allocate the version number atomically, the unique (dataset, seq) index
+            # guarantees concurrent creations never share a number
+            dataset = documents.Dataset.objects(id=dataset.id, deleted=False).modify(inc__version_counter=1,
+                                                                                   new=True)
+            if dataset is None:
+                raise documents.Dataset.DoesNotExist("Dataset matching query does not exist.")
+            seq = dataset.version_counter
+            # save new version
+            version = documents.Version(id=version_id, name=version_name(seq), seq=seq, dataset=dataset.id,
+                                        related_bucket=data['related_bucket'], author=data['author'],
+                                        **manifest).save()
+        except Exception:
+            # nothing references the manifest and rollups written so far
+            manifests.delete_version_tree(version_id)
+            raise
+        if documents.Dataset.objects(id=dataset.id, deleted=True).count():
+            # deleted after the number was allocated, its versions may already be flagged
+            documents.Version.objects(id=version_id).update(set__deleted=True)
+            raise documents.Dataset.DoesNotExist("Dataset matching query does not exist.")
+        # only move the dataset forward, a concurrent creation may have saved a later version
+        documents.Dataset.objects(id=dataset.id, version_seq__lt=seq).update(
+            set__version=version.name, set__version_seq=seq, set__last_update=datetime.datetime.now())
+        response_cache.discard(('dataset', str(dataset.id)), group=str(dataset.id))
+
+        return converters.version_to_proto(version)
+
+    @staticmethod
+    def _search_versions_queryset(data):
         mappings = {
             "id": "_id",
             "name": "name",
@@ -157,21 +240,90 @@ class DatasetServicer(dataset_pb2_grpc.DatasetServicesServicer):
 
         query = construct_mongo_query(data["query"], mappings, ids)
         if query:
-            versions = documents.Version.objects(__raw__=query).filter(
-                dataset__in=documents.Dataset.objects(deleted=False))
-        else:
-            versions = documents.Version.objects(
-                dataset__in=documents.Dataset.objects(deleted=False))
-
-        paginated = version_serializer.paginate(versions, page=data["page"],
-                                                limit=data["limit"])
-        payload = {
-            "total": len(versions),
-            "page": paginated[0],
-            "limit": paginated[1],
-            "data": paginated[2]
-        }
-        return search_version_response_serializer.dump(payload)
+            return documents.Version.objects(__raw__=query).filter(deleted=False)
+        return documents.Version.objects(deleted=False)
+
+    def SearchVersions(self, request, context):
+        data = search_version_request_serializer.load(request)
+        versions = self._apply_version_view(self._search_versions_queryset(data), data["view"])
+
+        payload = version_serializer.paginate(versions, page=data["page"], limit=data["limit"],
+                                              page_token=data["page_token"], count_mode=data["count_mode"])
+        return converters.search_version_response(payload, view=data["view"])
+
+    def StreamSearchVersions(self, request, context):
+        data = search_version_request_serializer.load(request)
+        versions = self._apply_version_view(self._search_versions_queryset(data), data["view"])
+        # iterate the cursor without caching so memory stays bounded
+        for version in versions.no_cache().batch_size(config.SEARCH_STREAM_BATCH_SIZE):
+            yield converters.version_to_proto(version, view=data["view"])
+
+    def DiffVersions(self, request, context):
+        data = diff_versions_request_serializer.load(request)
+        versions = documents.Version.objects(deleted=False).exclude('bucket_tree')
+        base = versions.get(id=data['base'])
+        target = versions.get(id=data['target'])
+        for version in (base, target):
+            # versions created before manifests are read with their embedded tree
+            if version.manifest_kind is None and not version.chunk_count:
+                version.reload()
+
+        # both trees are read sorted by name, so a single merge pass finds the
+        # changes while holding only a batch of them in memory
+        summary = dataset_pb2.DiffSummary(size_delta=target.size - base.size)
+        changes = []
+        for change, old, new in manifests.diff_files(manifests.iter_files(base), manifests.iter_files(target)):
+            setattr(summary, change, getattr(summary, change) + 1)
+            changes.append(converters.file_change_to_proto(change, old, new))
+            if len(changes) == config.DIFF_STREAM_BATCH_SIZE:
+                yield dataset_pb2.DiffVersionsResponse(changes=changes)
+                changes = []
+        yield dataset_pb2.DiffVersionsResponse(changes=changes, summary=summary)
+
+    def ListVersionFiles(self, request, context):
+        data = list_version_files_request_serializer.load(request)
+        version = documents.Version.objects(deleted=False).get(id=data['version'])
+
+        response = dataset_pb2.ListVersionFilesResponse()
+        listing = manifests.list_files(version, prefix=data['prefix'], delimiter=data['delimiter'],
+                                       glob=data['glob'], start=data['page_token'])
+        count = 0
+        for name, file in listing:
+            if count == data['limit']:
+                response.next_page_token = encode_file_token(resume_from)
+                break
+            if file is None:
+                response.prefixes.append(name)
+                resume_from = manifests.successor(name)
+            else:
+                response.files.add(**file)
+                resume_from = name + '\0'
+            count += 1
+        return response
+
+    def StatVersionFile(self, request, context):
+        data = stat_version_file_request_serializer.load(request)
+        version = documents.Version.objects(deleted=False).get(id=data['version'])
+        file = manifests.stat_file(version, data['name'])
+        if file is None:
+            raise NotFound("File {} not found in version.".format(data['name']))
+        return dataset_pb2.File(**file)
+
+    def GetVersionTreeSummary(self, request, context):
+        data = version_tree_summary_request_serializer.load(request)
+        version = documents.Version.objects(deleted=False).exclude('bucket_tree').get(id=data['version'])
+        if not version.directory_count:
+            raise FailedPrecondition("Version has no directory rollups, run manage.py backfill-version-rollups.")
+
+        response = dataset_pb2.VersionTreeSummary()
+        directories = manifests.iter_directories(version, path=data['path'], max_depth=data['max_depth'],
+                                                 start=data['page_token'])
+        for directory in directories:
+            if len(response.directories) == data['limit']:
+                response.next_page_token = encode_file_token(response.directories[-1].path + '\0')
+                break
+            response.directories.add(**directory)
+        return response
 
     def CreateBucket(self, request, context):
         # slugify and create dataset name to create a bucket_name
@@ -181,8 +333,9 @@ class DatasetServicer(dataset_pb2_grpc.DatasetServicesServicer):
         return dataset_pb2.Bucket(name=bucket_name)
 
 
-def create_server(server_address):
-    interceptors = [ExceptionToStatusInterceptor()]
+def create_server(server_address, health_servicer=None):
+    interceptors = [ExceptionToStatusInterceptor(), MetricsInterceptor(), TimingInterceptor(),
+                    ProfilingInterceptor()]
 
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), interceptors=interceptors)
     dataset_pb2_grpc.add_DatasetServicesServicer_to_server(
@@ -190,18 +343,52 @@ def create_server(server_address):
     )
     # Create a health check servicer. We use the non-blocking implementation
     # to avoid thread starvation.
-    health_servicer = health.HealthServicer(
-        experimental_non_blocking=True,
-        experimental_thread_pool=futures.ThreadPoolExecutor(max_workers=1))
+    if health_servicer is None:
+        health_servicer = health.HealthServicer(
+            experimental_non_blocking=True,
+            experimental_thread_pool=futures.ThreadPoolExecutor(max_workers=1))
     health_pb2_grpc.add_HealthServicer_to_server(health_servicer, server)
 
     port = server.add_insecure_port(server_address)
     return server, port
 
 
+def prepare_database():
+    if config.ENSURE_INDEXES_ON_STARTUP:
+        indexes.ensure_indexes()
+    if config.CHECK_INDEXES_ON_STARTUP:
+        indexes.check_indexes()
+    if config.BACKFILL_ON_STARTUP:
+        migrations.backfill_version_deleted()
+
+
+def drain(server, health_servicer):
+    """Report NOT_SERVING, give load balancers time to notice, then let in-flight rpcs finish."""
+    logger.info("server is draining............")
+    health_servicer.enter_graceful_shutdown()
+    time.sleep(config.SHUTDOWN_DRAIN_DELAY)
+    server.stop(config.SHUTDOWN_GRACE_PERIOD)
+
+
 def serve():
-    server, port = create_server('[::]:50051')
+    metrics.start_http_server()
+    profiling.install_signal_handler()
+    health_servicer = health.HealthServicer(
+        experimental_non_blocking=True,
+        experimental_thread_pool=futures.ThreadPoolExecutor(max_workers=1))
+    for service in HEALTH_SERVICES:
+        health_servicer.set(service, health_pb2.HealthCheckResponse.NOT_SERVING)
+    server, port = create_server('[::]:50051', health_servicer)
     server.start()
+    signal.signal(signal.SIGTERM,
+                  lambda signum, frame: threading.Thread(target=drain, args=(server, health_servicer)).start())
+    logger.info("server is warming up on port {} ............".format(port))
+
+    # the port answers health checks meanwhile, traffic is only routed once SERVING
+    prepare_database()
+    warmup.warm_up(DatasetServicer())
+    for service in HEALTH_SERVICES:
+        health_servicer.set(service, health_pb2.HealthCheckResponse.SERVING)
     logger.info("server is serving on port {} ............".format(port))
     server.wait_for_termination()
     logger.info("server is stopped............")
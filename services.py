@@ -17,26 +17,262 @@
 # limitations under the License.
 #
 
-from minio import Minio
+from concurrent import futures
+from urllib3.connection import HTTPConnection
+import certifi
+import collections
 import config
+import itertools
+import os
+import queue
+import socket
+import threading
+import timing
+import urllib3
+
+
+class _InstrumentedPoolMixin:
+    """Count how many times a request had to wait for a free pooled connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.num_waits = 0
+        self._waits_lock = threading.Lock()
+
+    def _get_conn(self, timeout=None):
+        if self.pool is not None and self.pool.empty():
+            with self._waits_lock:
+                self.num_waits += 1
+        return super()._get_conn(timeout)
+
+
+class _HTTPConnectionPool(_InstrumentedPoolMixin, urllib3.HTTPConnectionPool):
+    pass
+
+
+class _HTTPSConnectionPool(_InstrumentedPoolMixin, urllib3.HTTPSConnectionPool):
+    pass
+
+
+class _PoolManager(urllib3.PoolManager):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_classes_by_scheme = {"http": _HTTPConnectionPool, "https": _HTTPSConnectionPool}
+
+
+_minio_client = None
+_minio_client_lock = threading.Lock()
+
+
+def _create_http_client():
+    return _PoolManager(
+        maxsize=config.MINIO_POOL_MAXSIZE,
+        block=config.MINIO_POOL_BLOCK,
+        timeout=urllib3.Timeout(connect=config.MINIO_CONNECT_TIMEOUT, read=config.MINIO_READ_TIMEOUT),
+        retries=urllib3.Retry(
+            total=config.MINIO_MAX_RETRIES,
+            backoff_factor=config.MINIO_RETRY_BACKOFF,
+            status_forcelist=[500, 502, 503, 504]
+        ),
+        # keep idle pooled connections alive between rpcs
+        socket_options=HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+        cert_reqs='CERT_REQUIRED',
+        ca_certs=os.environ.get('SSL_CERT_FILE') or certifi.where()
+    )
 
 
 def get_minio_client():
-    client = Minio(config.MINIO_HOST, access_key=config.AWS_ACCESS_KEY_ID,
-                   secret_key=config.AWS_SECRET_ACCESS_KEY, secure=False)
-    return client
+    """Return the process-wide Minio client, created on first use.
+
+    Minio clients are thread safe, sharing one lets every rpc reuse the
+    connections of its pool instead of paying a new TCP/TLS handshake.
+    """
+    global _minio_client
+    if _minio_client is None:
+        # minio is only imported by the first storage rpc, keeping it off the startup path
+        from minio import Minio
+        with _minio_client_lock:
+            if _minio_client is None:
+                _minio_client = Minio(config.MINIO_HOST, access_key=config.AWS_ACCESS_KEY_ID,
+                                      secret_key=config.AWS_SECRET_ACCESS_KEY, secure=config.MINIO_SECURE,
+                                      http_client=_create_http_client())
+    return _minio_client
 
 
+def get_minio_pool_stats():
+    """Return connection pool metrics of the shared Minio client."""
+    stats = {"pools": 0, "maxsize": 0, "in_use": 0, "idle": 0, "connections": 0, "requests": 0, "waits": 0}
+    if _minio_client is None:
+        return stats
+
+    pools = _minio_client._http.pools
+    for key in pools.keys():
+        pool = pools.get(key)
+        if pool is None or pool.pool is None:
+            # evicted or closed meanwhile
+            continue
+        idle = list(pool.pool.queue)
+        stats["pools"] += 1
+        stats["maxsize"] += pool.pool.maxsize
+        stats["in_use"] += pool.pool.maxsize - len(idle)
+        stats["idle"] += sum(1 for conn in idle if conn is not None)
+        stats["connections"] += pool.num_connections
+        stats["requests"] += pool.num_requests
+        stats["waits"] += pool.num_waits
+    return stats
+
+
+@timing.timed(timing.STORAGE)
 def create_minio_bucket(bucket_name):
     minio = get_minio_client()
     minio.make_bucket(bucket_name, 'us-west-1')
 
 
-def list_minio_bucket_objects(bucket_name):
-    minio = get_minio_client()
-    objects = minio.list_objects_v2(bucket_name, recursive=True)
+def _list_objects(minio, bucket_name, prefix, recursive):
+    # the public list_objects_v2 does not expose max-keys, so call the underlying
+    # paginated listing to make the page size configurable
+    return minio._list_objects(bucket_name, delimiter=None if recursive else "/", prefix=prefix,
+                               max_keys=config.MINIO_LIST_PAGE_SIZE)
 
-    return [{'name': obj.object_name, 'size': obj.size} for obj in objects]
 
+def _object_to_file(obj):
+    return {'name': obj.object_name, 'size': obj.size, 'etag': obj.etag or '',
+            'last_modified': obj.last_modified.isoformat() if obj.last_modified else ''}
+
+
+# marks the end of a shard in its queue of batches
+_SHARD_END = object()
+
+
+def _put_batch(batches, batch, stopped):
+    # block while the consumer is behind, giving up once it stopped reading
+    while not stopped.is_set():
+        try:
+            batches.put(batch, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _list_shard(minio, bucket_name, prefix, batches, stopped):
+    """List a prefix into batches of at most a page of files, so that no more
+    than MINIO_LIST_SHARD_BUFFER batches of a shard are held at once."""
+    batch = []
+    try:
+        for obj in _list_objects(minio, bucket_name, prefix, recursive=True):
+            batch.append(_object_to_file(obj))
+            if len(batch) >= config.MINIO_LIST_PAGE_SIZE:
+                if not _put_batch(batches, batch, stopped):
+                    return
+                batch = []
+    except Exception as error:
+        _put_batch(batches, error, stopped)
+        return
+    if _put_batch(batches, batch, stopped):
+        _put_batch(batches, _SHARD_END, stopped)
+
+
+def _read_shard(batches):
+    while True:
+        batch = batches.get()
+        if batch is _SHARD_END:
+            return
+        if isinstance(batch, Exception):
+            raise batch
+        yield from batch
+
+
+def _sorted_listing(entries):
+    """Restore the name order of a delimiter listing.
+
+    minio yields the objects of every listed page before its prefixes, while
+    the pages follow each other in name order. Objects are held back until no
+    prefix of their page can precede them, which is at most a page of them.
+    """
+    pending = collections.deque()
+    after_prefix = False
+    for entry in entries:
+        if entry.is_dir:
+            while pending and pending[0].object_name < entry.object_name:
+                yield pending.popleft()
+            yield entry
+            after_prefix = True
+            continue
+        if after_prefix:
+            # objects only follow prefixes at the start of the next page
+            yield from pending
+            pending.clear()
+            after_prefix = False
+        pending.append(entry)
+        if len(pending) > config.MINIO_LIST_PAGE_SIZE:
+            # listed in an earlier page than the newest object
+            yield pending.popleft()
+    yield from pending
+
+
+def _discover_shards(minio, bucket_name, prefix=None, depth=1):
+    """Split a bucket into objects and prefixes by streaming delimiter listings.
+
+    A level listed in a single page with fewer prefixes than workers has its
+    prefixes expanded one level deeper, up to MINIO_LIST_SHARD_DEPTH. Yields
+    (name, file) pairs sorted by name, where file is None for a prefix that
+    still has to be listed.
+    """
+    entries = _sorted_listing(_list_objects(minio, bucket_name, prefix, recursive=False))
+    head = list(itertools.islice(entries, config.MINIO_LIST_PAGE_SIZE + 1))
+    expand = depth < config.MINIO_LIST_SHARD_DEPTH and len(head) <= config.MINIO_LIST_PAGE_SIZE and \
+        sum(1 for entry in head if entry.is_dir) < config.MINIO_LIST_WORKERS
+
+    for entry in itertools.chain(head, entries):
+        if not entry.is_dir:
+            yield entry.object_name, _object_to_file(entry)
+        elif expand:
+            # the names under a prefix sort right after it, before its next sibling
+            yield from _discover_shards(minio, bucket_name, entry.object_name, depth + 1)
+        else:
+            yield entry.object_name, None
+
+
+@timing.timed_generator(timing.STORAGE)
+def list_minio_bucket_objects(bucket_name):
+    """Yield every object of a bucket as a dict, sorted by name.
+
+    Prefixes found by _discover_shards are listed concurrently on a bounded
+    thread pool and yielded in order, with at most twice as many shards in
+    flight as there are workers. Both the delimiter listings and each shard
+    are streamed, the latter through a bounded queue of batches, so neither
+    a flat bucket nor one under a single prefix is held in memory as a whole.
+    """
+    minio = get_minio_client()
+    shards = _discover_shards(minio, bucket_name)
+    window = collections.deque()
+    stopped = threading.Event()
 
+    with futures.ThreadPoolExecutor(max_workers=config.MINIO_LIST_WORKERS) as executor:
+        def fill_window():
+            while len(window) < 2 * config.MINIO_LIST_WORKERS:
+                shard = next(shards, None)
+                if shard is None:
+                    return
+                name, file = shard
+                if file is None:
+                    batches = queue.Queue(maxsize=config.MINIO_LIST_SHARD_BUFFER)
+                    executor.submit(_list_shard, minio, bucket_name, name, batches, stopped)
+                    window.append(batches)
+                else:
+                    window.append(file)
 
+        try:
+            fill_window()
+            while window:
+                item = window.popleft()
+                if isinstance(item, queue.Queue):
+                    yield from _read_shard(item)
+                else:
+                    yield item
+                fill_window()
+        finally:
+            # unblock the listings still running when the caller stops early
+            stopped.set()
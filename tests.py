@@ -17,12 +17,37 @@
 # limitations under the License.
 #
 
+import asyncio
+from collections import Counter
+from concurrent import futures
+import datetime
+import os
+import pstats
+import tempfile
+import threading
+import time
 import unittest
+import urllib.request
+from unittest import mock
 import logging
 import grpc
+import urllib3
 from google.protobuf.struct_pb2 import Struct
+from grpc_health.v1 import health, health_pb2, health_pb2_grpc
 from grpc_interceptor.exceptions import GrpcException, InvalidArgument, NotFound, Unknown
+from bson import ObjectId
+from models import documents
 from protos import dataset_pb2, dataset_pb2_grpc
+from utils import version_name
+from cache import ResponseCache, response_cache
+import config
+import manifests
+import metrics
+import profiling
+import services
+import timing
+import warmup
+import aio_server
 import server
 
 # setup logger
@@ -31,6 +56,37 @@ logging.basicConfig(level=logging.NOTSET, format=FORMAT)
 logger = logging.getLogger(__name__)
 
 
+def make_files(*files):
+    """Build sorted manifest entries from (name, size, etag) tuples."""
+    return [{'name': name, 'size': size, 'etag': etag, 'last_modified': '2021-03-01T00:00:00'}
+            for name, size, etag in sorted(files)]
+
+
+def save_version(dataset_id, seq, files, parent=None):
+    """Store a version of files the way CreateVersion does, without listing a bucket."""
+    version_id = ObjectId()
+    manifest = manifests.write_version_tree(version_id, parent, files)
+    return documents.Version(id=version_id, name=version_name(seq), seq=seq, dataset=dataset_id,
+                             related_bucket='tests', author='tests', **manifest).save()
+
+
+def save_legacy_version(dataset_id, files, name='1'):
+    """Store a version embedding its tree, as versions were before manifests."""
+    bucket_tree = [documents.File(name=file['name'], size=file['size']) for file in files]
+    return documents.Version(name=name, dataset=dataset_id, related_bucket='tests', author='tests',
+                             bucket_tree=bucket_tree, size=sum(file['size'] for file in files),
+                             file_count=len(files)).save()
+
+
+def sample_metric(url, series):
+    """Read the value of a series from the metrics endpoint at url, 0 when absent."""
+    with urllib.request.urlopen(url) as response:
+        for line in response.read().decode().splitlines():
+            if line.startswith(series + ' '):
+                return float(line.split(' ')[1])
+    return 0.0
+
+
 class DatasetServicerTest(unittest.TestCase):
 
     def setUp(self):
@@ -76,6 +132,853 @@ class DatasetServicerTest(unittest.TestCase):
         with self.assertRaises(grpc.RpcError) as cm:
             stub.RetrieveDataset(dataset_pb2.ID(id="my-id"))
 
+    def test_update_dataset_invalidates_cache(self):
+        logger.info("test update dataset invalidates cache")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        # prepare a payload
+        payload = {
+            'name': 'fashion-mnist-data',
+            'description': 'Dataset di fashion 28x28.',
+            'scope': "Global"
+        }
+
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(**payload))
+        # the first retrieve fills the cache
+        stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id))
+        dataset.name = 'fashion-mnist-data-v2'
+        stub.UpdateDataset(dataset)
+        response = stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id))
+        self.assertEqual(response.name, 'fashion-mnist-data-v2')
+        # verify a deleted dataset is no longer served from the cache
+        stub.DeleteDataset(dataset_pb2.ID(id=dataset.id))
+        with self.assertRaises(grpc.RpcError) as cm:
+            stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id))
+
+    def test_stream_search_datasets(self):
+        logger.info("test stream search datasets")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        # prepare a payload
+        payload = {
+            'name': 'fashion-mnist-data',
+            'description': 'Dataset di fashion 28x28.',
+            'scope': "Global"
+        }
+
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(**payload))
+        request = dataset_pb2.SearchDatasetRequest(
+            query=dataset_pb2.SearchDatasetRequest.DatasetFilter(id=dataset.id))
+        # verify the dataset is streamed back
+        responses = list(stub.StreamSearchDatasets(request))
+        self.assertEqual(len(responses), 1)
+        self.assertEqual(responses[0].id, dataset.id)
+
+    def test_diff_legacy_version(self):
+        logger.info("test diff legacy version")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='diff', description='diff', scope="Global"))
+        legacy = save_legacy_version(dataset.id, [{'name': 'a', 'size': 1}, {'name': 'b', 'size': 2},
+                                                  {'name': 'c', 'size': 3}])
+        version = save_version(dataset.id, 2, make_files(('a', 1, 'e1'), ('b', 5, 'e2'), ('d', 4, 'e3')))
+
+        responses = list(stub.DiffVersions(dataset_pb2.DiffVersionsRequest(base=str(legacy.id),
+                                                                           target=str(version.id))))
+        changes = [(change.change, change.base.name or change.target.name, change.size_delta)
+                   for response in responses for change in response.changes]
+        # a, unchanged, has no etag in the legacy tree but is not reported as modified
+        self.assertEqual(changes, [(dataset_pb2.Modified, 'b', 3), (dataset_pb2.Removed, 'c', -3),
+                                   (dataset_pb2.Added, 'd', 4)])
+        summary = responses[-1].summary
+        self.assertEqual((summary.added, summary.removed, summary.modified), (1, 1, 1))
+
+        # and the other way round
+        responses = list(stub.DiffVersions(dataset_pb2.DiffVersionsRequest(base=str(version.id),
+                                                                           target=str(legacy.id))))
+        summary = responses[-1].summary
+        self.assertEqual((summary.added, summary.removed, summary.modified), (1, 1, 1))
+
+    def test_concurrent_create_version(self):
+        logger.info("test concurrent create version")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='concurrent', description='concurrent',
+                                                         scope="Global"))
+        count = 5
+        allocated = threading.Barrier(count)
+
+        def name_after_all_allocations(seq):
+            # every call holds a number before any saves, and the highest saves first
+            allocated.wait()
+            time.sleep(0.05 * (count - seq))
+            return version_name(seq)
+
+        def create_version():
+            return stub.CreateVersion(dataset_pb2.Version(dataset=dataset.id, related_bucket='tests', author='tests'))
+
+        with mock.patch('services.list_minio_bucket_objects', side_effect=lambda bucket: iter(make_files(
+                ('a', 1, 'e1')))), mock.patch('server.version_name', side_effect=name_after_all_allocations):
+            with futures.ThreadPoolExecutor(max_workers=count) as executor:
+                versions = list(executor.map(lambda _: create_version(), range(count)))
+
+        # distinct numbers without gaps
+        seqs = sorted(documents.Version.objects(dataset=dataset.id).scalar('seq'))
+        self.assertEqual(seqs, list(range(1, count + 1)))
+        self.assertEqual(sorted(version.name for version in versions), [version_name(seq) for seq in seqs])
+        # the pointer only moves forward, the lower numbers saved last did not move it back
+        dataset = documents.Dataset.objects.get(id=dataset.id)
+        self.assertEqual(dataset.version_seq, count)
+        self.assertEqual(dataset.version, version_name(count))
+
+    def test_create_version_after_legacy_versions(self):
+        logger.info("test create version after legacy versions")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='legacy', description='legacy', scope="Global"))
+        # versions stored before the counter, which backfill-version-seq has not numbered
+        for seq in (1, 2):
+            save_legacy_version(dataset.id, [{'name': 'a', 'size': 1}], name=version_name(seq))
+
+        with mock.patch('services.list_minio_bucket_objects', return_value=iter(make_files(('a', 1, 'e1')))):
+            version = stub.CreateVersion(dataset_pb2.Version(dataset=dataset.id, related_bucket='tests',
+                                                             author='tests'))
+        self.assertEqual(version.name, version_name(3))
+        self.assertEqual(stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id)).version, version_name(3))
+
+    def test_failed_create_version_leaves_no_manifest(self):
+        logger.info("test failed create version leaves no manifest")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='failed', description='failed', scope="Global"))
+        chunks, directories = documents.VersionManifest.objects.count(), documents.VersionDirectory.objects.count()
+
+        with mock.patch('services.list_minio_bucket_objects', return_value=iter(make_files(('a/b', 1, 'e1')))), \
+                mock.patch.object(documents.Version, 'save', side_effect=RuntimeError("save failed")):
+            with self.assertRaises(grpc.RpcError):
+                stub.CreateVersion(dataset_pb2.Version(dataset=dataset.id, related_bucket='tests', author='tests'))
+        self.assertEqual(documents.VersionManifest.objects.count(), chunks)
+        self.assertEqual(documents.VersionDirectory.objects.count(), directories)
+
+    def test_version_tree_in_manifest_chunks(self):
+        logger.info("test version tree in manifest chunks")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='chunks', description='chunks', scope="Global"))
+        files = make_files(*[('file-%d' % i, i, 'e%d' % i) for i in range(7)])
+
+        with mock.patch('services.list_minio_bucket_objects', return_value=iter(files)), \
+                mock.patch('config.MANIFEST_CHUNK_SIZE', 3):
+            version = stub.CreateVersion(dataset_pb2.Version(dataset=dataset.id, related_bucket='tests',
+                                                             author='tests'))
+        self.assertEqual((version.file_count, version.size), (7, 21))
+        # the tree is stored in chunks, not in the version document
+        self.assertEqual(documents.VersionManifest.objects(version=version.id).count(), 3)
+        stored = documents.Version._get_collection().find_one({'_id': ObjectId(version.id)})
+        self.assertFalse(stored.get('bucket_tree'))
+
+        response = stub.RetrieveVersion(dataset_pb2.RetrieveVersionRequest(id=version.id))
+        self.assertEqual([(file.name, file.size, file.etag) for file in response.bucket_tree],
+                         [(file['name'], file['size'], file['etag']) for file in files])
+        response = stub.SearchVersions(dataset_pb2.SearchVersionRequest(
+            query=dataset_pb2.SearchVersionRequest.VersionFilter(dataset=dataset.id)))
+        self.assertEqual(len(response.data[0].bucket_tree), 7)
+
+        # versions created before manifests are read from their embedded tree
+        legacy = save_legacy_version(dataset.id, [{'name': 'a', 'size': 1}, {'name': 'b', 'size': 2}], name='0')
+        response = stub.RetrieveVersion(dataset_pb2.RetrieveVersionRequest(id=str(legacy.id)))
+        self.assertEqual([(file.name, file.size) for file in response.bucket_tree], [('a', 1), ('b', 2)])
+
+    def test_version_basic_view(self):
+        logger.info("test version basic view")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='views', description='views', scope="Global"))
+        version = save_version(dataset.id, 1, make_files(('a', 1, 'e1'), ('b', 2, 'e2')))
+        legacy = save_legacy_version(dataset.id, [{'name': 'a', 'size': 1}], name='0')
+
+        for version_id, file_count, size in ((str(version.id), 2, 3), (str(legacy.id), 1, 1)):
+            full = stub.RetrieveVersion(dataset_pb2.RetrieveVersionRequest(id=version_id, view=dataset_pb2.Full))
+            basic = stub.RetrieveVersion(dataset_pb2.RetrieveVersionRequest(id=version_id, view=dataset_pb2.Basic))
+            self.assertEqual(len(full.bucket_tree), file_count)
+            # the basic view keeps the summary fields without the tree
+            self.assertEqual(len(basic.bucket_tree), 0)
+            self.assertEqual((basic.id, basic.file_count, basic.size), (version_id, file_count, size))
+
+        query = dataset_pb2.SearchVersionRequest.VersionFilter(dataset=dataset.id)
+        response = stub.SearchVersions(dataset_pb2.SearchVersionRequest(query=query, view=dataset_pb2.Basic))
+        self.assertEqual(len(response.data), 2)
+        self.assertFalse(any(version.bucket_tree for version in response.data))
+        responses = list(stub.StreamSearchVersions(dataset_pb2.SearchVersionRequest(query=query,
+                                                                                    view=dataset_pb2.Basic)))
+        self.assertEqual(len(responses), 2)
+        self.assertFalse(any(version.bucket_tree for version in responses))
+
+    def test_delete_dataset_hides_versions(self):
+        logger.info("test delete dataset hides versions")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='deleted', description='deleted', scope="Global"))
+        version = save_version(dataset.id, 1, make_files(('a', 1, 'e1')))
+        request = dataset_pb2.RetrieveVersionRequest(id=str(version.id), view=dataset_pb2.Basic)
+        # cached before the deletion
+        stub.RetrieveVersion(request)
+
+        stub.DeleteDataset(dataset_pb2.ID(id=dataset.id))
+        # the flag is mirrored on the versions, searches filter on it without reading datasets
+        self.assertTrue(documents.Version.objects.get(id=version.id).deleted)
+        with self.assertRaises(grpc.RpcError) as cm:
+            stub.RetrieveVersion(request)
+        self.assertEqual(cm.exception.code(), grpc.StatusCode.NOT_FOUND)
+        search = dataset_pb2.SearchVersionRequest(query=dataset_pb2.SearchVersionRequest.VersionFilter(
+            dataset=dataset.id))
+        self.assertEqual(len(stub.SearchVersions(search).data), 0)
+        self.assertEqual(len(list(stub.StreamSearchVersions(search))), 0)
+
+    def test_delete_dataset_during_create_version(self):
+        logger.info("test delete dataset during create version")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='racing', description='racing', scope="Global"))
+
+        def delete_dataset(seq):
+            # runs after the number is allocated and before the version is saved
+            stub.DeleteDataset(dataset_pb2.ID(id=dataset.id))
+            return version_name(seq)
+
+        with mock.patch('services.list_minio_bucket_objects', return_value=iter(make_files(('a', 1, 'e1')))), \
+                mock.patch('server.version_name', side_effect=delete_dataset):
+            with self.assertRaises(grpc.RpcError) as cm:
+                stub.CreateVersion(dataset_pb2.Version(dataset=dataset.id, related_bucket='tests', author='tests'))
+        self.assertEqual(cm.exception.code(), grpc.StatusCode.NOT_FOUND)
+        self.assertEqual(documents.Version.objects(dataset=dataset.id, deleted=False).count(), 0)
+
+    def test_prepare_database_flags_stored_versions(self):
+        logger.info("test prepare database flags stored versions")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='stored', description='stored', scope="Global"))
+        version = save_legacy_version(dataset.id, make_files(('a', 1, '')))
+        # stored before the deleted field
+        documents.Version._get_collection().update_one({'_id': version.id}, {'$unset': {'deleted': 1}})
+        search = dataset_pb2.SearchVersionRequest(query=dataset_pb2.SearchVersionRequest.VersionFilter(
+            dataset=dataset.id))
+        self.assertEqual(stub.SearchVersions(search).total, 0)
+
+        with mock.patch('config.ENSURE_INDEXES_ON_STARTUP', False):
+            server.prepare_database()
+        self.assertEqual(stub.SearchVersions(search).total, 1)
+        stub.RetrieveVersion(dataset_pb2.RetrieveVersionRequest(id=str(version.id)))
+
+    def _list_pages(self, stub, **kwargs):
+        pages, page_token = [], ''
+        while True:
+            response = stub.ListVersionFiles(dataset_pb2.ListVersionFilesRequest(page_token=page_token, **kwargs))
+            pages.append(([file.name for file in response.files], list(response.prefixes)))
+            page_token = response.next_page_token
+            if not page_token:
+                return pages
+
+    def test_list_version_files_pages(self):
+        logger.info("test list version files pages")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='list', description='list', scope="Global"))
+        files = make_files(*[('dir-%d/file-%d' % (i % 3, i), i, 'e%d' % i) for i in range(10)] + [('top', 1, 'e')])
+        # small chunks, so that pages resume in the middle of chunks and span several of them
+        with mock.patch('config.MANIFEST_CHUNK_SIZE', 3):
+            version = save_version(dataset.id, 1, files)
+
+        pages = self._list_pages(stub, version=str(version.id), limit=4)
+        self.assertEqual([len(names) for names, _ in pages], [4, 4, 3])
+        self.assertEqual([name for names, _ in pages for name in names], [file['name'] for file in files])
+
+        # common prefixes count towards the limit and are never repeated
+        pages = self._list_pages(stub, version=str(version.id), delimiter='/', limit=2)
+        self.assertEqual(pages, [([], ['dir-0/', 'dir-1/']), (['top'], ['dir-2/'])])
+
+        pages = self._list_pages(stub, version=str(version.id), prefix='dir-1/', limit=2)
+        self.assertEqual([name for names, _ in pages for name in names],
+                         [file['name'] for file in files if file['name'].startswith('dir-1/')])
+
+    def test_list_version_files_limit(self):
+        logger.info("test list version files limit")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='limit', description='limit', scope="Global"))
+        version = save_version(dataset.id, 1, make_files(('a', 1, 'e1'), ('b', 2, 'e2')))
+
+        for limit in (1, 10000):
+            response = stub.ListVersionFiles(dataset_pb2.ListVersionFilesRequest(version=str(version.id),
+                                                                                 limit=limit))
+            self.assertEqual(len(response.files), min(limit, 2))
+        for limit in (-1, 10001):
+            with self.assertRaises(grpc.RpcError) as cm:
+                stub.ListVersionFiles(dataset_pb2.ListVersionFilesRequest(version=str(version.id), limit=limit))
+            self.assertEqual(cm.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+        with self.assertRaises(grpc.RpcError) as cm:
+            stub.ListVersionFiles(dataset_pb2.ListVersionFilesRequest(version=str(version.id), page_token='a'))
+        self.assertEqual(cm.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+
+    def test_stat_version_file(self):
+        logger.info("test stat version file")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='stat', description='stat', scope="Global"))
+        with mock.patch('config.MANIFEST_CHUNK_SIZE', 2):
+            version = save_version(dataset.id, 1, make_files(('a', 1, 'e1'), ('b', 2, 'e2'), ('c', 3, 'e3')))
+
+        response = stub.StatVersionFile(dataset_pb2.StatVersionFileRequest(version=str(version.id), name='c'))
+        self.assertEqual((response.name, response.size, response.etag), ('c', 3, 'e3'))
+        # a prefix of an existing name is not a file
+        for name in ('b0', 'd', 'a/'):
+            with self.assertRaises(grpc.RpcError) as cm:
+                stub.StatVersionFile(dataset_pb2.StatVersionFileRequest(version=str(version.id), name=name))
+            self.assertEqual(cm.exception.code(), grpc.StatusCode.NOT_FOUND)
+
+    def test_version_tree_summary(self):
+        logger.info("test version tree summary")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='summary', description='summary', scope="Global"))
+        files = make_files(('a/x', 1, 'e1'), ('a/b/y', 2, 'e2'), ('a/b/z', 3, 'e3'), ('c/w', 4, 'e4'),
+                           ('top', 5, 'e5'))
+        version = save_version(dataset.id, 1, files)
+        self.assertEqual(version.directory_count, 4)
+
+        def summary(**kwargs):
+            response = stub.GetVersionTreeSummary(dataset_pb2.VersionTreeSummaryRequest(
+                version=str(version.id), **kwargs))
+            return [(directory.path, directory.depth, directory.size, directory.file_count)
+                    for directory in response.directories], response.next_page_token
+
+        self.assertEqual(summary(), ([('', 0, 15, 5), ('a/', 1, 6, 3), ('c/', 1, 4, 1)], ''))
+        self.assertEqual(summary(path='a/'), ([('a/', 1, 6, 3), ('a/b/', 2, 5, 2)], ''))
+        # pages of a whole tree
+        directories, page_token = [], ''
+        while True:
+            page, page_token = summary(max_depth=5, limit=1, page_token=page_token)
+            directories += page
+            if not page_token:
+                break
+        self.assertEqual([directory[0] for directory in directories], ['', 'a/', 'a/b/', 'c/'])
+
+        with self.assertRaises(grpc.RpcError) as cm:
+            summary(path='a')
+        self.assertEqual(cm.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+
+    def test_version_tree_summary_without_rollups(self):
+        logger.info("test version tree summary without rollups")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='legacy', description='legacy', scope="Global"))
+        version = save_legacy_version(dataset.id, [{'name': 'a/x', 'size': 1}, {'name': 'b', 'size': 2}])
+        request = dataset_pb2.VersionTreeSummaryRequest(version=str(version.id))
+
+        with self.assertRaises(grpc.RpcError) as cm:
+            stub.GetVersionTreeSummary(request)
+        self.assertEqual(cm.exception.code(), grpc.StatusCode.FAILED_PRECONDITION)
+
+        # what backfill-version-rollups stores
+        version.update(set__directory_count=manifests.write_rollups(version))
+        response = stub.GetVersionTreeSummary(request)
+        self.assertEqual([(directory.path, directory.size, directory.file_count)
+                          for directory in response.directories], [('', 3, 2), ('a/', 1, 1)])
+
+    def test_search_datasets_page_token(self):
+        logger.info("test search datasets page token")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        # datasets created at the same instant are ordered by id
+        create_at = datetime.datetime(2021, 3, 1)
+        ids = [str(documents.Dataset(name='tie', description='tie', scope='Local', project='keyset-ties',
+                                     create_at=create_at).save().id) for _ in range(5)]
+        query = dataset_pb2.SearchDatasetRequest.DatasetFilter(project='keyset-ties')
+
+        found, page_token = [], ''
+        while True:
+            response = stub.SearchDatasets(dataset_pb2.SearchDatasetRequest(query=query, limit=2,
+                                                                             page_token=page_token))
+            self.assertEqual(response.total, 5)
+            found += [dataset.id for dataset in response.data]
+            page_token = response.next_page_token
+            if not page_token:
+                break
+        self.assertEqual(found, sorted(ids, reverse=True))
+
+        with self.assertRaises(grpc.RpcError) as cm:
+            stub.SearchDatasets(dataset_pb2.SearchDatasetRequest(query=query, page_token='not-a-token'))
+        self.assertEqual(cm.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+
+    def test_search_limit_bounds(self):
+        logger.info("test search limit bounds")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        for request in (dataset_pb2.SearchDatasetRequest(limit=-1), dataset_pb2.SearchDatasetRequest(limit=1001),
+                        dataset_pb2.SearchDatasetRequest(page=-1)):
+            with self.assertRaises(grpc.RpcError) as cm:
+                stub.SearchDatasets(request)
+            self.assertEqual(cm.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+        with self.assertRaises(grpc.RpcError) as cm:
+            stub.SearchVersions(dataset_pb2.SearchVersionRequest(limit=-1))
+        self.assertEqual(cm.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+        self.assertLessEqual(len(stub.SearchDatasets(dataset_pb2.SearchDatasetRequest(limit=1000)).data), 1000)
+
+    def test_search_count_modes(self):
+        logger.info("test search count modes")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='counted', description='counted', scope="Global"))
+        for seq in range(1, 4):
+            save_version(dataset.id, seq, make_files(('a', seq, 'e%d' % seq)))
+        empty = stub.CreateDataset(dataset_pb2.Dataset(name='empty', description='empty', scope="Global"))
+
+        def total(dataset_id, count_mode):
+            query = dataset_pb2.SearchVersionRequest.VersionFilter(dataset=dataset_id)
+            return stub.SearchVersions(dataset_pb2.SearchVersionRequest(query=query, limit=1,
+                                                                        count_mode=count_mode)).total
+
+        self.assertEqual(total(dataset.id, dataset_pb2.Exact), 3)
+        self.assertEqual(total(empty.id, dataset_pb2.Exact), 0)
+        # filtered estimates count the results, not the collection
+        self.assertEqual(total(dataset.id, dataset_pb2.Estimated), 3)
+        self.assertEqual(total(empty.id, dataset_pb2.Estimated), 0)
+        with mock.patch('config.ESTIMATED_COUNT_LIMIT', 2):
+            self.assertEqual(total(dataset.id, dataset_pb2.Estimated), 2)
+        self.assertEqual(total(dataset.id, dataset_pb2.Disabled), 0)
+
+        unfiltered = stub.SearchVersions(dataset_pb2.SearchVersionRequest(limit=1, count_mode=dataset_pb2.Estimated))
+        self.assertEqual(unfiltered.total, documents.Version._get_collection().estimated_document_count())
+
+    def test_metrics(self):
+        logger.info("test metrics")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        http_server = metrics.start_http_server(port=0, host='127.0.0.1')
+        self.addCleanup(http_server.shutdown)
+        url = 'http://127.0.0.1:%d/metrics' % http_server.server_address[1]
+
+        def sample(series):
+            return sample_metric(url, series)
+
+        ok = 'grpc_server_handled_total{grpc_method="RetrieveDataset",grpc_code="OK"}'
+        not_found = 'grpc_server_handled_total{grpc_method="RetrieveDataset",grpc_code="NOT_FOUND"}'
+        stream = 'grpc_server_handled_total{grpc_method="StreamSearchDatasets",grpc_code="OK"}'
+        latency = 'grpc_server_handling_seconds_count{grpc_method="RetrieveDataset"}'
+        before = {series: sample(series) for series in (ok, not_found, stream, latency)}
+
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='metrics', description='metrics', scope="Global"))
+        stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id))
+        with self.assertRaises(grpc.RpcError):
+            stub.RetrieveDataset(dataset_pb2.ID(id=str(ObjectId())))
+        list(stub.StreamSearchDatasets(dataset_pb2.SearchDatasetRequest()))
+
+        self.assertEqual(sample(ok) - before[ok], 1)
+        self.assertEqual(sample(not_found) - before[not_found], 1)
+        self.assertEqual(sample(stream) - before[stream], 1)
+        self.assertEqual(sample(latency) - before[latency], 2)
+        self.assertEqual(sample('grpc_server_in_flight{grpc_method="RetrieveDataset"}'), 0)
+        self.assertGreater(sample('grpc_server_response_bytes_count{grpc_method="StreamSearchDatasets"}'), 0)
+        self.assertGreater(sample('datasets_response_cache_misses'), 0)
+
+    def test_timing_trailers(self):
+        logger.info("test timing trailers")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='timing', description='timing', scope="Global"))
+
+        _, call = stub.RetrieveDataset.with_call(dataset_pb2.ID(id=dataset.id))
+        self.assertNotIn(timing.METADATA_KEY, dict(call.trailing_metadata()))
+        # clients ask for the breakdown by sending the key
+        _, call = stub.RetrieveDataset.with_call(dataset_pb2.ID(id=dataset.id),
+                                                 metadata=((timing.METADATA_KEY, '1'),))
+        breakdown = dict(call.trailing_metadata())[timing.METADATA_KEY]
+        categories = [entry.split(';')[0] for entry in breakdown.split(', ')]
+        self.assertIn(timing.SERIALIZATION, categories)
+        self.assertEqual(categories[-2:], [timing.OTHER, 'total'])
+
+    def test_profiling(self):
+        logger.info("test profiling")
+        stub = dataset_pb2_grpc.DatasetServicesStub(self._channel)
+        dataset = stub.CreateDataset(dataset_pb2.Dataset(name='profile', description='profile', scope="Global"))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        directory = directory.name
+
+        with mock.patch.multiple(profiling.settings, enabled=True, mode=profiling.CPROFILE, sample_rate=1.0,
+                                 threshold=0.0, methods={'RetrieveDataset'}, directory=directory):
+            stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id))
+            # other methods are not profiled
+            stub.SearchDatasets(dataset_pb2.SearchDatasetRequest())
+            profiles = os.listdir(directory)
+            self.assertEqual(len(profiles), 1)
+            self.assertTrue(profiles[0].startswith('RetrieveDataset-') and profiles[0].endswith('.prof'))
+            self.assertTrue(pstats.Stats(os.path.join(directory, profiles[0])).total_calls)
+
+            # rpcs faster than the threshold are not written
+            with mock.patch.object(profiling.settings, 'threshold', 60.0):
+                stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id))
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+            # SIGUSR2 switches profiling off
+            profiling.toggle()
+            self.assertFalse(profiling.settings.enabled)
+            stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id))
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+
+class AsyncServerTest(unittest.TestCase):
+
+    def setUp(self):
+        http_server = metrics.start_http_server(port=0, host='127.0.0.1')
+        self.addCleanup(http_server.shutdown)
+        self._metrics_url = 'http://127.0.0.1:%d/metrics' % http_server.server_address[1]
+
+    @staticmethod
+    def _run(test):
+        async def main():
+            aio_grpc_server, port = aio_server.create_server('[::]:0')
+            await aio_grpc_server.start()
+            try:
+                async with grpc.aio.insecure_channel('localhost:%d' % port) as channel:
+                    await test(dataset_pb2_grpc.DatasetServicesStub(channel))
+            finally:
+                await aio_grpc_server.stop(None)
+        asyncio.run(main())
+
+    def test_unary(self):
+        logger.info("test aio unary")
+        ok = 'grpc_server_handled_total{grpc_method="RetrieveDataset",grpc_code="OK"}'
+        before = sample_metric(self._metrics_url, ok)
+
+        async def test(stub):
+            dataset = await stub.CreateDataset(dataset_pb2.Dataset(name='aio', description='aio', scope="Global"))
+            call = stub.RetrieveDataset(dataset_pb2.ID(id=dataset.id), metadata=((timing.METADATA_KEY, '1'),))
+            self.assertEqual((await call).name, 'aio')
+            self.assertIn(timing.METADATA_KEY, [key for key, _ in await call.trailing_metadata()])
+
+        self._run(test)
+        self.assertEqual(sample_metric(self._metrics_url, ok) - before, 1)
+
+    def test_error_status(self):
+        logger.info("test aio error status")
+        not_found = 'grpc_server_handled_total{grpc_method="RetrieveDataset",grpc_code="NOT_FOUND"}'
+        before = sample_metric(self._metrics_url, not_found)
+
+        async def test(stub):
+            with self.assertRaises(grpc.aio.AioRpcError) as cm:
+                await stub.RetrieveDataset(dataset_pb2.ID(id=str(ObjectId())),
+                                           metadata=((timing.METADATA_KEY, '1'),))
+            self.assertEqual(cm.exception.code(), grpc.StatusCode.NOT_FOUND)
+            # the breakdown is sent before aborting
+            self.assertIn(timing.METADATA_KEY, [key for key, _ in cm.exception.trailing_metadata()])
+            with self.assertRaises(grpc.aio.AioRpcError) as cm:
+                await stub.SearchDatasets(dataset_pb2.SearchDatasetRequest(page_token='not-a-token'))
+            self.assertEqual(cm.exception.code(), grpc.StatusCode.INVALID_ARGUMENT)
+
+        self._run(test)
+        self.assertEqual(sample_metric(self._metrics_url, not_found) - before, 1)
+
+    def test_streaming(self):
+        logger.info("test aio streaming")
+        stream = 'grpc_server_handled_total{grpc_method="StreamSearchDatasets",grpc_code="OK"}'
+        before = sample_metric(self._metrics_url, stream)
+
+        async def test(stub):
+            ids = []
+            for index in range(3):
+                dataset = await stub.CreateDataset(dataset_pb2.Dataset(
+                    name='aio-%d' % index, description='aio', scope="Local", project='aio-stream'))
+                ids.append(dataset.id)
+            query = dataset_pb2.SearchDatasetRequest.DatasetFilter(project='aio-stream')
+            found = [dataset.id async for dataset in stub.StreamSearchDatasets(
+                dataset_pb2.SearchDatasetRequest(query=query))]
+            self.assertEqual(sorted(found), sorted(ids))
+
+            # errors raised while streaming are mapped too
+            with self.assertRaises(grpc.aio.AioRpcError) as cm:
+                async for _ in stub.DiffVersions(dataset_pb2.DiffVersionsRequest(
+                        base=str(ObjectId()), target=str(ObjectId()))):
+                    pass
+            self.assertEqual(cm.exception.code(), grpc.StatusCode.NOT_FOUND)
+
+        self._run(test)
+        self.assertEqual(sample_metric(self._metrics_url, stream) - before, 1)
+
+
+class ServeTest(unittest.TestCase):
+
+    def test_warm_up_fills_cache(self):
+        logger.info("test warm up fills cache")
+        dataset = documents.Dataset(name='hot', description='hot', scope='Local').save()
+        version = save_version(dataset.id, 1, make_files(('a', 1, 'e1')))
+        dataset.update(set__version_seq=1, set__version=version.name)
+        response_cache.clear()
+
+        # the object store is not needed by the other steps
+        with mock.patch('warmup.prime_minio_pool'):
+            warmup.warm_up(server.DatasetServicer())
+        self.assertIsNotNone(response_cache.get(('dataset', str(dataset.id))))
+        self.assertIsNotNone(response_cache.get(('version', str(version.id), 'Basic')))
+
+    def test_drain(self):
+        logger.info("test drain")
+        health_servicer = health.HealthServicer()
+        grpc_server, port = server.create_server('[::]:0', health_servicer)
+        grpc_server.start()
+        for service in server.HEALTH_SERVICES:
+            health_servicer.set(service, health_pb2.HealthCheckResponse.SERVING)
+        channel = grpc.insecure_channel('localhost:%d' % port)
+        self.addCleanup(channel.close)
+        health_stub = health_pb2_grpc.HealthStub(channel)
+        check = health_pb2.HealthCheckRequest(service='datasets.DatasetServices')
+        self.assertEqual(health_stub.Check(check).status, health_pb2.HealthCheckResponse.SERVING)
+
+        with mock.patch('config.SHUTDOWN_DRAIN_DELAY', 0.5), mock.patch('config.SHUTDOWN_GRACE_PERIOD', 1.0):
+            draining = threading.Thread(target=server.drain, args=(grpc_server, health_servicer))
+            draining.start()
+            time.sleep(0.1)
+            # reported NOT_SERVING while rpcs are still served
+            self.assertEqual(health_stub.Check(check).status, health_pb2.HealthCheckResponse.NOT_SERVING)
+            stub = dataset_pb2_grpc.DatasetServicesStub(channel)
+            stub.CreateDataset(dataset_pb2.Dataset(name='drain', description='drain', scope="Global"))
+            draining.join()
+        self.assertFalse(grpc_server.wait_for_termination(timeout=5))
+
+
+class ManifestsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = documents.Dataset(name='manifests', description='manifests', scope='Local').save()
+
+    def test_version_tree_delta(self):
+        logger.info("test version tree delta")
+        first = save_version(self.dataset.id, 1, make_files(('a', 1, 'e1'), ('b', 2, 'e2'), ('c', 3, 'e3')))
+        self.assertEqual((first.manifest_kind, first.delta_depth), (manifests.FULL, 0))
+
+        second = save_version(self.dataset.id, 2, make_files(('a', 1, 'e1'), ('b', 5, 'e4'), ('d', 4, 'e5')),
+                              parent=first)
+        self.assertEqual((second.manifest_kind, second.delta_depth), (manifests.DELTA, 1))
+        self.assertEqual(second.parent.id, first.id)
+        # only the changes are stored, the unchanged a is not
+        entries = [(entry['name'], entry['change']) for entry in manifests._iter_entries(second)]
+        self.assertEqual(entries, [('b', manifests.MODIFIED), ('c', manifests.REMOVED), ('d', manifests.ADDED)])
+        self.assertEqual((second.file_count, second.size), (3, 10))
+
+    def test_full_manifest_at_max_delta_depth(self):
+        logger.info("test full manifest at max delta depth")
+        with mock.patch('config.MANIFEST_MAX_DELTA_DEPTH', 2):
+            parent = None
+            for seq in range(1, 5):
+                parent = save_version(self.dataset.id, seq, make_files(('a', seq, 'e%d' % seq)), parent=parent)
+                expected = (manifests.FULL, 0) if seq in (1, 4) else (manifests.DELTA, seq - 1)
+                self.assertEqual((parent.manifest_kind, parent.delta_depth), expected)
+                self.assertEqual(list(manifests.iter_files(parent)), make_files(('a', seq, 'e%d' % seq)))
+
+    def test_apply_delta_chain(self):
+        logger.info("test apply delta chain")
+        trees = [
+            make_files(('a', 1, 'e1'), ('b', 2, 'e2'), ('c', 3, 'e3')),
+            # c removed, d added
+            make_files(('a', 1, 'e1'), ('b', 2, 'e2'), ('d', 4, 'e4')),
+            # a modified, b removed, c added back
+            make_files(('a', 6, 'e6'), ('c', 7, 'e7'), ('d', 4, 'e4')),
+            # nothing changed
+            make_files(('a', 6, 'e6'), ('c', 7, 'e7'), ('d', 4, 'e4')),
+            # everything removed but a new file
+            make_files(('e', 8, 'e8')),
+        ]
+        parent = None
+        for seq, files in enumerate(trees, 1):
+            parent = save_version(self.dataset.id, seq, files, parent=parent)
+            self.assertEqual(parent.delta_depth, seq - 1)
+            self.assertEqual(list(manifests.iter_files(parent)), files)
+            # ranges are rebuilt from the same chain
+            self.assertEqual(list(manifests.iter_files(parent, 'b', 'd')),
+                             [file for file in files if 'b' <= file['name'] < 'd'])
+
+    def test_apply_delta(self):
+        logger.info("test apply delta")
+        files = [{'name': 'a', 'size': 1}, {'name': 'b', 'size': 2}]
+        changes = [{'name': 'a', 'size': 0, 'change': manifests.REMOVED},
+                   {'name': 'b', 'size': 3, 'change': manifests.MODIFIED},
+                   {'name': 'c', 'size': 4, 'change': manifests.ADDED}]
+        self.assertEqual(list(manifests.apply_delta(files, changes)),
+                         [{'name': 'b', 'size': 3}, {'name': 'c', 'size': 4}])
+
+
+class FakeObject:
+
+    def __init__(self, object_name, is_dir=False):
+        self.object_name = object_name
+        self.is_dir = is_dir
+        self.size = 1
+        self.etag = 'e'
+        self.last_modified = None
+
+
+def fake_listing(names, listed=None):
+    """Stand in for services._list_objects over a bucket holding names.
+
+    Like minio, every page of a delimiter listing yields its objects before
+    its prefixes. listed counts the entries yielded.
+    """
+    listed = listed if listed is not None else Counter()
+
+    def list_objects(minio, bucket_name, prefix, recursive):
+        prefix = prefix or ''
+        if recursive:
+            entries = [FakeObject(name) for name in names if name.startswith(prefix)]
+        else:
+            children = {}
+            for name in names:
+                if name.startswith(prefix):
+                    head, sep, _ = name[len(prefix):].partition('/')
+                    children[prefix + head + sep] = bool(sep)
+            entries = [FakeObject(name, is_dir) for name, is_dir in sorted(children.items())]
+        page_size = config.MINIO_LIST_PAGE_SIZE
+        for begin in range(0, len(entries), page_size):
+            page = entries[begin:begin + page_size]
+            for entry in [entry for entry in page if not entry.is_dir] + [entry for entry in page if entry.is_dir]:
+                listed['entries'] += 1
+                yield entry
+    return list_objects
+
+
+class ListBucketObjectsTest(unittest.TestCase):
+
+    def setUp(self):
+        patches = [mock.patch('services.get_minio_client'), mock.patch('config.MINIO_LIST_PAGE_SIZE', 3),
+                   mock.patch('config.MINIO_LIST_WORKERS', 2), mock.patch('config.MINIO_LIST_SHARD_BUFFER', 1)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_list_sorted_in_batches(self):
+        logger.info("test list bucket objects sorted in batches")
+        names = ['top'] + ['a/%02d' % i for i in range(20)] + ['b/c/%02d' % i for i in range(7)] + ['d/x']
+        with mock.patch('services._list_objects', fake_listing(names)):
+            listed = [file['name'] for file in services.list_minio_bucket_objects('bucket')]
+        self.assertEqual(listed, sorted(names))
+
+    def test_list_flat_bucket_lazily(self):
+        logger.info("test list flat bucket lazily")
+        names = ['%05d' % i for i in range(1000)] + ['%05d/x' % i for i in range(0, 1000, 7)]
+        listed = Counter()
+        with mock.patch('services._list_objects', fake_listing(names, listed)):
+            listing = services.list_minio_bucket_objects('bucket')
+            self.assertEqual(next(listing)['name'], '00000')
+            # a few pages are read ahead, not the whole bucket
+            self.assertLess(listed['entries'], 50)
+            self.assertEqual([file['name'] for file in listing], sorted(names)[1:])
+
+    def test_stop_early(self):
+        logger.info("test list bucket objects stopped early")
+        names = ['%s/%03d' % (prefix, i) for prefix in 'abcdef' for i in range(100)]
+        with mock.patch('services._list_objects', fake_listing(names)):
+            listing = services.list_minio_bucket_objects('bucket')
+            self.assertEqual(next(listing)['name'], 'a/000')
+            # the listings blocked on their full queues give up
+            listing.close()
+
+    def test_listing_error(self):
+        logger.info("test list bucket objects error")
+        listing = fake_listing(['a/1', 'b/1'])
+
+        def failing(minio, bucket_name, prefix, recursive):
+            if prefix == 'b/':
+                raise OSError('unavailable')
+            return listing(minio, bucket_name, prefix, recursive)
+
+        with mock.patch('services._list_objects', failing):
+            with self.assertRaises(OSError):
+                list(services.list_minio_bucket_objects('bucket'))
+
+
+class MinioPoolStatsTest(unittest.TestCase):
+
+    def test_pool_stats(self):
+        logger.info("test minio pool stats")
+        with mock.patch('config.MINIO_POOL_MAXSIZE', 2), mock.patch('config.MINIO_POOL_BLOCK', True):
+            http = services._create_http_client()
+        self.addCleanup(http.clear)
+        with mock.patch('services._minio_client', mock.Mock(_http=http)):
+            # connections are only opened by requests, taking them needs no server
+            pool = http.connection_from_host('localhost', 9000, scheme='http')
+            first, second = pool._get_conn(), pool._get_conn()
+            stats = services.get_minio_pool_stats()
+            self.assertEqual((stats['pools'], stats['maxsize'], stats['in_use'], stats['idle'], stats['waits']),
+                             (1, 2, 2, 0, 0))
+            self.assertEqual(stats['connections'], 2)
+
+            # a full blocking pool makes the next request wait
+            with self.assertRaises(urllib3.exceptions.EmptyPoolError):
+                pool._get_conn(timeout=0.01)
+            pool._put_conn(first)
+            stats = services.get_minio_pool_stats()
+            self.assertEqual((stats['in_use'], stats['idle'], stats['waits']), (1, 1, 1))
+
+            pool._put_conn(second)
+            self.assertEqual(services.get_minio_pool_stats()['in_use'], 0)
+            pool._get_conn()
+            stats = services.get_minio_pool_stats()
+            # reused, not a new connection
+            self.assertEqual((stats['in_use'], stats['idle'], stats['connections'], stats['waits']), (1, 1, 2, 1))
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_put_after_invalidate_is_dropped(self):
+        logger.info("test put after invalidate is dropped")
+        cache = ResponseCache(max_bytes=1024, ttl=60)
+        # a reader loads the response while the dataset is updated
+        generation = cache.generation()
+        cache.invalidate('dataset')
+        cache.put('key', b'stale', group='dataset', generation=generation)
+        self.assertIsNone(cache.get('key'))
+        # the same goes for a single discarded entry
+        generation = cache.generation()
+        cache.discard('key', group='dataset')
+        cache.put('key', b'stale', group='dataset', generation=generation)
+        self.assertIsNone(cache.get('key'))
+        # other groups and later readers are not affected
+        cache.put('other', b'fresh', group='other', generation=generation)
+        cache.put('key', b'fresh', group='dataset', generation=cache.generation())
+        self.assertEqual(cache.get('other'), b'fresh')
+        self.assertEqual(cache.get('key'), b'fresh')
+
+    def test_forgotten_invalidations_drop_older_puts(self):
+        logger.info("test forgotten invalidations drop older puts")
+        cache = ResponseCache(max_bytes=1024, ttl=60)
+        cache.max_invalidations = 2
+        generation = cache.generation()
+        for group in ('a', 'b', 'c'):
+            cache.invalidate(group)
+        # the invalidation of a is forgotten, so any put taken before it is stale
+        cache.put('key', b'stale', group='a', generation=generation)
+        self.assertIsNone(cache.get('key'))
+
+
+class TimingTest(unittest.TestCase):
+
+    def test_exclusive_sections(self):
+        logger.info("test exclusive sections")
+        breakdown = timing.Breakdown()
+        listener = timing.MongoCommandListener()
+
+        def rpc():
+            with timing.section(timing.SERIALIZATION):
+                time.sleep(0.06)
+                # a mongo command issued while converting counts as mongo only
+                listener.succeeded(mock.Mock(duration_micros=50000))
+
+        timing.run(breakdown, rpc)
+        # commands outside of an rpc are not counted
+        listener.succeeded(mock.Mock(duration_micros=50000))
+        summary = breakdown.summary()
+        self.assertEqual(summary[timing.MONGO], 0.05)
+        self.assertGreater(summary[timing.SERIALIZATION], 0)
+        self.assertLess(summary[timing.SERIALIZATION], summary['total'] - 0.05)
+        self.assertAlmostEqual(summary[timing.MONGO] + summary[timing.SERIALIZATION] + summary[timing.OTHER],
+                               summary['total'])
+
+
+class ProfilingTest(unittest.TestCase):
+
+    def test_sampler_stops_when_idle(self):
+        logger.info("test sampler stops when idle")
+        sampler = profiling._Sampler()
+        for _ in range(2):
+            stacks = Counter()
+            sampler.add(threading.get_ident(), stacks)
+            thread = sampler._thread
+            time.sleep(profiling.settings.interval * 10)
+            sampler.remove(threading.get_ident())
+            thread.join(timeout=1)
+            # the stacks of this test were sampled, and the thread exited once nothing was left to sample
+            self.assertTrue(any('test_sampler_stops_when_idle' in stack for stack in stacks))
+            self.assertFalse(thread.is_alive())
+            self.assertIsNone(sampler._thread)
+
 
 if __name__ == '__main__':
     logger.info("tests DatasetsServicer")
@@ -0,0 +1,161 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Per-rpc breakdown of the time spent in mongo, the object store and serialization.
+
+The breakdown of the running rpc lives in a context variable. Mongo commands
+are timed by a pymongo command listener, object store calls and conversions
+by the sections wrapping them. Sections measure exclusive time: the mongo
+commands issued while converting a version count as mongo, not serialization.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+import contextvars
+import functools
+import logging
+import time
+
+from pymongo import monitoring
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# invocation metadata asking for the breakdown in the trailing metadata
+METADATA_KEY = 'x-timing'
+
+MONGO, STORAGE, SERIALIZATION, OTHER = 'mongo', 'storage', 'serialization', 'other'
+
+_current = contextvars.ContextVar('timing_breakdown', default=None)
+_END = object()
+
+
+class Breakdown:
+    """Seconds spent per category by an rpc."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.times = defaultdict(float)
+        # time spent in the sections nested in each open section, the first
+        # entry being the rpc itself
+        self._nested = [0.0]
+
+    @contextmanager
+    def section(self, category):
+        self._nested.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.times[category] += elapsed - self._nested.pop()
+            self._nested[-1] += elapsed
+
+    def add(self, category, seconds):
+        """Count seconds measured elsewhere, such as a mongo command, in category."""
+        self.times[category] += seconds
+        self._nested[-1] += seconds
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def summary(self):
+        """Return the seconds per category, the remainder of the rpc's time as other."""
+        total = self.total()
+        summary = dict(self.times)
+        summary[OTHER] = max(total - self._nested[0], 0.0)
+        summary['total'] = total
+        return summary
+
+
+def format_summary(summary):
+    """Format a summary like a Server-Timing header, durations in milliseconds."""
+    return ", ".join("{};dur={:.2f}".format(category, seconds * 1000) for category, seconds in summary.items())
+
+
+def run(breakdown, function, *args):
+    """Call function with breakdown as the current breakdown."""
+    token = _current.set(breakdown)
+    try:
+        return function(*args)
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def section(category):
+    breakdown = _current.get()
+    if breakdown is None:
+        yield
+        return
+    with breakdown.section(category):
+        yield
+
+
+def timed(category):
+    """Decorate a function so that calls are counted in category."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with section(category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_generator(category):
+    """Decorate a generator function so that the time to produce each item is counted in category."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            items = function(*args, **kwargs)
+            try:
+                while True:
+                    with section(category):
+                        item = next(items, _END)
+                    if item is _END:
+                        return
+                    yield item
+            finally:
+                items.close()
+        return wrapper
+    return decorator
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Counts the duration of every mongo command in the current breakdown."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        breakdown = _current.get()
+        if breakdown is not None:
+            breakdown.add(MONGO, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+
+def finish(breakdown, method, context):
+    """Log the breakdown of a slow rpc and send it as trailing metadata when asked."""
+    summary = breakdown.summary()
+    if config.TIMING_SLOW_THRESHOLD and summary['total'] >= config.TIMING_SLOW_THRESHOLD:
+        logger.warning("slow rpc {} took {:.3f}s: {}".format(method, summary['total'], format_summary(summary)))
+    if config.TIMING_TRAILERS or any(key == METADATA_KEY for key, _ in context.invocation_metadata() or ()):
+        context.set_trailing_metadata(((METADATA_KEY, format_summary(summary)),))
@@ -16,12 +16,21 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import base64
+import datetime
+import json
+
 from bson import ObjectId
 
 
-def increment_version(version: str):
-    current_id = int(version.replace('.', ''))
-    return '.'.join(list(str(current_id + 1)))
+def version_name(seq: int):
+    """Name of the seq-th version of a dataset: 1, 2, ..., 9, 1.0, 1.1, ..."""
+    return '.'.join(list(str(seq)))
+
+
+def version_seq(name: str):
+    """Inverse of version_name."""
+    return int(name.replace('.', ''))
 
 
 def construct_mongo_query(data: dict, mappings: dict, ids: list):
@@ -34,3 +43,31 @@ def construct_mongo_query(data: dict, mappings: dict, ids: list):
         if key in ids:
             query[key] = ObjectId(query[key])
     return query
+
+
+def encode_page_token(document):
+    """Encode the keyset position (create_at, id) of a document as an opaque token."""
+    position = [document.create_at.isoformat(), str(document.id)]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_page_token(token: str):
+    """Decode a token built by encode_page_token, raising ValueError if it is malformed."""
+    try:
+        create_at, id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return datetime.datetime.fromisoformat(create_at), ObjectId(id)
+    except Exception as e:
+        raise ValueError("Invalid page token.") from e
+
+
+def encode_file_token(name: str):
+    """Encode the name a file listing resumes from as an opaque token."""
+    return base64.urlsafe_b64encode(name.encode()).decode()
+
+
+def decode_file_token(token: str):
+    """Decode a token built by encode_file_token, raising ValueError if it is malformed."""
+    try:
+        return base64.urlsafe_b64decode(token.encode()).decode()
+    except Exception as e:
+        raise ValueError("Invalid page token.") from e
@@ -0,0 +1,108 @@
+# encoding: utf-8
+#
+# Copyright (c) 2020-2021 Hopenly srl.
+#
+# This file is part of Ilyde.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Warm-up run at startup, before the server reports itself ready.
+
+The first rpcs served by a new process would otherwise pay for opening pooled
+connections, the first use of every schema and message class, and an empty
+response cache.
+"""
+from concurrent import futures
+import datetime
+import logging
+import time
+import uuid
+
+from marshmallow import ValidationError
+
+from models import documents, get_client
+from protos import dataset_pb2
+
+import config
+import converters
+import serializers
+import services
+
+logger = logging.getLogger(__name__)
+
+
+def _concurrently(function, count):
+    # concurrent calls make the pools open count connections instead of reusing one
+    with futures.ThreadPoolExecutor(max_workers=count) as executor:
+        list(executor.map(lambda _: function(), range(count)))
+
+
+def prime_mongo_pool():
+    client = get_client()
+    _concurrently(lambda: client.admin.command('ping'), config.WARMUP_POOL_CONNECTIONS)
+
+
+def prime_minio_pool():
+    minio = services.get_minio_client()
+    # a missing bucket is a cheap authenticated round trip
+    bucket = 'warmup-{}'.format(uuid.uuid4().hex)
+    _concurrently(lambda: minio.bucket_exists(bucket), config.WARMUP_POOL_CONNECTIONS)
+
+
+def warm_serializers():
+    """Encode and decode every message type, and load each schema once."""
+    for name in dataset_pb2.DESCRIPTOR.message_types_by_name:
+        message_class = getattr(dataset_pb2, name)
+        message_class.FromString(message_class().SerializeToString())
+    for schema in vars(serializers).values():
+        if isinstance(schema, serializers.BaseSchema):
+            try:
+                schema.load(schema.__proto_class__())
+            except ValidationError:
+                # empty messages are invalid for most schemas, they are still compiled
+                pass
+    now = datetime.datetime.now()
+    dataset = documents.Dataset(name='warm-up', description='', scope='Local', create_at=now, last_update=now)
+    converters.dataset_to_proto(dataset)
+    converters.version_to_proto(documents.Version(name='1', dataset=dataset, related_bucket='', author='',
+                                                  create_at=now), files=())
+
+
+def fill_caches(servicer):
+    """Retrieve the most recent datasets and their current version through the servicer."""
+    count = 0
+    datasets = documents.Dataset.objects(deleted=False).order_by('-create_at', '-id') \
+        .only('id', 'version_seq').limit(config.WARMUP_HOT_DATASETS)
+    for dataset in datasets:
+        servicer.RetrieveDataset(dataset_pb2.ID(id=str(dataset.id)), None)
+        if dataset.version_seq:
+            version = documents.Version.objects(dataset=dataset.id, seq=dataset.version_seq).only('id').first()
+            if version is not None:
+                servicer.RetrieveVersion(dataset_pb2.RetrieveVersionRequest(id=str(version.id),
+                                                                            view=dataset_pb2.Basic), None)
+        count += 1
+    return count
+
+
+def warm_up(servicer):
+    """Run every warm-up step, only a failing mongo aborts the startup."""
+    started = time.perf_counter()
+    prime_mongo_pool()
+    try:
+        prime_minio_pool()
+    except Exception as e:
+        # versions cannot be created without the object store, every other rpc can be served
+        logger.warning("could not warm up the object store connections: {}".format(e))
+    warm_serializers()
+    count = fill_caches(servicer)
+    logger.info("warmed up in {:.2f}s, {} datasets cached".format(time.perf_counter() - started, count))